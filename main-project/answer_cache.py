@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Protocol, Set, Tuple
+
+import numpy as np
+
+from ..text_search import tokenize
+
+
+class QueryEmbedder(Protocol):
+    name: str
+    # Whether vectors must be re-weighted by corpus IDF before comparing.
+    uses_idf: bool
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class HashedTfidfEmbedder:
+    """Dependency-free fallback: hashed word, bigram and char-trigram counts."""
+
+    uses_idf = True
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashed-tfidf-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = tokenize(text)
+        features = [f"w:{w}" for w in words]
+        features.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+        joined = f" {' '.join(words)} "
+        features.extend(f"c:{joined[i:i + 3]}" for i in range(len(joined) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                weight = 1.0 if feature[0] != "c" else 0.5
+                out[row, bucket] += weight
+        return np.log1p(out)
+
+
+class SentenceTransformerEmbedder:
+    uses_idf = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = f"st-{model_name}"
+        self._model = SentenceTransformer(model_name)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._model.encode(texts, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def build_embedder(model_name: Optional[str]) -> QueryEmbedder:
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name)
+        except ImportError:
+            pass
+    return HashedTfidfEmbedder()
+
+
+@dataclass
+class AnswerMatch:
+    name: str
+    query: str
+    created_at: float
+    similarity: float
+
+
+class SemanticAnswerCache:
+    """Nearest-neighbour lookup of past research queries.
+
+    Vectors are cached in SQLite per embedder and held in memory as one
+    matrix, so a lookup is a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        embedder: QueryEmbedder,
+        threshold: float = 0.9,
+        max_age_seconds: float = 72 * 3600,
+    ):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._entries: Optional[List[Tuple[str, str, float]]] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS answers (
+                    name TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS vectors (
+                    name TEXT NOT NULL,
+                    embedder TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (name, embedder)
+                );
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def names(self) -> Set[str]:
+        with self._lock:
+            rows = self._connection().execute("SELECT name FROM answers").fetchall()
+        return {name for (name,) in rows}
+
+    def add(self, name: str, query: str, created_at: Optional[float] = None) -> None:
+        self.add_many([(name, query, created_at or time.time())])
+
+    def add_many(self, entries: Iterable[Tuple[str, str, float]]) -> None:
+        entries = list(entries)
+        if not entries:
+            return
+        vectors = self.embedder.embed([query for _, query, _ in entries])
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO answers (name, query, created_at) VALUES (?, ?, ?)",
+                entries,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (name, embedder, vector) VALUES (?, ?, ?)",
+                [
+                    (name, self.embedder.name, vec.tobytes())
+                    for (name, _, _), vec in zip(entries, vectors)
+                ],
+            )
+            conn.commit()
+            self._entries = None
+            self._matrix = None
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM answers WHERE name = ?", (name,))
+            conn.execute("DELETE FROM vectors WHERE name = ?", (name,))
+            conn.commit()
+            self._entries = None
+            self._matrix = None
+
+    def _load(self) -> Tuple[List[Tuple[str, str, float]], np.ndarray]:
+        if self._entries is not None and self._matrix is not None:
+            return self._entries, self._matrix
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT a.name, a.query, a.created_at, v.vector FROM answers a"
+            " LEFT JOIN vectors v ON v.name = a.name AND v.embedder = ?"
+            " ORDER BY a.created_at",
+            (self.embedder.name,),
+        ).fetchall()
+        entries = [(name, query, created_at) for name, query, created_at, _ in rows]
+        missing = [i for i, row in enumerate(rows) if row[3] is None]
+        vectors: List[Optional[np.ndarray]] = [
+            None if row[3] is None else np.frombuffer(row[3], dtype=np.float32)
+            for row in rows
+        ]
+        if missing:
+            # Entries written by a different embedder are re-embedded once.
+            fresh = self.embedder.embed([rows[i][1] for i in missing])
+            conn.executemany(
+                "INSERT OR REPLACE INTO vectors (name, embedder, vector) VALUES (?, ?, ?)",
+                [(rows[i][0], self.embedder.name, fresh[j].tobytes()) for j, i in enumerate(missing)],
+            )
+            conn.commit()
+            for j, i in enumerate(missing):
+                vectors[i] = fresh[j]
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 1), dtype=np.float32)
+        self._entries, self._matrix = entries, matrix
+        return entries, matrix
+
+    def lookup(self, query: str, now: Optional[float] = None) -> Optional[AnswerMatch]:
+        now = now or time.time()
+        with self._lock:
+            entries, matrix = self._load()
+        if not entries:
+            return None
+
+        fresh = np.array(
+            [now - created_at <= self.max_age_seconds for _, _, created_at in entries]
+        )
+        if not fresh.any():
+            return None
+
+        q = self.embedder.embed([query])[0]
+        docs = matrix
+        if self.embedder.uses_idf:
+            df = (matrix > 0).sum(axis=0)
+            idf = np.log((1.0 + len(entries)) / (1.0 + df)) + 1.0
+            q = q * idf
+            docs = matrix * idf
+        q_norm = np.linalg.norm(q)
+        if not q_norm:
+            return None
+        doc_norms = np.linalg.norm(docs, axis=1)
+        doc_norms[doc_norms == 0] = 1.0
+        sims = (docs @ q) / (doc_norms * q_norm)
+        sims[~fresh] = -1.0
+
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+        name, stored_query, created_at = entries[best]
+        return AnswerMatch(
+            name=name, query=stored_query, created_at=created_at, similarity=float(sims[best])
+        )
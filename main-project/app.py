@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import os
 import argparse
+import dataclasses
 import sys
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Tuple
 
 _env_backup_app = {}
 for key in ['OPENAI_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_API_KEY', 'ANTHROPIC_API_KEY']:
@@ -12,10 +16,13 @@ for key in ['OPENAI_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_API_KEY', 'ANTHROPIC_API
 
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
 
-from .agents.research_crew import run_research_flow
 from .config import load_config
-from .knowledge.repository import KnowledgeRepository
+from .resources import prewarm, shared_repository
+
+if TYPE_CHECKING:
+    from .agents.research_crew import ResearchEvent
 
 
 console = Console()
@@ -28,13 +35,90 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument(
         "query",
         type=str,
+        nargs="?",
         help="Technology research question or topic (in quotes).",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Always run a fresh research crew, even if a similar report exists.",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Refresh the last report for this query with only sources that are new since.",
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Only print the final report instead of streaming progress and writer output.",
+    )
+    parser.add_argument(
+        "--tag",
+        action="append",
+        default=[],
+        metavar="TAG",
+        help="Tag the saved report (repeatable); tags can be filtered in the knowledge base.",
+    )
+    checkpoint_group = parser.add_argument_group("checkpoints")
+    checkpoint_group.add_argument(
+        "--resume-run",
+        metavar="RUN_ID",
+        help="Continue a failed or interrupted run after its last completed task.",
+    )
+    checkpoint_group.add_argument(
+        "--rewrite",
+        metavar="RUN_ID",
+        help="Re-run only the writer on the research notes saved by RUN_ID.",
+    )
+    checkpoint_group.add_argument(
+        "--writer-model",
+        metavar="MODEL",
+        help="Groq model for the writer when resuming or rewriting (default: GROQ_MODEL).",
+    )
+    checkpoint_group.add_argument(
+        "--runs",
+        action="store_true",
+        help="List recent runs and their checkpointed tasks, then exit.",
+    )
+    storage_group = parser.add_argument_group("knowledge base storage")
+    storage_group.add_argument(
+        "--compact",
+        action="store_true",
+        help="Move plain Markdown reports into the compressed store and print storage stats, then exit.",
+    )
+    storage_group.add_argument(
+        "--export",
+        metavar="NAME",
+        help="Print the stored report NAME as Markdown (e.g. to redirect into a file), then exit.",
+    )
+    batch_group = parser.add_argument_group("batch mode")
+    batch_group.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Read queries from FILE ('-' for stdin): one per line or JSONL with a 'query' field.",
+    )
+    batch_group.add_argument(
+        "--output",
+        metavar="FILE",
+        default="-",
+        help="Write one JSON result per query to FILE (default: stdout).",
+    )
+    batch_group.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Number of queries researched concurrently (default: 2).",
+    )
+    batch_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip queries that already have a report in the knowledge base.",
+    )
 
     args = parser.parse_args(argv)
-    query: str = args.query
-
-    console.print(Panel.fit(f"[bold cyan]Query[/bold cyan]: {query}"))
+    if args.batch:
+        return _main_batch(args)
 
     try:
         config = load_config()
@@ -42,19 +126,228 @@ def main(argv: list[str] | None = None) -> int:
         console.print(f"[bold red]Configuration error:[/bold red] {exc}")
         return 1
 
-    repo = KnowledgeRepository(config)
+    # Import the research path in the background while the knowledge base loads;
+    # maintenance commands below exit without waiting for it.
+    researching = not (args.runs or args.compact or args.export)
+    if researching and config.prewarm_imports:
+        prewarm()
+    repo = shared_repository(config)
+    if args.runs:
+        return _print_runs(repo)
+    if args.compact:
+        moved = repo.compact()
+        stats = repo.storage_stats()
+        console.print(
+            f"Moved {moved} report(s) into the compressed store. {stats.reports} reports, "
+            f"{stats.blocks} unique blocks, {stats.raw_bytes / 1024:,.0f} KB of Markdown stored in "
+            f"{stats.stored_bytes / 1024:,.0f} KB ({stats.ratio:.1f}x)."
+        )
+        return 0
+    if args.export:
+        try:
+            sys.stdout.write(repo.read_report(args.export))
+        except OSError:
+            console.print(f"[bold red]No report named {args.export} in the knowledge base.[/bold red]")
+            return 1
+        return 0
+
+    query = args.query
+    if args.rewrite or args.resume_run:
+        run = repo.checkpoints.get_run(args.rewrite or args.resume_run)
+        if run is None:
+            console.print(f"[bold red]No checkpointed run with id {args.rewrite or args.resume_run}.[/bold red]")
+            return 1
+        query = query or run.query
+    if not query:
+        parser.error("a query is required unless --batch, --rewrite, --resume-run, --runs, --compact or --export is given")
+
+    console.print(Panel.fit(f"[bold cyan]Query[/bold cyan]: {query}"))
+
+    writer_config = dataclasses.replace(config, groq_model=args.writer_model) if args.writer_model else None
+    flow_args = dict(
+        force_refresh=args.refresh,
+        resume_run_id=args.resume_run,
+        rewrite_from=args.rewrite,
+        writer_config=writer_config,
+        tags=args.tag,
+        update=args.update,
+    )
+
+    from .agents.research_crew import run_research_flow, stream_research_flow
 
     console.print("[bold green]Running autonomous research crew...[/bold green]")
-    result = run_research_flow(config, query, repo)
+    if args.no_stream:
+        result = run_research_flow(config, query, repo, **flow_args)
+        streamed = False
+    else:
+        result, streamed = _render_stream(stream_research_flow(config, query, repo, **flow_args))
 
-    console.print("\n[bold green]Final report:[/bold green]\n")
-    console.print(result["report"])
+    if not result.get("success"):
+        console.print(f"[bold red]Research failed:[/bold red] {result.get('error')}")
+        if result.get("run_id"):
+            console.print(
+                f"[yellow]Completed tasks are checkpointed; re-run the same query or pass "
+                f"--resume-run {result['run_id']} to continue.[/yellow]"
+            )
+        _print_trace_summary(result.get("trace"))
+        return 1
+
+    if result.get("unchanged"):
+        console.print(
+            f"[bold yellow]No new sources since {result['updated_from']}[/bold yellow]; "
+            "the saved report is current."
+        )
+    elif result.get("updated_from"):
+        console.print(f"[bold green]Updated {result['updated_from']} with new sources.[/bold green]")
+    if result.get("cached"):
+        console.print(
+            f"[bold yellow]Reusing report for a similar query[/bold yellow] "
+            f"({result['cached_query']!r}, similarity {result['similarity']:.2f}). "
+            "Pass --refresh to run a new research crew."
+        )
+
+    if not streamed:
+        console.print("\n[bold green]Final report:[/bold green]\n")
+        console.print(result["report"])
+    saved = Path(result["report_path"])
+    location = saved if saved.exists() else f"{saved.name} (compressed store; --export {saved.name} for the Markdown)"
     console.print(
-        f"\n[bold blue]Saved to knowledge base:[/bold blue] {result['report_path']}",
+        f"\n[bold blue]Saved to knowledge base:[/bold blue] {location}",
     )
+    _print_trace_summary(result.get("trace"))
+    return 0
+
+
+_COUNTER_LABELS = (
+    ("prompt_tokens", "prompt tokens"),
+    ("completion_tokens", "completion tokens"),
+    ("cache_hits", "search cache hits"),
+    ("cache_misses", "search cache misses"),
+    ("bytes_read", "dataset bytes read"),
+)
+
+
+def _print_trace_summary(summary: dict | None) -> None:
+    if not summary:
+        return
+    table = Table(title=f"Run trace {summary['trace_id']} ({summary['duration_s']:.2f}s)")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (s)", justify="right")
+    stages = sorted(summary["stages"].items(), key=lambda item: -item[1]["total_s"])
+    for name, stage in stages:
+        table.add_row(name, str(stage["count"]), f"{stage['total_s']:.3f}")
+    console.print(table)
+    counters = summary.get("counters", {})
+    parts = [f"{label}: {int(counters[key]):,}" for key, label in _COUNTER_LABELS if key in counters]
+    if parts:
+        console.print("[dim]" + " · ".join(parts) + "[/dim]")
+    if summary.get("trace_file"):
+        console.print(f"[dim]Trace written to {summary['trace_file']}[/dim]")
+
+
+def _print_runs(repo) -> int:
+    runs = repo.checkpoints.recent_runs()
+    if not runs:
+        console.print("No checkpointed runs yet.")
+        return 0
+    table = Table(title="Recent runs")
+    table.add_column("Run id")
+    table.add_column("Status")
+    table.add_column("Tasks")
+    table.add_column("Updated")
+    table.add_column("Query")
+    for run in runs:
+        table.add_row(
+            run.run_id,
+            run.status,
+            ", ".join(run.tasks) or "-",
+            datetime.fromtimestamp(run.updated_at).strftime("%Y-%m-%d %H:%M"),
+            run.query[:60],
+        )
+    console.print(table)
     return 0
 
 
+def _render_stream(events: Iterable[ResearchEvent]) -> Tuple[dict, bool]:
+    """Print run progress as it happens; returns the result and whether the report was streamed."""
+    result: dict = {}
+    streamed_writer = False
+    for event in events:
+        if event.type == "task_started":
+            label = "Researching" if event.data["task"] == "research" else "Writing report"
+            console.rule(f"[bold cyan]{label}[/bold cyan]")
+        elif event.type == "tool_call":
+            console.print(f"[dim]→ {event.data['tool']}: {str(event.data['input'])[:160]}[/dim]")
+        elif event.type == "llm_token" and event.data["task"] == "writing":
+            if not streamed_writer:
+                console.print("\n[bold green]Final report:[/bold green]\n")
+                streamed_writer = True
+            console.out(event.data["text"], end="", highlight=False)
+        elif event.type == "task_finished" and event.data.get("restored"):
+            console.print(
+                f"[green]↺ {event.data['task']} task restored from run {event.data['run_id']}[/green]"
+            )
+        elif event.type == "task_finished":
+            if streamed_writer:
+                console.print()
+            console.print(f"[green]✓ {event.data['task']} task finished[/green]")
+        elif event.type in ("run_finished", "run_failed"):
+            result = event.data
+    return result, streamed_writer and not result.get("cached")
+
+
+def _main_batch(args: argparse.Namespace) -> int:
+    from .batch import read_queries, run_batch
+
+    status = Console(stderr=True)
+    try:
+        config = load_config()
+    except Exception as exc:
+        status.print(f"[bold red]Configuration error:[/bold red] {exc}")
+        return 1
+
+    if args.batch == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.batch, "r", encoding="utf-8") as fh:
+            queries = read_queries(fh)
+    if not queries:
+        status.print("[bold red]No queries found in batch input.[/bold red]")
+        return 1
+
+    repo = shared_repository(config)
+    status.print(
+        f"[bold green]Researching {len(queries)} queries with {args.workers} worker(s)...[/bold green]"
+    )
+
+    def report(record: dict) -> None:
+        colour = {"ok": "green", "cached": "yellow", "skipped": "blue"}.get(record["status"], "red")
+        status.print(
+            f"[{colour}]{record['status']:>7}[/{colour}] {record['elapsed_s']:>8.1f}s  {record['query']}"
+        )
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+    try:
+        records = run_batch(
+            config,
+            queries,
+            repo,
+            output,
+            workers=args.workers,
+            resume=args.resume,
+            force_refresh=args.refresh,
+            on_result=report,
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    failed = sum(1 for r in records if r["status"] == "error")
+    status.print(f"[bold]Done:[/bold] {len(records) - failed} succeeded or skipped, {failed} failed.")
+    return 1 if failed else 0
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
 
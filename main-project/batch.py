@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional
+
+from .agents.research_crew import run_research_flow
+from .config import AppConfig
+from .knowledge.repository import KnowledgeRepository, normalize_report_query
+
+
+def read_queries(stream: Iterable[str]) -> List[str]:
+    """Read one query per line, or JSONL objects with a ``query`` field."""
+    queries: List[str] = []
+    for raw in stream:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{") or line.startswith('"'):
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = line
+            if isinstance(item, dict):
+                item = item.get("query") or ""
+            line = str(item).strip()
+        if line:
+            queries.append(line)
+    return queries
+
+
+def run_batch(
+    config: AppConfig,
+    queries: List[str],
+    repository: KnowledgeRepository,
+    output: IO[str],
+    workers: int = 2,
+    resume: bool = False,
+    force_refresh: bool = False,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    done = repository.saved_queries() if resume else set()
+    write_lock = threading.Lock()
+    records: List[Dict[str, Any]] = []
+
+    def emit(record: Dict[str, Any]) -> None:
+        with write_lock:
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            records.append(record)
+        if on_result is not None:
+            on_result(record)
+
+    def run_one(index: int, query: str) -> None:
+        started = time.perf_counter()
+        record: Dict[str, Any] = {"index": index, "query": query}
+        try:
+            result = run_research_flow(config, query, repository, force_refresh=force_refresh)
+        except Exception as exc:
+            result = {"success": False, "error": str(exc), "error_type": "general_error"}
+        record["elapsed_s"] = round(time.perf_counter() - started, 3)
+        trace = result.get("trace") or {}
+        if trace:
+            record["trace_id"] = trace["trace_id"]
+            for key in ("prompt_tokens", "completion_tokens"):
+                if key in trace["counters"]:
+                    record[key] = trace["counters"][key]
+        if result.get("success"):
+            record["status"] = "cached" if result.get("cached") else "ok"
+            record["report_path"] = result["report_path"]
+        else:
+            record["status"] = "error"
+            record["error_type"] = result.get("error_type", "general_error")
+            record["error"] = result.get("error", "")
+        emit(record)
+
+    pending = []
+    seen = set()
+    for index, query in enumerate(queries):
+        key = normalize_report_query(query)
+        if key in done or key in seen:
+            emit({"index": index, "query": query, "status": "skipped", "elapsed_s": 0.0})
+            continue
+        seen.add(key)
+        pending.append((index, query))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_one, index, query) for index, query in pending]
+        for future in as_completed(futures):
+            future.result()
+    return records
@@ -0,0 +1,553 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from .config import AppConfig
+from .rate_limit import RateLimiter, RetryPolicy, call_with_retry, provider_limiter
+
+
+console = Console(stderr=True)
+
+DEFAULT_QUERIES = [
+    "Compare Milvus vs Qdrant vs Weaviate for production vector search",
+    "What are the trade-offs of serverless GPUs for LLM inference?",
+    "State of WebAssembly outside the browser in 2024",
+    "Kubernetes operators vs Helm charts for stateful workloads",
+    "How are companies adopting retrieval-augmented generation?",
+]
+
+_REPORT = (
+    "# Executive Summary\n\n"
+    "Replay report used for offline benchmarking.\n\n"
+    "## Key Findings\n\n"
+    + "".join(f"- Finding {i}: recorded insight with supporting detail.\n" for i in range(1, 21))
+    + "\n## Next Steps\n\n- Re-run with live providers to validate.\n"
+)
+
+DEFAULT_LLM_FIXTURES: Dict[str, Any] = {
+    "latency_ms": 0,
+    "completions": [
+        {
+            "agent": "Technology Researcher",
+            "step": 0,
+            "response": (
+                "Thought: I should search the web first.\n"
+                "Action: web_research\n"
+                'Action Input: {"query": "vector databases production", '
+                '"sub_queries": ["Milvus benchmarks", "Qdrant benchmarks"]}'
+            ),
+        },
+        {
+            "agent": "Technology Researcher",
+            "step": 1,
+            "response": (
+                "Thought: Now check local datasets.\n"
+                "Action: kaggle_datasets_overview\n"
+                'Action Input: {"query": "vector database benchmarks"}'
+            ),
+        },
+        {
+            "agent": "Technology Researcher",
+            "step": 2,
+            "response": "Thought: I now know the final answer\nFinal Answer: " + _REPORT,
+        },
+        {
+            "agent": "Research Synthesizer",
+            "step": 0,
+            "response": "Thought: I now know the final answer\nFinal Answer: " + _REPORT,
+        },
+    ],
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(samples),
+        "p50_s": round(percentile(samples, 50), 4),
+        "p95_s": round(percentile(samples, 95), 4),
+        "mean_s": round(statistics.fmean(samples), 4) if samples else 0.0,
+        "max_s": round(max(samples), 4) if samples else 0.0,
+    }
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _write_json(path: str, data: Any) -> str:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    return path
+
+
+def _bench_config(workdir: str, **overrides: Any) -> AppConfig:
+    fields: Dict[str, Any] = dict(
+        groq_api_key="replay",
+        knowledge_base_dir=os.path.join(workdir, "knowledge_base_store"),
+        kaggle_data_dir=os.path.join(workdir, "kaggle_data"),
+        cache_dir=os.path.join(workdir, "cache"),
+        trace_dir=os.path.join(workdir, "cache", "traces"),
+        trace_format="off",
+        groq_rpm=0,
+        groq_tpm=0,
+        tavily_rpm=0,
+    )
+    fields.update(overrides)
+    config = AppConfig(**fields)
+    for path in (config.knowledge_base_dir, config.kaggle_data_dir, config.cache_dir):
+        os.makedirs(path, exist_ok=True)
+    return config
+
+
+def bench_pipeline(
+    queries: List[str],
+    repeat: int = 1,
+    workers: int = 1,
+    llm_fixtures: Optional[str] = None,
+    search_fixtures: Optional[str] = None,
+    search_cache: str = "off",
+    kaggle_files: int = 4,
+    kaggle_rows: int = 5_000,
+) -> Dict[str, Any]:
+    """Run ``run_research_flow`` end to end against replayed LLM and search fixtures."""
+    from .agents.research_crew import crew_pool, run_research_flow
+    from .resources import clear_shared_resources, shared_repository
+
+    with tempfile.TemporaryDirectory(prefix="research-bench-") as workdir:
+        if llm_fixtures is None:
+            llm_fixtures = _write_json(os.path.join(workdir, "llm.json"), DEFAULT_LLM_FIXTURES)
+        if search_fixtures is None:
+            # Every query falls through to StaticSearchBackend's synthetic results.
+            search_fixtures = _write_json(os.path.join(workdir, "search.json"), {})
+        config = _bench_config(
+            workdir,
+            llm_fixtures=llm_fixtures,
+            search_fixtures=search_fixtures,
+            search_cache_mode=search_cache,
+        )
+        if kaggle_files:
+            make_synthetic_datasets(config.kaggle_data_dir, kaggle_files, kaggle_rows)
+        repository = shared_repository(config)
+
+        def run(query: str) -> Dict[str, Any]:
+            started = time.perf_counter()
+            result = run_research_flow(config, query, repository, force_refresh=True)
+            if not result.get("success"):
+                raise RuntimeError(f"benchmark run failed: {result.get('error')}")
+            return {"elapsed_s": time.perf_counter() - started, "trace": result.get("trace") or {}}
+
+        try:
+            # The first run builds the crew and profiles the datasets; report it apart.
+            first = run(queries[0])["elapsed_s"]
+
+            tracemalloc.start()
+            samples: List[Dict[str, Any]] = []
+            work = [q for _ in range(repeat) for q in queries]
+            started = time.perf_counter()
+            if workers <= 1:
+                samples = [run(q) for q in work]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    samples = list(pool.map(run, work))
+            wall = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            crew_pool.clear()
+            clear_shared_resources()
+
+    stages: Dict[str, List[float]] = {}
+    for sample in samples:
+        for name, stage in sample["trace"].get("stages", {}).items():
+            stages.setdefault(name, []).append(stage["total_s"])
+    return {
+        "benchmark": "pipeline",
+        "runs": len(samples),
+        "workers": workers,
+        "first_run_s": round(first, 4),
+        "latency": _latency_stats([s["elapsed_s"] for s in samples]),
+        "throughput_runs_per_s": round(len(samples) / wall, 3) if wall else 0.0,
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+        "stages": {name: _latency_stats(values) for name, values in sorted(stages.items())},
+    }
+
+
+def make_synthetic_datasets(base_dir: str, files: int, rows: int, seed: int = 7) -> int:
+    """Write ``files`` CSV/Parquet files (alternating) of ``rows`` rows; returns bytes written."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    topics = ["llm", "vector", "cloud", "gpu", "kubernetes", "wasm", "database", "security"]
+    written = 0
+    for i in range(files):
+        topic = topics[i % len(topics)]
+        frame = pd.DataFrame(
+            {
+                "id": np.arange(rows),
+                "framework": rng.choice([f"{topic}_{k}" for k in range(12)], size=rows),
+                "region": rng.choice(["us", "eu", "apac", "latam"], size=rows),
+                "latency_ms": rng.gamma(2.0, 20.0, size=rows).round(2),
+                "cost_usd": rng.normal(100, 25, size=rows).round(2),
+                "stars": rng.integers(0, 50_000, size=rows),
+            }
+        )
+        subdir = os.path.join(base_dir, topic)
+        os.makedirs(subdir, exist_ok=True)
+        if i % 2 == 0:
+            path = os.path.join(subdir, f"{topic}_benchmarks_{i}.csv")
+            frame.to_csv(path, index=False)
+        else:
+            path = os.path.join(subdir, f"{topic}_adoption_{i}.parquet")
+            frame.to_parquet(path, index=False, row_group_size=max(1, rows // 4))
+        written += os.path.getsize(path)
+    return written
+
+
+def bench_kaggle(
+    files: int = 20,
+    rows: int = 200_000,
+    queries: Optional[List[str]] = None,
+    repeat: int = 5,
+) -> Dict[str, Any]:
+    """Cold and warm catalog refreshes plus tool latency over a synthetic dataset tree."""
+    from .tools.crewai_tools import KaggleDatasetsOverviewTool
+
+    queries = queries or ["gpu latency by region", "vector database stars", "kubernetes cost"]
+    with tempfile.TemporaryDirectory(prefix="kaggle-bench-") as workdir:
+        config = _bench_config(workdir)
+        generated = make_synthetic_datasets(config.kaggle_data_dir, files, rows)
+        tool = KaggleDatasetsOverviewTool(config)
+
+        tracemalloc.start()
+        cold = _timed(tool._catalog.refresh)
+        _, cold_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        warm = [_timed(tool._catalog.refresh) for _ in range(repeat)]
+        run_samples = [_timed(lambda q=q: tool._run(q)) for _ in range(repeat) for q in queries]
+
+        # Touch one file so the next refresh re-profiles exactly one dataset.
+        victim = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(config.kaggle_data_dir)
+            for name in names
+        )[0]
+        os.utime(victim, (time.time() + 5, time.time() + 5))
+        incremental = _timed(tool._catalog.refresh)
+
+    return {
+        "benchmark": "kaggle",
+        "files": files,
+        "rows_per_file": rows,
+        "dataset_mb": round(generated / (1024 * 1024), 2),
+        "cold_refresh_s": round(cold, 4),
+        "cold_refresh_peak_memory_mb": round(cold_peak / (1024 * 1024), 2),
+        "incremental_refresh_s": round(incremental, 4),
+        "warm_refresh": _latency_stats(warm),
+        "tool_run": _latency_stats(run_samples),
+    }
+
+
+class _Mock429Handler(BaseHTTPRequestHandler):
+    """Tavily-shaped ``POST /search`` that answers 429 + Retry-After above its rate."""
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if not server.limiter.acquire(1, timeout=0):
+            with server.lock:
+                server.rejected += 1
+            self.send_response(429)
+            self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        query = payload.get("query", "")
+        body = json.dumps(
+            {
+                "query": query,
+                "answer": f"Mock answer for {query}.",
+                "results": [
+                    {"title": f"{query} {i}", "url": f"https://mock.local/{i}", "content": "Mock.", "score": 0.5}
+                    for i in range(int(payload.get("max_results") or 5))
+                ],
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_mock_server(server_rpm: float, retry_after: float = 1.0) -> ThreadingHTTPServer:
+    """Serve the 429-returning mock on a free localhost port (``server.server_address``)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Mock429Handler)
+    server.daemon_threads = True
+    server.limiter = RateLimiter(server_rpm, burst=max(1.0, server_rpm / 60.0))
+    server.retry_after = retry_after
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.rejected = 0
+    threading.Thread(target=server.serve_forever, name="mock-429", daemon=True).start()
+    return server
+
+
+def bench_rate_limit(
+    calls: int = 60,
+    workers: int = 8,
+    server_rpm: float = 120,
+    client_rpm: float = 600,
+    retry_after: float = 1.0,
+    max_attempts: int = 8,
+) -> Dict[str, Any]:
+    """Drive the limiter and retry scheduler against a local server that enforces its own rate.
+
+    ``client_rpm`` above ``server_rpm`` simulates a misconfigured or shared
+    quota: the client has to learn the real rate from 429s.
+    """
+    import requests
+
+    server = start_mock_server(server_rpm, retry_after)
+    url = "http://%s:%d/search" % server.server_address
+    limiter = provider_limiter(f"mock-{server.server_address[1]}", client_rpm)
+    policy = RetryPolicy(max_attempts=max_attempts, max_delay=30.0)
+    session = requests.Session()
+
+    def one(i: int) -> bool:
+        def post() -> Any:
+            response = session.post(url, json={"query": f"q{i}", "max_results": 3}, timeout=10)
+            response.raise_for_status()
+            return response.json()
+
+        try:
+            call_with_retry(post, limiter, policy)
+            return True
+        except Exception:
+            return False
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(one, range(calls)))
+        wall = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+        session.close()
+
+    succeeded = sum(outcomes)
+    return {
+        "benchmark": "rate_limit",
+        "calls": calls,
+        "succeeded": succeeded,
+        "failed": calls - succeeded,
+        "server_requests": server.requests,
+        "server_429s": server.rejected,
+        "retries": limiter.stats.retries,
+        "wall_s": round(wall, 3),
+        "achieved_rpm": round(succeeded / wall * 60.0, 1) if wall else 0.0,
+        "server_rpm": server_rpm,
+        "client_rpm_after": round(limiter.requests.per_minute, 1),
+    }
+
+
+# Modules that must import without pulling in the research stack.
+LIGHT_ENTRY_POINTS = ("config", "knowledge.repository", "resources", "jobs", "app")
+HEAVY_MODULES = ("crewai", "langchain_community", "litellm", "pandas")
+
+_IMPORT_PROBE = (
+    "import importlib, json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(json.dumps({'import_s': elapsed, 'heavy': [m for m in sys.argv[2:] if m in sys.modules]}))\n"
+)
+
+
+def _probe_import(module: str, root: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    done = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE, module, *HEAVY_MODULES],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    probe = json.loads(done.stdout.strip().splitlines()[-1])
+    probe["process_s"] = time.perf_counter() - started
+    return probe
+
+
+def bench_imports(repeat: int = 3, max_seconds: float = 1.5) -> Dict[str, Any]:
+    """Cold import time of the entry points, each in a fresh interpreter.
+
+    Fails when a light entry point imports a heavy dependency or takes longer
+    than ``max_seconds``; the research path is measured for reference only.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    package = __package__ or "src"
+    report: Dict[str, Any] = {"benchmark": "imports", "repeat": repeat, "max_seconds": max_seconds}
+    failures: List[str] = []
+    for name in LIGHT_ENTRY_POINTS + ("agents.research_crew",):
+        probes = [_probe_import(f"{package}.{name}", root) for _ in range(repeat)]
+        import_s = statistics.median(p["import_s"] for p in probes)
+        heavy = sorted({m for p in probes for m in p["heavy"]})
+        report[name] = {
+            "import_s": round(import_s, 4),
+            "process_s": round(statistics.median(p["process_s"] for p in probes), 4),
+            "heavy": ",".join(heavy) or "-",
+        }
+        if name not in LIGHT_ENTRY_POINTS:
+            continue
+        if heavy:
+            failures.append(f"{name} imports {', '.join(heavy)}")
+        if import_s > max_seconds:
+            failures.append(f"{name} took {import_s:.2f}s to import (limit {max_seconds:.2f}s)")
+
+    help_samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", f"{package}.app", "--help"], cwd=root, capture_output=True, check=True
+        )
+        help_samples.append(time.perf_counter() - started)
+    cli_help_s = statistics.median(help_samples)
+    report["cli_help_s"] = round(cli_help_s, 4)
+    if cli_help_s > max_seconds:
+        failures.append(f"`app --help` took {cli_help_s:.2f}s (limit {max_seconds:.2f}s)")
+    report["failures"] = failures
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    table = Table(title=f"{report['benchmark']} benchmark")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    for key, value in report.items():
+        if key in ("benchmark", "stages", "failures"):
+            continue
+        if isinstance(value, dict):
+            value = "  ".join(f"{k}={v}" for k, v in value.items())
+        table.add_row(key, str(value))
+    console.print(table)
+    for failure in report.get("failures") or []:
+        console.print(f"[bold red]Regression:[/bold red] {failure}")
+    if report.get("stages"):
+        stages = Table(title="Per-stage latency")
+        stages.add_column("Stage")
+        stages.add_column("p50 (s)", justify="right")
+        stages.add_column("p95 (s)", justify="right")
+        for name, stats in report["stages"].items():
+            stages.add_row(name, f"{stats['p50_s']:.4f}", f"{stats['p95_s']:.4f}")
+        console.print(stages)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for the research pipeline (no API keys needed).",
+    )
+    parser.add_argument("--json", metavar="FILE", help="Also write the results as JSON to FILE.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = sub.add_parser("pipeline", help="End-to-end run_research_flow with replayed fixtures.")
+    pipeline.add_argument("--queries", metavar="FILE", help="One query per line (default: built-in corpus).")
+    pipeline.add_argument("--repeat", type=int, default=3)
+    pipeline.add_argument("--workers", type=int, default=1)
+    pipeline.add_argument("--llm-fixtures", metavar="FILE", help="Recorded LLM completions (JSON).")
+    pipeline.add_argument("--search-fixtures", metavar="FILE", help="Recorded search responses (JSON).")
+    pipeline.add_argument("--search-cache", choices=("on", "off"), default="off")
+    pipeline.add_argument("--kaggle-files", type=int, default=4)
+    pipeline.add_argument("--kaggle-rows", type=int, default=5_000)
+
+    kaggle = sub.add_parser("kaggle", help="Dataset catalog and Kaggle tool microbenchmarks.")
+    kaggle.add_argument("--files", type=int, default=20)
+    kaggle.add_argument("--rows", type=int, default=200_000)
+    kaggle.add_argument("--repeat", type=int, default=5)
+
+    ratelimit = sub.add_parser("ratelimit", help="Limiter and retries against a local 429 server.")
+    ratelimit.add_argument("--calls", type=int, default=60)
+    ratelimit.add_argument("--workers", type=int, default=8)
+    ratelimit.add_argument("--server-rpm", type=float, default=120)
+    ratelimit.add_argument("--client-rpm", type=float, default=600)
+    ratelimit.add_argument("--retry-after", type=float, default=1.0)
+
+    imports = sub.add_parser("imports", help="Cold import time of the CLI/worker entry points.")
+    imports.add_argument("--repeat", type=int, default=3)
+    imports.add_argument(
+        "--max-seconds", type=float, default=1.5, help="Fail when a light entry point imports slower than this."
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "pipeline":
+        queries = DEFAULT_QUERIES
+        if args.queries:
+            from .batch import read_queries
+
+            with open(args.queries, "r", encoding="utf-8") as fh:
+                queries = read_queries(fh)
+        report = bench_pipeline(
+            queries,
+            repeat=max(1, args.repeat),
+            workers=max(1, args.workers),
+            llm_fixtures=args.llm_fixtures,
+            search_fixtures=args.search_fixtures,
+            search_cache=args.search_cache,
+            kaggle_files=args.kaggle_files,
+            kaggle_rows=args.kaggle_rows,
+        )
+    elif args.command == "ratelimit":
+        report = bench_rate_limit(
+            calls=args.calls,
+            workers=args.workers,
+            server_rpm=args.server_rpm,
+            client_rpm=args.client_rpm,
+            retry_after=args.retry_after,
+        )
+    elif args.command == "imports":
+        report = bench_imports(repeat=max(1, args.repeat), max_seconds=args.max_seconds)
+    else:
+        report = bench_kaggle(files=args.files, rows=args.rows, repeat=max(1, args.repeat))
+
+    _print_report(report)
+    if args.json:
+        _write_json(args.json, report)
+    print(json.dumps(report))
+    return 1 if report.get("failures") else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
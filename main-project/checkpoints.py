@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# A ``running`` run whose owner cannot be checked (another host, Windows, rows
+# written before owners were recorded) is only resumed after this long
+# without a saved task.
+STALE_RUN_SECONDS = 3600.0
+
+
+def _process_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: Optional[str]) -> Optional[bool]:
+    """Whether the process that started a run is still alive; None when it cannot be told."""
+    host, _, pid = (owner or "").rpartition(":")
+    # os.kill(pid, 0) terminates the process on Windows instead of probing it.
+    if os.name == "nt" or host != socket.gethostname() or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
+
+
+@dataclass
+class RunRecord:
+    run_id: str
+    query: str
+    status: str
+    created_at: float
+    updated_at: float
+    tasks: List[str]
+    report_name: Optional[str] = None
+    error: Optional[str] = None
+    parent_run_id: Optional[str] = None
+    # "research" for crew runs, "update" for refreshes of ``base_report``.
+    kind: str = "research"
+    base_report: Optional[str] = None
+
+
+class CheckpointStore:
+    """Per-task outputs of crew runs, so a failed run can pick up where it stopped.
+
+    A run is ``running`` until it is marked ``completed`` or ``failed``. A
+    process killed mid-run leaves it ``running``; such a run is resumed like
+    a failed one once its owning process is gone, but never while that
+    process (e.g. a parallel job for the same query) is still working on it.
+
+    Runs have a ``kind``: the tasks of an ``update`` run hold only what is
+    new since its ``base_report`` and a patch for it, so they are never
+    picked up by ``latest_unfinished``; only an explicit resume of that run
+    id continues them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    query_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    report_name TEXT,
+                    error TEXT,
+                    parent_run_id TEXT,
+                    owner TEXT,
+                    kind TEXT NOT NULL DEFAULT 'research',
+                    base_report TEXT
+                );
+                CREATE INDEX IF NOT EXISTS runs_by_query ON runs (query_key, updated_at);
+                CREATE TABLE IF NOT EXISTS task_outputs (
+                    run_id TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, task)
+                );
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN owner TEXT")
+            if "kind" not in columns:
+                conn.execute("ALTER TABLE runs ADD COLUMN kind TEXT NOT NULL DEFAULT 'research'")
+                conn.execute("ALTER TABLE runs ADD COLUMN base_report TEXT")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def start_run(
+        self,
+        query: str,
+        query_key: str,
+        parent_run_id: Optional[str] = None,
+        kind: str = "research",
+        base_report: Optional[str] = None,
+    ) -> str:
+        run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO runs (run_id, query, query_key, status, created_at, updated_at, "
+                "parent_run_id, owner, kind, base_report) VALUES (?, ?, ?, 'running', ?, ?, ?, ?, ?, ?)",
+                (run_id, query, query_key, now, now, parent_run_id, _process_owner(), kind, base_report),
+            )
+            conn.commit()
+        return run_id
+
+    def save_task(self, run_id: str, task: str, output: str) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO task_outputs (run_id, task, output, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, task, output, now),
+            )
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            conn.commit()
+
+    def outputs(self, run_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT task, output FROM task_outputs WHERE run_id = ? ORDER BY created_at",
+                (run_id,),
+            ).fetchall()
+        return {task: output for task, output in rows}
+
+    def finish(
+        self,
+        run_id: str,
+        status: str,
+        report_name: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE runs SET status = ?, report_name = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                (status, report_name, error, time.time(), run_id),
+            )
+            conn.commit()
+
+    def _record(self, row: tuple) -> RunRecord:
+        run_id, query, status, created_at, updated_at, report_name, error, parent, kind, base_report = row
+        tasks = [
+            task
+            for (task,) in self._connection().execute(
+                "SELECT task FROM task_outputs WHERE run_id = ? ORDER BY created_at", (run_id,)
+            )
+        ]
+        return RunRecord(
+            run_id, query, status, created_at, updated_at, tasks, report_name, error, parent, kind, base_report
+        )
+
+    _COLUMNS = (
+        "run_id, query, status, created_at, updated_at, report_name, error, parent_run_id, kind, base_report"
+    )
+
+    def get_run(self, run_id: str) -> Optional[RunRecord]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            return self._record(row) if row else None
+
+    def latest_unfinished(
+        self, query_key: str, max_age_seconds: float, stale_after_seconds: float = STALE_RUN_SECONDS
+    ) -> Optional[RunRecord]:
+        """Most recent failed or interrupted research run for the query with at least one saved task.
+
+        ``running`` runs still owned by a live process are skipped; when the
+        owner cannot be checked, only runs idle for ``stale_after_seconds``
+        count as interrupted.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {self._COLUMNS}, owner FROM runs "
+                "WHERE query_key = ? AND kind = 'research' AND status != 'completed' AND updated_at >= ? "
+                "AND EXISTS (SELECT 1 FROM task_outputs t WHERE t.run_id = runs.run_id) "
+                "ORDER BY updated_at DESC",
+                (query_key, now - max_age_seconds),
+            ).fetchall()
+            for row in rows:
+                status, updated_at, owner = row[2], row[4], row[-1]
+                if status == "running":
+                    alive = _owner_alive(owner)
+                    if alive or (alive is None and now - updated_at < stale_after_seconds):
+                        continue
+                return self._record(row[:-1])
+            return None
+
+    def recent_runs(self, limit: int = 20) -> List[RunRecord]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM runs ORDER BY updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+            return [self._record(row) for row in rows]
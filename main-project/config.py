@@ -17,8 +17,77 @@ class AppConfig:
     groq_api_key: str
     groq_model: str = "llama-3.3-70b-versatile"
     tavily_api_key: str | None = None
+    tavily_base_url: str | None = None
     knowledge_base_dir: str = "knowledge_base_store"
+    report_storage: str = "compressed"
     kaggle_data_dir: str = "./kaggle_data"
+    cache_dir: str = ".research_cache"
+    search_cache_mode: str = "on"
+    search_cache_ttl_seconds: int = 24 * 3600
+    search_cache_max_bytes: int = 64 * 1024 * 1024
+    search_fixtures: str | None = None
+    llm_fixtures: str | None = None
+    kaggle_top_k: int = 3
+    kaggle_profile_memory_mb: int = 256
+    kaggle_profile_max_seconds: float = 120.0
+    kaggle_profile_workers: int = 4
+    kaggle_catalog_deadline_seconds: float = 30.0
+    kaggle_query_timeout_seconds: float = 20.0
+    kaggle_query_max_rows: int = 50
+    kaggle_query_cache_mode: str = "on"
+    search_max_workers: int = 4
+    search_max_subqueries: int = 4
+    groq_rpm: int = 30
+    groq_tpm: int = 12000
+    tavily_rpm: int = 60
+    retry_max_attempts: int = 6
+    retry_max_delay_seconds: float = 60.0
+    crew_pool_size: int = 4
+    checkpoint_max_age_hours: int = 24
+    job_workers: int = 2
+    job_poll_seconds: float = 2.0
+    job_stale_seconds: int = 120
+    watchlist_file: str = "watchlist.txt"
+    watchlist_interval_hours: float = 24.0
+    watchlist_workers: int = 1
+    watchlist_daily_tokens: int = 0
+    watchlist_poll_seconds: float = 60.0
+    tool_call_token_budget: int = 1500
+    run_token_budget: int = 8000
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.9
+    semantic_cache_max_age_hours: int = 72
+    embedding_model: str | None = None
+    prewarm_imports: bool = True
+    trace_dir: str = ".research_cache/traces"
+    trace_format: str = "jsonl"
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be a number, got {value!r}")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{name} must be an integer, got {value!r}")
 
 
 def load_config() -> AppConfig:
@@ -45,15 +114,83 @@ def load_config() -> AppConfig:
 
         groq_model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 
+        cache_dir = os.getenv("CACHE_DIR", ".research_cache")
+        search_cache_mode = os.getenv("SEARCH_CACHE", "on").strip().lower()
+        if search_cache_mode not in ("on", "off", "refresh"):
+            raise RuntimeError(
+                f"SEARCH_CACHE must be one of on/off/refresh, got {search_cache_mode!r}"
+            )
+
+        kaggle_query_cache_mode = os.getenv("KAGGLE_QUERY_CACHE", "on").strip().lower()
+        if kaggle_query_cache_mode not in ("on", "off", "refresh"):
+            raise RuntimeError(
+                f"KAGGLE_QUERY_CACHE must be one of on/off/refresh, got {kaggle_query_cache_mode!r}"
+            )
+
+        report_storage = os.getenv("REPORT_STORAGE", "compressed").strip().lower()
+        if report_storage not in ("compressed", "files"):
+            raise RuntimeError(
+                f"REPORT_STORAGE must be one of compressed/files, got {report_storage!r}"
+            )
+
+        trace_format = os.getenv("TRACE_FORMAT", "jsonl").strip().lower()
+        if trace_format not in ("jsonl", "chrome", "both", "off"):
+            raise RuntimeError(
+                f"TRACE_FORMAT must be one of jsonl/chrome/both/off, got {trace_format!r}"
+            )
+
         os.makedirs(knowledge_base_dir, exist_ok=True)
         os.makedirs(kaggle_data_dir, exist_ok=True)
+        os.makedirs(cache_dir, exist_ok=True)
 
         return AppConfig(
             groq_api_key=groq_api_key,
             groq_model=groq_model,
             tavily_api_key=tavily_api_key,
+            tavily_base_url=os.getenv("TAVILY_BASE_URL") or None,
             knowledge_base_dir=knowledge_base_dir,
+            report_storage=report_storage,
             kaggle_data_dir=kaggle_data_dir,
+            cache_dir=cache_dir,
+            search_cache_mode=search_cache_mode,
+            search_cache_ttl_seconds=_env_int("SEARCH_CACHE_TTL_SECONDS", 24 * 3600),
+            search_cache_max_bytes=_env_int("SEARCH_CACHE_MAX_MB", 64) * 1024 * 1024,
+            search_fixtures=os.getenv("SEARCH_FIXTURES") or None,
+            llm_fixtures=os.getenv("LLM_FIXTURES") or None,
+            kaggle_top_k=max(1, _env_int("KAGGLE_TOP_K", 3)),
+            kaggle_profile_memory_mb=max(16, _env_int("KAGGLE_PROFILE_MEMORY_MB", 256)),
+            kaggle_profile_max_seconds=max(0.0, _env_float("KAGGLE_PROFILE_MAX_SECONDS", 120.0)),
+            kaggle_profile_workers=max(1, _env_int("KAGGLE_PROFILE_WORKERS", min(4, os.cpu_count() or 1))),
+            kaggle_catalog_deadline_seconds=max(0.0, _env_float("KAGGLE_CATALOG_DEADLINE_SECONDS", 30.0)),
+            kaggle_query_timeout_seconds=max(1.0, _env_float("KAGGLE_QUERY_TIMEOUT_SECONDS", 20.0)),
+            kaggle_query_max_rows=max(1, _env_int("KAGGLE_QUERY_MAX_ROWS", 50)),
+            kaggle_query_cache_mode=kaggle_query_cache_mode,
+            search_max_workers=max(1, _env_int("SEARCH_MAX_WORKERS", 4)),
+            search_max_subqueries=max(1, _env_int("SEARCH_MAX_SUBQUERIES", 4)),
+            groq_rpm=_env_int("GROQ_RPM", 30),
+            groq_tpm=_env_int("GROQ_TPM", 12000),
+            tavily_rpm=_env_int("TAVILY_RPM", 60),
+            retry_max_attempts=max(1, _env_int("RETRY_MAX_ATTEMPTS", 6)),
+            retry_max_delay_seconds=_env_float("RETRY_MAX_DELAY_SECONDS", 60.0),
+            crew_pool_size=max(0, _env_int("CREW_POOL_SIZE", 4)),
+            checkpoint_max_age_hours=max(0, _env_int("CHECKPOINT_MAX_AGE_HOURS", 24)),
+            job_workers=max(0, _env_int("JOB_WORKERS", 2)),
+            job_poll_seconds=max(0.2, _env_float("JOB_POLL_SECONDS", 2.0)),
+            job_stale_seconds=max(15, _env_int("JOB_STALE_SECONDS", 120)),
+            watchlist_file=os.getenv("WATCHLIST_FILE", "watchlist.txt"),
+            watchlist_interval_hours=max(0.1, _env_float("WATCHLIST_INTERVAL_HOURS", 24.0)),
+            watchlist_workers=max(1, _env_int("WATCHLIST_WORKERS", 1)),
+            watchlist_daily_tokens=max(0, _env_int("WATCHLIST_DAILY_TOKENS", 0)),
+            watchlist_poll_seconds=max(1.0, _env_float("WATCHLIST_POLL_SECONDS", 60.0)),
+            tool_call_token_budget=max(0, _env_int("TOOL_CALL_TOKEN_BUDGET", 1500)),
+            run_token_budget=max(0, _env_int("RUN_TOKEN_BUDGET", 8000)),
+            semantic_cache_enabled=_env_bool("SEMANTIC_CACHE", True),
+            semantic_cache_threshold=_env_float("SEMANTIC_CACHE_THRESHOLD", 0.9),
+            semantic_cache_max_age_hours=_env_int("SEMANTIC_CACHE_MAX_AGE_HOURS", 72),
+            embedding_model=os.getenv("EMBEDDING_MODEL") or None,
+            prewarm_imports=_env_bool("PREWARM_IMPORTS", True),
+            trace_dir=os.getenv("TRACE_DIR") or os.path.join(cache_dir, "traces"),
+            trace_format=trace_format,
         )
     finally:
         for key, value in env_backup.items():
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-import glob
 import os
-from typing import List, Type
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 
 import pandas as pd
 from pydantic import BaseModel, Field
@@ -10,10 +11,52 @@ from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
 from ..config import AppConfig
+from ..knowledge.source_store import SourceRecord, SourceStore
+from ..rate_limit import RetryPolicy, call_with_retry, provider_limiter
+from ..text_search import tokenize
+from ..tracing import record, span
+from .kaggle_catalog import DatasetCatalog, DatasetProfile, build_dataset_catalog
+from .kaggle_query import (
+    QueryError,
+    build_query,
+    build_query_cache,
+    format_result,
+    query_cache_key,
+    resolve_dataset,
+    result_from_dict,
+    result_to_dict,
+    run_aggregation,
+)
+from .search_backends import SearchBackend, build_search_backend
+from .search_cache import SearchCache, build_search_cache, search_cache_key
+from .search_fanout import (
+    MergedSource,
+    canonical_url,
+    decompose_query,
+    dedupe_queries,
+    fan_out,
+    merge_results,
+)
+from .token_budget import (
+    BUDGET_EXHAUSTED,
+    MIN_CALL_TOKENS,
+    TokenBudget,
+    count_tokens,
+    current_budget,
+    select_passages,
+    truncate_to_tokens,
+)
 
 
 class WebResearchArgs(BaseModel):
     query: str = Field(..., description="The search query to look up on the web.")
+    sub_queries: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Optional related searches to run in parallel with the main query, e.g. one per "
+            "product being compared. Results are merged and deduplicated."
+        ),
+    )
 
 
 class WebResearchTool(BaseTool):
@@ -21,52 +64,213 @@ class WebResearchTool(BaseTool):
     description: str = (
         "Search the web for up-to-date information about technology topics, including "
         "documentation, Medium articles, blogs, and news. "
-        "Use this to gather multiple sources."
+        "Use this to gather multiple sources. Pass sub_queries to search several "
+        "angles of a topic at once instead of calling the tool repeatedly."
     )
     args_schema: Type[BaseModel] = WebResearchArgs
 
-    def __init__(self, config: AppConfig):
+    def __init__(
+        self,
+        config: AppConfig,
+        backend: Optional[SearchBackend] = None,
+        cache: Optional[SearchCache] = None,
+        sources: Optional[SourceStore] = None,
+    ):
         super().__init__()
-        self._api_key = config.tavily_api_key
+        self._backend = backend if backend is not None else build_search_backend(config)
+        self._cache = cache if cache is not None else build_search_cache(config)
+        self._sources = (
+            sources
+            if sources is not None
+            else SourceStore(Path(config.knowledge_base_dir) / ".index" / "sources.sqlite3")
+        )
+        self._max_results = 6
+        self._include_answer = True
+        self._max_workers = config.search_max_workers
+        self._limiter = provider_limiter("tavily", config.tavily_rpm)
+        self._retry = RetryPolicy(
+            max_attempts=config.retry_max_attempts, max_delay=config.retry_max_delay_seconds
+        )
+        self._max_subqueries = config.search_max_subqueries
+        self._call_tokens = config.tool_call_token_budget
 
-    def _run(self, query: str) -> str:
-        if not self._api_key:
+    def _search(self, query: str, time_range: Optional[str] = None, refresh: bool = False) -> Dict[str, Any]:
+        """One search through the cache; ``refresh`` skips the lookup but still stores the response."""
+        key = search_cache_key(
+            query,
+            max_results=self._max_results,
+            include_answer=self._include_answer,
+            # Only keyed when set, so entries cached before time ranges existed still match.
+            **({"time_range": time_range} if time_range else {}),
+        )
+        with span("web_search", query=query) as s:
+            data = None if refresh else self._cache.get(key)
+            record(cache_hits=int(data is not None), cache_misses=int(data is None))
+            if data is None:
+                with span("tavily_request"):
+                    data = call_with_retry(
+                        lambda: self._backend.search(
+                            query,
+                            max_results=self._max_results,
+                            include_answer=self._include_answer,
+                            time_range=time_range,
+                        ),
+                        self._limiter,
+                        self._retry,
+                    )
+                self._cache.put(key, data)
+            if s is not None:
+                s.attrs["results"] = len(data.get("results") or [])
+        return data
+
+    def _run(self, query: str, sub_queries: Optional[List[str]] = None) -> str:
+        if self._backend is None:
             return (
                 "TAVILY_API_KEY is not set. Add it to your .env to enable web search.\n"
                 "Example:\n"
                 "TAVILY_API_KEY=your_key_here"
             )
 
-        from tavily import TavilyClient
+        budget = current_budget(self._call_tokens)
+        if budget.call_limit() < MIN_CALL_TOKENS:
+            return BUDGET_EXHAUSTED
 
-        client = TavilyClient(api_key=self._api_key)
-        data = client.search(
-            query=query,
-            max_results=6,
-            include_answer=True,
-            include_raw_content=False,
-        )
+        if sub_queries:
+            queries = dedupe_queries([query] + list(sub_queries))[: self._max_subqueries]
+        else:
+            queries = decompose_query(query, self._max_subqueries)
+
+        with span("tool.web_research", queries=len(queries)):
+            outcomes = fan_out(self._search, queries, self._max_workers)
+            responses = [(q, data) for q, data, _ in outcomes if data is not None]
+            if not responses:
+                raise outcomes[0][2]
+            output = self._render(query, queries, outcomes, responses, budget)
+            tokens = count_tokens(output)
+            budget.charge(tokens)
+            record(output_tokens=tokens)
+        return output
 
+    def collect_sources(
+        self, query: str, time_range: Optional[str] = None
+    ) -> List[Tuple[MergedSource, SourceRecord]]:
+        """Search without an agent; unseen URLs get source ids but nothing else is recorded.
+
+        Used by report refreshes, which only need to know which sources are new
+        and observe the results once their report is saved; nothing is charged
+        to the run's token budget here. Cached
+        responses are never used, since a refresh is only as good as its
+        searches are current, but the fresh ones are written to the cache.
+        """
+        if self._backend is None:
+            raise RuntimeError("TAVILY_API_KEY is not set; a report refresh needs web search.")
+        queries = decompose_query(query, self._max_subqueries)
+        with span("tool.collect_sources", queries=len(queries)):
+            outcomes = fan_out(lambda q: self._search(q, time_range, refresh=True), queries, self._max_workers)
+            responses = [(q, data) for q, data, _ in outcomes if data is not None]
+            if not responses:
+                raise outcomes[0][2]
+            sources = [s for s in merge_results(responses) if s.url][: self._max_results * 2]
+            records = self._sources.register((s.url, s.title, s.content) for s in sources)
+        return [(s, records[canonical_url(s.url)]) for s in sources]
+
+    def _render(
+        self,
+        query: str,
+        queries: List[str],
+        outcomes: List[Tuple[str, Optional[Dict[str, Any]], Optional[BaseException]]],
+        responses: List[Tuple[str, Dict[str, Any]]],
+        budget: TokenBudget,
+    ) -> str:
         lines: List[str] = [f"## Web research results for: {query}", ""]
-        answer = data.get("answer")
-        if answer:
+        if len(queries) > 1:
+            lines.append(f"Searched {len(queries)} queries: " + "; ".join(queries))
+            for q, _, exc in outcomes:
+                if exc is not None:
+                    lines.append(f"- Search failed for '{q}': {exc}")
+            lines.append("")
+
+        answers = [
+            (q, truncate_to_tokens(data["answer"], 120))
+            for q, data in responses
+            if data.get("answer") and not budget.is_duplicate(data["answer"])
+        ]
+        if answers:
             lines.append("### Quick answer (from search tool)")
-            lines.append(answer)
+            for q, answer in answers:
+                budget.remember(answer)
+                if len(answers) > 1:
+                    lines.append(f"**{q}**: {answer}")
+                else:
+                    lines.append(answer)
             lines.append("")
 
-        results = data.get("results", []) or []
+        sources = merge_results(responses)
+        limit = self._max_results if len(responses) == 1 else self._max_results * 2
+        sources = sources[:limit]
+        with span("source_store.observe"):
+            records = self._sources.observe((s.url, s.title, s.content) for s in sources)
+
+        def record_of(source: MergedSource) -> Optional[SourceRecord]:
+            return records.get(canonical_url(source.url)) if source.url else None
+
+        def is_known(source: MergedSource) -> bool:
+            record = record_of(source)
+            return record is not None and not record.new and not record.changed
+
+        # Pages already in the knowledge base (same content as last time) go last
+        # and only get snippet room that new or changed pages leave over.
+        fresh = [s for s in sources if not is_known(s)]
+        known = [s for s in sources if is_known(s)]
+        sources = fresh + known
+        record(known_sources=len(known))
+
+        def source_header(source: MergedSource) -> List[str]:
+            rec = record_of(source)
+            header = [f"[{rec.label}] {source.title}" if rec else f"- {source.title}"]
+            if source.url:
+                header.append(f"   - URL: {source.url}")
+            if len(responses) > 1:
+                header.append(f"   - Found by: {'; '.join(source.found_by)}")
+            if rec is not None and is_known(source):
+                seen = datetime.fromtimestamp(rec.first_seen).strftime("%Y-%m-%d")
+                note = f"   - Known source (first seen {seen}, same content as last time)"
+                if rec.reports:
+                    note += f"; cited by {rec.reports} saved report(s)"
+                header.append(note)
+            elif rec is not None and rec.changed:
+                header.append("   - Known source, content changed since it was last seen")
+            return header
+
+        # Titles and URLs are always shown; snippets get whatever room is left,
+        # dropping the lowest-ranked sources if even the headers do not fit.
+        call_limit = budget.call_limit()
+        fixed = count_tokens("\n".join(lines)) + 8
+        headers = [source_header(s) for s in sources]
+        while sources and fixed + sum(count_tokens("\n".join(h)) for h in headers) > call_limit:
+            sources, headers = sources[:-1], headers[:-1]
+        fresh = [s for s in sources if not is_known(s)]
+        room = max(0, call_limit - fixed - sum(count_tokens("\n".join(h)) for h in headers))
+        search_text = " ".join(queries)
+        selected = select_passages(search_text, [s.content for s in fresh], room, budget)
+        leftover = select_passages(
+            search_text, [s.content for s in sources[len(fresh):]], room - selected.tokens, budget
+        )
+        for i, passages in leftover.by_source.items():
+            selected.by_source[len(fresh) + i] = passages
+        selected.dropped_duplicates += leftover.dropped_duplicates
+
         lines.append("### Sources")
-        for i, r in enumerate(results, start=1):
-            title = r.get("title") or "Untitled"
-            url = r.get("url") or ""
-            content = (r.get("content") or "").strip()
-            lines.append(f"{i}. {title}")
-            if url:
-                lines.append(f"   - URL: {url}")
-            if content:
-                # Keep it short so it fits context windows
-                snippet = content[:600] + ("…" if len(content) > 600 else "")
-                lines.append(f"   - Snippet: {snippet}")
+        lines.append("Cite these sources by their id, e.g. [S12].")
+        for i, header in enumerate(headers):
+            lines.extend(header)
+            passages = selected.by_source.get(i)
+            if passages:
+                lines.append(f"   - Snippet: {' … '.join(passages)}")
+        if selected.dropped_duplicates:
+            lines.append(
+                f"({selected.dropped_duplicates} passage(s) already shown earlier were omitted.)"
+            )
         lines.append("")
 
         return "\n".join(lines)
@@ -79,64 +283,268 @@ class KaggleOverviewArgs(BaseModel):
 class KaggleDatasetsOverviewTool(BaseTool):
     name: str = "kaggle_datasets_overview"
     description: str = (
-        "Inspect locally stored Kaggle datasets (CSV/Parquet) to extract schema and sample rows. "
+        "Inspect locally stored Kaggle datasets (CSV/Parquet): schema, row counts, column "
+        "distributions (nulls, distinct counts, min/max/mean, quantiles) and sample rows. "
         "Use this for quantitative or structured context relevant to the user's question."
     )
     args_schema: Type[BaseModel] = KaggleOverviewArgs
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, catalog: Optional[DatasetCatalog] = None):
         super().__init__()
         self._base_dir = config.kaggle_data_dir
+        self._top_k = config.kaggle_top_k
+        self._catalog = catalog if catalog is not None else build_dataset_catalog(config)
+        self._call_tokens = config.tool_call_token_budget
 
     def _run(self, query: str) -> str:
         base_dir = self._base_dir
         if not os.path.isdir(base_dir):
             return f"No Kaggle data directory found at {base_dir}."
 
-        patterns = ["**/*.csv", "**/*.parquet"]
-        files: List[str] = []
-        for pattern in patterns:
-            files.extend(glob.glob(os.path.join(base_dir, pattern), recursive=True))
+        budget = current_budget(self._call_tokens)
+        if budget.call_limit() < MIN_CALL_TOKENS:
+            return BUDGET_EXHAUSTED
+
+        with span("tool.kaggle_overview"):
+            with span("kaggle.catalog_refresh") as s:
+                profiles = self._catalog.refresh()
+                if s is not None:
+                    s.attrs["files"] = len(profiles)
+                    s.attrs["pending"] = len(self._catalog.pending())
+            with span("kaggle.rank"):
+                ranked = self._catalog.search(query, self._top_k)
 
-        if not files:
+        if not profiles:
             return f"No CSV or Parquet files found under {base_dir}."
 
         lines: List[str] = [
             f"## Kaggle dataset inspection for query: {query}",
             f"Base directory: {base_dir}",
-            f"Found {len(files)} file(s).",
+            f"Found {len(profiles)} file(s).",
             "",
         ]
 
-        max_files = 3
-        for i, path in enumerate(files[:max_files]):
-            rel = os.path.relpath(path, base_dir)
-            lines.append(f"### File {i+1}: {rel}")
-            try:
-                if path.endswith(".csv"):
-                    df = pd.read_csv(path, nrows=50)
-                else:
-                    df = pd.read_parquet(path)
-            except Exception as exc:  # pragma: no cover
-                lines.append(f"  Could not read file due to error: {exc}")
-                lines.append("")
-                continue
-
+        if ranked:
+            lines.append(f"Showing the {len(ranked)} most relevant file(s) for this query.")
+        else:
+            ranked = [(profile, 0.0) for profile in profiles[: self._top_k]]
             lines.append(
-                f"  Shape (loaded sample): {df.shape[0]} rows x {df.shape[1]} columns"
+                "No file, column or value matched the query terms; "
+                f"showing the first {len(ranked)} file(s)."
             )
-            lines.append(f"  Columns: {', '.join(df.columns.astype(str)[:30])}")
-            lines.append("  Sample rows:")
-            lines.append(df.head(5).to_markdown(index=False))
-            lines.append("")
+        lines.append("")
 
-        lines.append(
+        footer = (
             "Use these datasets as quantitative or contextual background where relevant. "
             "Do not fabricate numeric results."
         )
-        return "\n".join(lines)
+        room = budget.call_limit() - count_tokens("\n".join(lines) + footer)
+        query_terms = set(tokenize(query))
+        for i, (profile, score) in enumerate(ranked):
+            heading = f"### File {i+1}: {profile.path}"
+            if score:
+                heading += f" (relevance {score:.2f})"
+            key = f"kaggle:{profile.path}:{profile.mtime}"
+            if budget.seen_key(key):
+                body = ["  Already described earlier in this run."]
+            else:
+                # Split what is left evenly over the remaining files, then use the
+                # most detailed description that fits that share.
+                share = room // (len(ranked) - i)
+                for max_columns, sample_rows, sample_columns in _DETAIL_LEVELS:
+                    body = _describe_profile(
+                        profile, query_terms, max_columns, sample_rows, sample_columns
+                    )
+                    if count_tokens("\n".join(body)) <= share:
+                        break
+            cost = count_tokens("\n".join([heading] + body))
+            if cost > room:
+                lines.append(f"({len(ranked) - i} more file(s) omitted to stay within the token budget.)")
+                lines.append("")
+                break
+            room -= cost
+            budget.remember_key(key)
+            lines.append(heading)
+            lines.extend(body)
+            lines.append("")
+
+        lines.append(footer)
+        output = "\n".join(lines)
+        tokens = count_tokens(output)
+        budget.charge(tokens)
+        record(output_tokens=tokens)
+        return output
+
+
+# (columns described, sample rows, columns in the sample table), most detailed first.
+_DETAIL_LEVELS = ((30, 5, 12), (15, 3, 8), (8, 2, 5), (5, 0, 0))
+
+
+def _describe_profile(
+    profile: DatasetProfile,
+    query_terms: Optional[Set[str]] = None,
+    max_columns: int = 30,
+    sample_rows: int = 5,
+    sample_columns: int = 12,
+) -> List[str]:
+    if profile.error:
+        return [f"  Could not read file due to error: {profile.error}"]
+    if profile.stats_scope == "pending":
+        return ["  Still being profiled (it did not finish within the catalog deadline); ask again shortly."]
+
+    rows = f"{profile.n_rows:,}" if profile.n_rows is not None else "unknown"
+    if not profile.rows_exact:
+        rows = f"~{rows}"
+    lines = [f"  Shape: {rows} rows x {profile.n_cols} columns"]
+    # Columns named like the query come first so they survive tighter budgets.
+    terms = query_terms or set()
+    columns = sorted(
+        profile.columns,
+        key=lambda c: not (terms and terms.intersection(tokenize(c.name))),
+    )[:max_columns]
+    hidden = len(profile.columns) - len(columns)
+    lines.append(
+        f"  Columns: {', '.join(c.name for c in columns)}"
+        + (f" (+{hidden} more)" if hidden > 0 else "")
+    )
+
+    if profile.stats_scope == "partial":
+        scope = f"first {profile.rows_scanned:,} rows; scan stopped at its time limit"
+    else:
+        scope = "whole file"
+    lines.append(f"  Column stats ({scope}; ≈ marks approximate values):")
+    for col in columns:
+        parts = [col.dtype]
+        if col.null_count is not None:
+            parts.append(f"nulls={col.null_count}")
+            scanned = profile.rows_scanned or profile.n_rows
+            if col.null_count and scanned:
+                rate = col.null_count / scanned
+                parts[-1] += f" ({rate:.1%})" if rate >= 0.001 else " (<0.1%)"
+        if col.distinct is not None:
+            parts.append(f"distinct≈{col.distinct:,}")
+        if col.min is not None or col.max is not None:
+            parts.append(f"min={col.min}, max={col.max}")
+        if col.mean is not None:
+            parts.append(f"mean={col.mean:.4g}")
+        if col.quantiles:
+            labels = [q for q in ("p5", "p25", "p50", "p75", "p95") if q in col.quantiles]
+            values = "/".join(f"{col.quantiles[q]:.4g}" for q in labels)
+            parts.append(f"{'/'.join(labels)}≈{values}")
+        lines.append(f"  - {col.name}: {', '.join(parts)}")
+
+    if profile.sample_rows and sample_rows and sample_columns:
+        lines.append("  Sample rows:")
+        names = [c.name for c in columns[:sample_columns]]
+        sample = pd.DataFrame(profile.sample_rows[:sample_rows], columns=[c.name for c in profile.columns])
+        lines.append(sample[names].to_markdown(index=False))
+    return lines
+
+
+class KaggleAggregationArgs(BaseModel):
+    dataset: str = Field(
+        ..., description="File path as listed by kaggle_datasets_overview, e.g. 'sales/orders.csv'."
+    )
+    metrics: List[str] = Field(
+        default_factory=lambda: ["count"],
+        description="Aggregates such as 'count', 'sum(col)', 'mean(col)', 'min(col)', 'max(col)', 'count_distinct(col)'.",
+    )
+    group_by: List[str] = Field(default_factory=list, description="Up to 3 columns to group by.")
+    filters: List[str] = Field(
+        default_factory=list,
+        description="Row filters such as 'year >= 2020', 'country = US', 'country in US,UK', 'title contains ai'.",
+    )
+    time_column: Optional[str] = Field(None, description="Date/time column to bucket by (needs time_bucket).")
+    time_bucket: Optional[str] = Field(None, description="One of day, week, month, quarter, year.")
+    order_by: Optional[str] = Field(
+        None, description="Metric alias (e.g. 'mean_price', 'count') or group column to sort by."
+    )
+    descending: bool = Field(True, description="Sort order for order_by.")
+    limit: int = Field(20, description="Maximum number of result rows.")
+
+
+class KaggleAggregationTool(BaseTool):
+    name: str = "kaggle_aggregate"
+    description: str = (
+        "Run a read-only aggregation over one local Kaggle dataset: filters, group-by, "
+        "top-k and time bucketing with count/sum/mean/min/max/count_distinct. Use it to "
+        "compute the exact figures you cite instead of estimating them from sample rows."
+    )
+    args_schema: Type[BaseModel] = KaggleAggregationArgs
+
+    def __init__(self, config: AppConfig, cache: Optional[SearchCache] = None):
+        super().__init__()
+        self._base_dir = config.kaggle_data_dir
+        self._timeout = config.kaggle_query_timeout_seconds
+        self._max_rows = config.kaggle_query_max_rows
+        self._cache = cache if cache is not None else build_query_cache(config)
+        self._call_tokens = config.tool_call_token_budget
+
+    def _run(
+        self,
+        dataset: str,
+        metrics: Optional[List[str]] = None,
+        group_by: Optional[List[str]] = None,
+        filters: Optional[List[str]] = None,
+        time_column: Optional[str] = None,
+        time_bucket: Optional[str] = None,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 20,
+    ) -> str:
+        budget = current_budget(self._call_tokens)
+        if budget.call_limit() < MIN_CALL_TOKENS:
+            return BUDGET_EXHAUSTED
+
+        with span("tool.kaggle_aggregate", dataset=dataset) as s:
+            try:
+                path = resolve_dataset(self._base_dir, dataset)
+                query = build_query(
+                    metrics=metrics or ["count"],
+                    group_by=group_by or [],
+                    filters=filters or [],
+                    time_column=time_column,
+                    time_bucket=time_bucket,
+                    order_by=order_by,
+                    descending=descending,
+                    limit=limit,
+                    max_rows=self._max_rows,
+                )
+                key = query_cache_key(path, query)
+                data = self._cache.get(key)
+                record(cache_hits=int(data is not None), cache_misses=int(data is None))
+                if data is not None:
+                    result = result_from_dict(data)
+                else:
+                    result = run_aggregation(path, query, timeout_s=self._timeout)
+                    self._cache.put(key, result_to_dict(result))
+            except QueryError as exc:
+                return f"Aggregation failed: {exc}"
+            if s is not None:
+                s.attrs.update(engine=result.engine, rows_matched=result.rows_matched, cached=result.cached)
+
+        lines = [
+            f"## Aggregation over {os.path.relpath(path, self._base_dir)}",
+            f"Rows matched: {result.rows_matched:,}; groups: {result.groups:,}"
+            + (f" (showing top {len(result.rows)})" if result.groups > len(result.rows) else ""),
+        ]
+        if query.filters:
+            lines.append("Filters: " + "; ".join(f"{f.column} {f.op} {f.value}" for f in query.filters))
+        lines.append("")
+        table = format_result(result)
+        footer = "These figures are computed over the whole file; cite them as such."
+        room = budget.call_limit() - count_tokens("\n".join(lines) + footer)
+        if count_tokens(table) > room:
+            table = truncate_to_tokens(table, max(0, room))
+            footer = "(Table truncated to stay within the token budget.) " + footer
+        lines.extend([table, "", footer])
+        output = "\n".join(lines)
+        tokens = count_tokens(output)
+        budget.charge(tokens)
+        record(output_tokens=tokens)
+        return output
 
 
 def build_crewai_tools(config: AppConfig) -> list[BaseTool]:
-    return [WebResearchTool(config), KaggleDatasetsOverviewTool(config)]
+    return [WebResearchTool(config), KaggleDatasetsOverviewTool(config), KaggleAggregationTool(config)]
 
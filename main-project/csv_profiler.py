@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+HLL_PRECISION = 12
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+MAX_RESERVOIR = 20_000
+MIN_RESERVOIR = 1_000
+TOP_VALUES_CAPACITY = 200
+PROBE_ROWS = 1_000
+MIN_CHUNK_ROWS = 1_000
+
+
+class HyperLogLog:
+    """Approximate distinct counter; 2**precision one-byte registers (4 KiB at p=12)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # Rank = position of the leftmost 1-bit in the remaining 64-p bits.
+        bits = np.zeros(len(rest), dtype=np.int64)
+        nonzero = rest > 0
+        bits[nonzero] = np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.int64) + 1
+        rank = (64 - self.p - bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add_series(self, series: pd.Series) -> None:
+        self.add_hashes(pd.util.hash_pandas_object(series, index=False).to_numpy())
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m * self.m / float(np.sum(np.power(2.0, -self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            # Linear counting is far more accurate for small cardinalities.
+            return int(round(self.m * math.log(self.m / zeros)))
+        return int(round(raw))
+
+
+class Reservoir:
+    """Uniform fixed-size sample of a numeric stream (Algorithm R, vectorised per chunk)."""
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seen = 0
+        self.values = np.empty(0, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, values: np.ndarray) -> None:
+        if not len(values):
+            return
+        room = self.size - len(self.values)
+        if room > 0:
+            self.values = np.concatenate([self.values, values[:room]])
+            self.seen += min(room, len(values))
+            values = values[room:]
+            if not len(values):
+                return
+        positions = self.seen + np.arange(1, len(values) + 1)
+        slots = (self._rng.random(len(values)) * positions).astype(np.int64)
+        keep = slots < self.size
+        # With repeated slots the later element wins, as in the sequential algorithm.
+        self.values[slots[keep]] = values[keep]
+        self.seen += len(values)
+
+    def quantiles(self, qs=QUANTILES) -> Dict[str, float]:
+        if not len(self.values):
+            return {}
+        points = np.quantile(self.values, qs)
+        return {f"p{int(q * 100)}": float(v) for q, v in zip(qs, points)}
+
+
+class TopValues:
+    """Bounded frequency counter for text columns (keeps the heaviest values seen)."""
+
+    def __init__(self, capacity: int = TOP_VALUES_CAPACITY):
+        self.capacity = capacity
+        self.counts: Counter = Counter()
+
+    def add(self, series: pd.Series) -> None:
+        # Only each chunk's heaviest values are merged, so ID-like columns stay bounded.
+        counts = series.dropna().astype(str).value_counts()
+        self.counts.update(counts.head(self.capacity).to_dict())
+        if len(self.counts) > self.capacity * 2:
+            self.counts = Counter(dict(self.counts.most_common(self.capacity)))
+
+    def top(self, n: int) -> List[str]:
+        return [value for value, _ in self.counts.most_common(n)]
+
+
+@dataclass
+class _ColumnState:
+    name: str
+    dtype: str
+    numeric: bool
+    reservoir_size: int
+    nulls: int = 0
+    count: int = 0
+    total: float = 0.0
+    min: Any = None
+    max: Any = None
+    hll: HyperLogLog = field(default_factory=HyperLogLog)
+    reservoir: Optional[Reservoir] = None
+    top: Optional[TopValues] = None
+
+    def __post_init__(self):
+        if self.numeric:
+            self.reservoir = Reservoir(self.reservoir_size)
+        else:
+            self.top = TopValues()
+
+    def update(self, series: pd.Series) -> None:
+        if self.numeric and not pd.api.types.is_numeric_dtype(series):
+            # A later chunk held non-numeric text; those cells count as missing.
+            series = pd.to_numeric(series, errors="coerce")
+            self.dtype = "float64"
+        elif self.numeric and self.dtype != str(series.dtype) and pd.api.types.is_float_dtype(series):
+            self.dtype = str(series.dtype)
+        non_null = series.dropna()
+        self.nulls += len(series) - len(non_null)
+        if not len(non_null):
+            return
+        self.hll.add_series(non_null)
+        if self.numeric:
+            values = non_null.to_numpy(dtype=np.float64)
+            self.count += len(values)
+            self.total += float(values.sum())
+            lo, hi = non_null.min(), non_null.max()
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+            self.reservoir.add(values)
+        else:
+            self.top.add(non_null)
+
+
+@dataclass
+class CsvProfile:
+    n_rows: int
+    n_cols: int
+    rows_scanned: int
+    complete: bool
+    columns: List[Dict[str, Any]]
+    sample_rows: List[Dict[str, Any]]
+    categorical_values: Dict[str, List[str]]
+    bytes_read: int
+    elapsed_s: float
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    # An all-empty head says nothing about the type; profile it as text, which accepts anything.
+    return (
+        pd.api.types.is_numeric_dtype(series)
+        and not pd.api.types.is_bool_dtype(series)
+        and series.notna().any()
+    )
+
+
+def _chunk_rows(probe: pd.DataFrame, memory_bytes: int) -> int:
+    per_row = max(1.0, probe.memory_usage(deep=True).sum() / max(1, len(probe)))
+    # A parsed chunk briefly exists twice (parser buffers + frame) plus per-column temporaries.
+    return max(MIN_CHUNK_ROWS, int(memory_bytes / (per_row * 4)))
+
+
+def profile_csv(
+    path: str,
+    memory_mb: int = 256,
+    max_seconds: float = 0.0,
+    sample_rows: int = 5,
+    max_categorical_values: int = 20,
+) -> CsvProfile:
+    """Profile a CSV of any size in chunks whose parsed size stays under ``memory_mb``.
+
+    Row counts, null counts, min/max/mean are exact; distinct counts
+    (HyperLogLog) and quantiles (reservoir sample) are approximate. When
+    ``max_seconds`` is set the scan stops early and ``complete`` is False;
+    the row count is then extrapolated from the bytes read.
+    """
+    started = time.perf_counter()
+    size = os.path.getsize(path)
+    probe = pd.read_csv(path, nrows=PROBE_ROWS)
+    memory_bytes = memory_mb * 1024 * 1024
+    # Half of the ceiling is for chunks, the other half for per-column sketches.
+    numeric_cols = sum(_is_numeric(probe[c]) for c in probe.columns)
+    reservoir_size = MAX_RESERVOIR
+    if numeric_cols:
+        reservoir_size = int(min(MAX_RESERVOIR, max(MIN_RESERVOIR, memory_bytes / 2 / 8 / numeric_cols)))
+    states = [
+        _ColumnState(
+            name=str(name),
+            dtype=str(probe[name].dtype),
+            numeric=_is_numeric(probe[name]),
+            reservoir_size=reservoir_size,
+        )
+        for name in probe.columns
+    ]
+    chunksize = _chunk_rows(probe, memory_bytes // 2)
+    sample = probe.head(sample_rows)
+
+    rows = 0
+    complete = True
+    bytes_read = size
+    with open(path, "rb") as fh:
+        reader = pd.read_csv(fh, chunksize=chunksize, dtype={s.name: "object" for s in states if not s.numeric})
+        for chunk in reader:
+            rows += len(chunk)
+            for state, name in zip(states, chunk.columns):
+                state.update(chunk[name])
+            if max_seconds and time.perf_counter() - started > max_seconds:
+                bytes_read = min(size, fh.tell())
+                complete = bytes_read >= size
+                break
+
+    n_rows = rows
+    if not complete and bytes_read:
+        n_rows = int(rows * size / bytes_read)
+
+    columns = []
+    for state in states:
+        column: Dict[str, Any] = {
+            "name": state.name,
+            "dtype": state.dtype,
+            "null_count": state.nulls,
+            "distinct": state.hll.estimate(),
+        }
+        if state.numeric and state.count:
+            column.update(
+                min=state.min,
+                max=state.max,
+                mean=state.total / state.count,
+                quantiles=state.reservoir.quantiles(),
+            )
+        columns.append(column)
+
+    return CsvProfile(
+        n_rows=n_rows,
+        n_cols=len(states),
+        rows_scanned=rows,
+        complete=complete,
+        columns=columns,
+        sample_rows=sample.to_dict(orient="records"),
+        categorical_values={
+            s.name: s.top.top(max_categorical_values) for s in states if s.top is not None
+        },
+        bytes_read=bytes_read,
+        elapsed_s=time.perf_counter() - started,
+    )
@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import AppConfig, load_config
+from .resources import prewarm, shared_repository
+
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+HEARTBEAT_SECONDS = 5.0
+DRAFT_FLUSH_SECONDS = 1.0
+
+
+def job_queue_path(config: AppConfig) -> Path:
+    return Path(config.knowledge_base_dir) / ".index" / "jobs.sqlite3"
+
+
+@dataclass
+class Job:
+    job_id: str
+    query: str
+    force_refresh: bool
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    worker: Optional[str] = None
+    attempts: int = 0
+    progress: str = ""
+    draft: str = ""
+    result: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+class JobQueue:
+    """Persistent queue of research jobs shared by the UI and worker processes.
+
+    Every process opens its own connection; claiming a job happens inside a
+    write transaction so two workers never pick up the same job. A running
+    job whose worker stops sending heartbeats is put back in the queue by
+    ``requeue_stale`` and resumes from its checkpointed tasks.
+    """
+
+    _COLUMNS = (
+        "job_id, query, force_refresh, status, created_at, started_at, finished_at, "
+        "worker, attempts, progress, draft, result"
+    )
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=30, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    force_refresh INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat_at REAL,
+                    worker TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    progress TEXT NOT NULL DEFAULT '',
+                    draft TEXT NOT NULL DEFAULT '',
+                    result TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+                CREATE TABLE IF NOT EXISTS job_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    message TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS job_events_by_job ON job_events (job_id, seq);
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _job(self, row: tuple) -> Job:
+        (job_id, query, force_refresh, status, created_at, started_at, finished_at,
+         worker, attempts, progress, draft, result) = row
+        return Job(
+            job_id=job_id,
+            query=query,
+            force_refresh=bool(force_refresh),
+            status=status,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            worker=worker,
+            attempts=attempts,
+            progress=progress,
+            draft=draft,
+            result=json.loads(result) if result else {},
+        )
+
+    def submit(self, query: str, force_refresh: bool = False) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO jobs (job_id, query, force_refresh, status, created_at, progress) "
+                "VALUES (?, ?, ?, 'queued', ?, 'Waiting for a worker')",
+                (job_id, query, int(force_refresh), time.time()),
+            )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?, "
+                    "attempts = attempts + 1, progress = 'Starting' WHERE job_id = ?",
+                    (worker, now, now, row[0]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            found = conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE job_id = ?", (row[0],)
+            ).fetchone()
+        return self._job(found)
+
+    def heartbeat(self, job_id: str, progress: Optional[str] = None, draft: Optional[str] = None) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET heartbeat_at = ?, progress = COALESCE(?, progress), "
+                "draft = COALESCE(?, draft) WHERE job_id = ? AND status = 'running'",
+                (time.time(), progress, draft, job_id),
+            )
+
+    def add_event(self, job_id: str, message: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO job_events (job_id, created_at, message) VALUES (?, ?, ?)",
+                (job_id, time.time(), message),
+            )
+
+    def events(self, job_id: str, limit: int = 200) -> List[Tuple[float, str]]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT created_at, message FROM job_events WHERE job_id = ? ORDER BY seq DESC LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+        return list(reversed(rows))
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        status = "completed" if result.get("success") else "failed"
+        # The report itself lives in the knowledge store; keep only its path here.
+        stored = {key: value for key, value in result.items() if key != "report"}
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, progress = ?, draft = '', result = ? "
+                "WHERE job_id = ?",
+                (
+                    status,
+                    time.time(),
+                    "Finished" if status == "completed" else "Failed",
+                    json.dumps(stored, ensure_ascii=False, default=str),
+                    job_id,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def recent(self, limit: int = 20) -> List[Job]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def position(self, job_id: str) -> int:
+        """How many queued jobs are ahead of ``job_id`` (0 when it is next)."""
+        with self._lock:
+            (ahead,) = self._connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < "
+                "(SELECT created_at FROM jobs WHERE job_id = ?)",
+                (job_id,),
+            ).fetchone()
+        return ahead
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update(dict(rows))
+        return counts
+
+    def requeue_stale(self, stale_after_seconds: float, max_attempts: int = 3) -> int:
+        """Return running jobs whose worker stopped heartbeating to the queue."""
+        cutoff = time.time() - stale_after_seconds
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, progress = 'Failed', "
+                    "result = ? WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                    (
+                        time.time(),
+                        json.dumps({
+                            "success": False,
+                            "error": f"The worker stopped responding {max_attempts} times.",
+                            "error_type": "general_error",
+                        }),
+                        cutoff,
+                        max_attempts,
+                    ),
+                )
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL, "
+                    "progress = 'Waiting for a worker (previous worker stopped)' "
+                    "WHERE status = 'running' AND heartbeat_at < ?",
+                    (cutoff,),
+                ).rowcount
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return requeued
+
+
+def _describe_event(event: Any) -> Optional[str]:
+    if event.type == "task_started":
+        return "Researcher is gathering sources" if event.data["task"] == "research" else "Writer is drafting the report"
+    if event.type == "tool_call":
+        return f"🔧 {event.data['tool']} — {str(event.data['input'])[:160]}"
+    if event.type == "task_finished" and event.data.get("restored"):
+        return f"♻️ {event.data['task'].capitalize()} task restored from an earlier unfinished run"
+    if event.type == "task_finished":
+        return f"✅ {event.data['task'].capitalize()} task finished"
+    return None
+
+
+def run_job(config: AppConfig, jobs: JobQueue, repository: Any, job: Job) -> Dict[str, Any]:
+    from .agents.research_crew import describe_research_error, stream_research_flow
+
+    stop = threading.Event()
+
+    def beat() -> None:
+        # LLM calls and rate-limit waits can be silent for a while; keep the claim alive.
+        while not stop.wait(HEARTBEAT_SECONDS):
+            jobs.heartbeat(job.job_id)
+
+    threading.Thread(target=beat, name=f"job-heartbeat-{job.job_id}", daemon=True).start()
+    result: Dict[str, Any] = {}
+    draft = ""
+    last_flush = 0.0
+    try:
+        for event in stream_research_flow(config, job.query, repository, force_refresh=job.force_refresh):
+            message = _describe_event(event)
+            if message is not None:
+                jobs.add_event(job.job_id, message)
+                if event.type == "task_started":
+                    jobs.heartbeat(job.job_id, progress=message)
+            elif event.type == "llm_token" and event.data["task"] == "writing":
+                draft += event.data["text"]
+                if event.timestamp - last_flush > DRAFT_FLUSH_SECONDS:
+                    jobs.heartbeat(job.job_id, draft=draft)
+                    last_flush = event.timestamp
+            elif event.type in ("run_finished", "run_failed"):
+                result = event.data
+    except Exception as exc:
+        result = describe_research_error(exc)
+    finally:
+        stop.set()
+    if not result:
+        result = {"success": False, "error": "The research run ended without a result.", "error_type": "general_error"}
+    jobs.finish(job.job_id, result)
+    return result
+
+
+def work(config: AppConfig, name: str, stop: Optional[threading.Event] = None) -> None:
+    """Claim and run jobs until ``stop`` is set (or forever)."""
+    if config.prewarm_imports:
+        prewarm()
+    jobs = JobQueue(job_queue_path(config))
+    repository = shared_repository(config)
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        job = jobs.claim(name)
+        if job is None:
+            stop.wait(config.job_poll_seconds)
+            continue
+        run_job(config, jobs, repository, job)
+
+
+def _worker_main(config: AppConfig, index: int) -> None:
+    # Let the parent decide when workers stop; a Ctrl+C in the terminal reaches every process.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(config, f"{socket.gethostname()}:{os.getpid()}:{index}")
+
+
+class WorkerPool:
+    """A fixed number of worker processes; dead workers are replaced on ``ensure_running``."""
+
+    def __init__(self, config: AppConfig, size: int):
+        self.config = config
+        self.size = size
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * size
+        self._lock = threading.Lock()
+
+    def ensure_running(self) -> int:
+        started = 0
+        with self._lock:
+            JobQueue(job_queue_path(self.config)).requeue_stale(self.config.job_stale_seconds)
+            for index, process in enumerate(self._processes):
+                if process is not None and process.is_alive():
+                    continue
+                process = self._context.Process(
+                    target=_worker_main,
+                    args=(self.config, index),
+                    name=f"research-worker-{index}",
+                    daemon=True,
+                )
+                process.start()
+                self._processes[index] = process
+                started += 1
+        return started
+
+    def alive(self) -> int:
+        with self._lock:
+            return sum(1 for p in self._processes if p is not None and p.is_alive())
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            for process in self._processes:
+                if process is not None and process.is_alive():
+                    process.terminate()
+            for process in self._processes:
+                if process is not None:
+                    process.join(timeout)
+            self._processes = [None] * self.size
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run research job workers for the Streamlit app.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: JOB_WORKERS, or 2 when that is 0).",
+    )
+    args = parser.parse_args(argv)
+    config = load_config()
+    size = args.workers if args.workers is not None else (config.job_workers or 2)
+    pool = WorkerPool(config, max(1, size))
+    pool.ensure_running()
+    print(f"Started {pool.size} research worker(s) on {job_queue_path(config)}; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(config.job_stale_seconds / 2)
+            pool.ensure_running()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import contextvars
+import datetime as _dt
+import json
+import math
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import AppConfig
+from ..text_search import BM25Index, tokenize
+from ..tracing import record, span
+from .csv_profiler import profile_csv
+
+
+CATALOG_VERSION = 3
+DATA_EXTENSIONS = (".csv", ".parquet")
+CATEGORICAL_SAMPLE_ROWS = 1000
+MAX_CATEGORICAL_VALUES = 20
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    dtype: str
+    null_count: Optional[int] = None
+    min: Any = None
+    max: Any = None
+    mean: Optional[float] = None
+    # Approximate (HyperLogLog) distinct count and reservoir quantiles, CSV only.
+    distinct: Optional[int] = None
+    quantiles: Optional[Dict[str, float]] = None
+
+
+@dataclass
+class DatasetProfile:
+    path: str
+    format: str
+    size: int
+    mtime: float
+    n_rows: Optional[int] = None
+    n_cols: int = 0
+    # False when n_rows comes from a line count rather than file metadata.
+    rows_exact: bool = True
+    # "file" when column stats cover the whole file, "partial" when a CSV scan
+    # hit its time limit after ``rows_scanned`` rows, "pending" while the file
+    # is still being profiled after a refresh deadline (never persisted).
+    stats_scope: str = "file"
+    rows_scanned: Optional[int] = None
+    columns: List[ColumnProfile] = field(default_factory=list)
+    sample_rows: List[Dict[str, Any]] = field(default_factory=list)
+    # Most frequent values of text columns, used for query matching.
+    categorical_values: Dict[str, List[str]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatasetProfile":
+        data = dict(data)
+        data["columns"] = [ColumnProfile(**c) for c in data.get("columns", [])]
+        return cls(**data)
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, (_dt.date, _dt.datetime, _dt.time)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        try:
+            return _jsonable(value.item())
+        except (ValueError, TypeError):
+            pass
+    return str(value)
+
+
+def _top_values(series: Any) -> List[str]:
+    counts = series.dropna().astype(str).value_counts()
+    return [str(v) for v in counts.index[:MAX_CATEGORICAL_VALUES]]
+
+
+def _profile_csv(path: str, sample_rows: int, memory_mb: int, max_seconds: float) -> Dict[str, Any]:
+    profile = profile_csv(
+        path,
+        memory_mb=memory_mb,
+        max_seconds=max_seconds,
+        sample_rows=sample_rows,
+        max_categorical_values=MAX_CATEGORICAL_VALUES,
+    )
+    columns = [
+        ColumnProfile(
+            name=c["name"],
+            dtype=c["dtype"],
+            null_count=c["null_count"],
+            min=_jsonable(c.get("min")),
+            max=_jsonable(c.get("max")),
+            mean=_jsonable(c.get("mean")),
+            distinct=c["distinct"],
+            quantiles={k: _jsonable(v) for k, v in c["quantiles"].items()} if c.get("quantiles") else None,
+        )
+        for c in profile.columns
+    ]
+    return {
+        "bytes_read": profile.bytes_read,
+        "n_rows": profile.n_rows,
+        "n_cols": profile.n_cols,
+        "rows_exact": profile.complete,
+        "stats_scope": "file" if profile.complete else "partial",
+        "rows_scanned": profile.rows_scanned,
+        "columns": columns,
+        "sample_rows": [
+            {str(k): _jsonable(v) for k, v in row.items()} for row in profile.sample_rows
+        ],
+        "categorical_values": profile.categorical_values,
+    }
+
+
+def _profile_parquet(path: str, sample_rows: int) -> Dict[str, Any]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Everything except the sample comes from the footer; no column data is read.
+    pf = pq.ParquetFile(path)
+    meta = pf.metadata
+    schema = pf.schema_arrow
+    columns = []
+    for arrow_field in schema:
+        columns.append(ColumnProfile(name=arrow_field.name, dtype=str(arrow_field.type)))
+
+    # Row-group statistics are keyed by leaf column; map top-level names onto them.
+    leaf_index = {meta.schema.column(i).path: i for i in range(meta.num_columns)}
+    for col in columns:
+        i = leaf_index.get(col.name)
+        if i is None:
+            continue
+        nulls = 0
+        lo = hi = None
+        complete = True
+        for rg in range(meta.num_row_groups):
+            stats = meta.row_group(rg).column(i).statistics
+            if stats is None:
+                complete = False
+                break
+            if stats.has_null_count:
+                nulls += stats.null_count
+            else:
+                complete = False
+            if stats.has_min_max:
+                lo = stats.min if lo is None else min(lo, stats.min)
+                hi = stats.max if hi is None else max(hi, stats.max)
+        if complete:
+            col.null_count = int(nulls)
+        col.min = _jsonable(lo)
+        col.max = _jsonable(hi)
+
+    bytes_read = meta.serialized_size
+    sample: List[Dict[str, Any]] = []
+    if meta.num_rows and sample_rows:
+        batch = next(pf.iter_batches(batch_size=sample_rows), None)
+        if batch is not None:
+            bytes_read += batch.nbytes
+            sample = [
+                {k: _jsonable(v) for k, v in row.items()}
+                for row in batch.to_pylist()[:sample_rows]
+            ]
+
+    categorical: Dict[str, List[str]] = {}
+    text_columns = [
+        f.name for f in schema
+        if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)
+        or pa.types.is_dictionary(f.type)
+    ]
+    if meta.num_rows and text_columns:
+        batch = next(
+            pf.iter_batches(batch_size=CATEGORICAL_SAMPLE_ROWS, columns=text_columns), None
+        )
+        if batch is not None:
+            bytes_read += batch.nbytes
+            frame = batch.to_pandas()
+            categorical = {name: _top_values(frame[name]) for name in text_columns}
+
+    return {
+        "bytes_read": bytes_read,
+        "n_rows": int(meta.num_rows),
+        "n_cols": len(schema),
+        "rows_exact": True,
+        "stats_scope": "file",
+        "columns": columns,
+        "sample_rows": sample,
+        "categorical_values": categorical,
+    }
+
+
+def _format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "parquet"
+
+
+def profile_dataset(
+    path: str,
+    rel_path: str,
+    sample_rows: int = 5,
+    memory_mb: int = 256,
+    max_seconds: float = 0.0,
+) -> DatasetProfile:
+    st = os.stat(path)
+    fmt = _format(path)
+    profile = DatasetProfile(path=rel_path, format=fmt, size=st.st_size, mtime=st.st_mtime)
+    with span("kaggle.profile", path=rel_path, format=fmt):
+        try:
+            if fmt == "csv":
+                fields = _profile_csv(path, sample_rows, memory_mb, max_seconds)
+            else:
+                fields = _profile_parquet(path, sample_rows)
+        except Exception as exc:
+            profile.error = str(exc)
+            return profile
+        record(bytes_read=fields.pop("bytes_read", 0))
+    for key, value in fields.items():
+        setattr(profile, key, value)
+    return profile
+
+
+def _index_tokens(profile: DatasetProfile) -> List[str]:
+    # File names and column names are better evidence than cell values,
+    # so they are repeated to weigh more in BM25 term frequencies.
+    tokens = tokenize(profile.path) * 3
+    for col in profile.columns:
+        tokens.extend(tokenize(col.name) * 2)
+    for values in profile.categorical_values.values():
+        for value in values:
+            tokens.extend(tokenize(value))
+    return tokens
+
+
+class DatasetCatalog:
+    """Persisted schema/profile catalog for the Kaggle data directory.
+
+    ``refresh`` only stats files; a file is re-profiled (and re-indexed for
+    ``search``) when its size or mtime changed since the catalog was written.
+    Changed files are profiled on a pool of ``workers`` threads. When
+    ``deadline_seconds`` passes first, ``refresh`` returns with the slow files
+    marked as pending; their profiles keep running and are picked up by a
+    later refresh.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        catalog_path: str,
+        sample_rows: int = 5,
+        memory_mb: int = 256,
+        max_seconds: float = 0.0,
+        workers: int = 1,
+        deadline_seconds: float = 0.0,
+    ):
+        self.base_dir = base_dir
+        self.catalog_path = catalog_path
+        self.sample_rows = sample_rows
+        self.memory_mb = memory_mb
+        self.max_seconds = max_seconds
+        self.workers = max(1, workers)
+        self.deadline_seconds = deadline_seconds
+        self._profiles: Dict[str, DatasetProfile] = {}
+        self._index = BM25Index()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # rel path -> (size, mtime, future) of profiles still running.
+        self._pending: Dict[str, Tuple[int, float, Future]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.catalog_path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CATALOG_VERSION:
+            return
+        if data.get("base_dir") != os.path.abspath(self.base_dir):
+            return
+        self._profiles = {
+            rel: DatasetProfile.from_dict(entry)
+            for rel, entry in data.get("datasets", {}).items()
+        }
+        self._index = BM25Index.from_dict(data.get("index", {}))
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.catalog_path) or ".", exist_ok=True)
+        data = {
+            "version": CATALOG_VERSION,
+            "base_dir": os.path.abspath(self.base_dir),
+            "datasets": {
+                rel: asdict(p) for rel, p in self._profiles.items() if p.stats_scope != "pending"
+            },
+            "index": self._index.to_dict(),
+        }
+        tmp = f"{self.catalog_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, self.catalog_path)
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found: Dict[str, os.stat_result] = {}
+        for root, _dirs, names in os.walk(self.base_dir):
+            for name in names:
+                if not name.lower().endswith(DATA_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    found[os.path.relpath(path, self.base_dir)] = os.stat(path)
+                except OSError:
+                    continue
+        return found
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kaggle-profile")
+        return self._executor
+
+    def _profile_changed(self, stale: List[str], on_disk: Dict[str, os.stat_result]) -> bool:
+        for rel in stale:
+            st = on_disk[rel]
+            running = self._pending.get(rel)
+            if running and running[:2] == (st.st_size, st.st_mtime):
+                continue
+            # Each task runs in a copy of the caller's context so its spans join the current trace.
+            future = self._pool().submit(
+                contextvars.copy_context().run,
+                profile_dataset,
+                os.path.join(self.base_dir, rel),
+                rel,
+                self.sample_rows,
+                memory_mb=self.memory_mb,
+                max_seconds=self.max_seconds,
+            )
+            self._pending[rel] = (st.st_size, st.st_mtime, future)
+        if self._pending:
+            timeout = self.deadline_seconds if self.deadline_seconds > 0 else None
+            wait([future for _, _, future in self._pending.values()], timeout=timeout)
+
+        changed = False
+        for rel, (size, mtime, future) in list(self._pending.items()):
+            st = on_disk.get(rel)
+            if future.done():
+                del self._pending[rel]
+                if st is None or (st.st_size, st.st_mtime) != (size, mtime):
+                    continue
+                try:
+                    profile = future.result()
+                except Exception as exc:
+                    profile = DatasetProfile(path=rel, format=_format(rel), size=size, mtime=mtime, error=str(exc))
+            elif st is not None:
+                cached = self._profiles.get(rel)
+                if cached is not None and cached.stats_scope == "pending":
+                    continue
+                profile = DatasetProfile(
+                    path=rel, format=_format(rel), size=size, mtime=mtime, stats_scope="pending"
+                )
+            else:
+                continue
+            self._profiles[rel] = profile
+            self._index.add(rel, _index_tokens(profile))
+            changed = True
+        return changed
+
+    def refresh(self) -> List[DatasetProfile]:
+        with self._lock:
+            on_disk = self._scan()
+            changed = False
+            for rel in list(self._profiles):
+                if rel not in on_disk:
+                    del self._profiles[rel]
+                    self._index.remove(rel)
+                    changed = True
+            stale = []
+            for rel, st in on_disk.items():
+                cached = self._profiles.get(rel)
+                if (
+                    cached
+                    and cached.stats_scope != "pending"
+                    and cached.size == st.st_size
+                    and cached.mtime == st.st_mtime
+                ):
+                    continue
+                stale.append(rel)
+            if stale or self._pending:
+                changed = self._profile_changed(stale, on_disk) or changed
+            if changed:
+                self._save()
+            return self.profiles()
+
+    def pending(self) -> List[str]:
+        """Files whose profiles were still running when the last refresh returned."""
+        return sorted(self._pending)
+
+    def profiles(self) -> List[DatasetProfile]:
+        return [self._profiles[rel] for rel in sorted(self._profiles)]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[DatasetProfile, float]]:
+        hits = self._index.search(tokenize(query), k)
+        return [(self._profiles[rel], score) for rel, score in hits if rel in self._profiles]
+
+
+def build_dataset_catalog(config: AppConfig) -> DatasetCatalog:
+    return DatasetCatalog(
+        base_dir=config.kaggle_data_dir,
+        catalog_path=os.path.join(config.cache_dir, "kaggle_catalog.json"),
+        memory_mb=config.kaggle_profile_memory_mb,
+        max_seconds=config.kaggle_profile_max_seconds,
+        workers=config.kaggle_profile_workers,
+        deadline_seconds=config.kaggle_catalog_deadline_seconds,
+    )
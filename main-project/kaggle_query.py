@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ..config import AppConfig
+from .kaggle_catalog import _jsonable
+from .search_cache import SearchCache
+
+try:
+    import duckdb
+except ImportError:
+    # DuckDB is optional; the pyarrow engine covers the same queries in memory.
+    duckdb = None
+
+
+AGGREGATES = ("count", "sum", "mean", "min", "max", "count_distinct")
+TIME_BUCKETS = ("day", "week", "month", "quarter", "year")
+OPERATORS = ("=", "!=", ">", ">=", "<", "<=", "contains", "in")
+MAX_GROUP_COLUMNS = 3
+MAX_METRICS = 6
+MAX_FILTERS = 8
+BATCH_ROWS = 256 * 1024
+QUERY_CACHE_TTL_SECONDS = 30 * 24 * 3600
+QUERY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+DATA_EXTENSIONS = (".csv", ".parquet")
+
+_METRIC_RE = re.compile(r"^\s*(?P<func>[a-z_]+)\s*(?:\(\s*(?P<col>[^()]*?)\s*\)|:\s*(?P<col2>.+?))?\s*$", re.I)
+_FILTER_RE = re.compile(
+    r"^\s*(?P<col>.+?)\s*(?P<op>>=|<=|!=|==|=|>|<|\s+contains\s+|\s+in\s+)\s*(?P<value>.*?)\s*$", re.I
+)
+
+
+class QueryError(ValueError):
+    """A malformed, unsupported or too expensive aggregation request."""
+
+
+@dataclass(frozen=True)
+class Metric:
+    func: str
+    column: Optional[str] = None
+
+    @property
+    def alias(self) -> str:
+        return self.func if self.column is None else f"{self.func}_{self.column}"
+
+
+@dataclass(frozen=True)
+class Filter:
+    column: str
+    op: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class AggregationQuery:
+    group_by: Tuple[str, ...] = ()
+    metrics: Tuple[Metric, ...] = (Metric("count"),)
+    filters: Tuple[Filter, ...] = ()
+    time_column: Optional[str] = None
+    time_bucket: Optional[str] = None
+    order_by: Optional[str] = None
+    descending: bool = True
+    limit: int = 20
+
+    @property
+    def bucket_alias(self) -> Optional[str]:
+        return f"{self.time_column}_{self.time_bucket}" if self.time_column else None
+
+    @property
+    def keys(self) -> List[str]:
+        keys = list(self.group_by)
+        if self.bucket_alias:
+            keys.insert(0, self.bucket_alias)
+        return keys
+
+
+@dataclass
+class AggregationResult:
+    columns: List[str]
+    rows: List[List[Any]]
+    groups: int
+    rows_matched: int
+    engine: str
+    elapsed_s: float
+    cached: bool = False
+
+
+def _strip_quotes(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def parse_metric(text: str) -> Metric:
+    match = _METRIC_RE.match(text)
+    if not match:
+        raise QueryError(f"Cannot parse metric {text!r}; use e.g. 'count' or 'mean(price)'.")
+    func = match.group("func").lower()
+    func = {"avg": "mean", "average": "mean", "nunique": "count_distinct", "distinct": "count_distinct"}.get(func, func)
+    column = match.group("col") or match.group("col2")
+    column = _strip_quotes(column.strip()) if column and column.strip() not in ("", "*") else None
+    if func not in AGGREGATES:
+        raise QueryError(f"Unsupported aggregate {func!r}; choose from {', '.join(AGGREGATES)}.")
+    if func != "count" and column is None:
+        raise QueryError(f"{func} needs a column, e.g. '{func}(price)'.")
+    return Metric(func, column)
+
+
+def parse_filter(text: str) -> Filter:
+    match = _FILTER_RE.match(text)
+    if not match:
+        raise QueryError(f"Cannot parse filter {text!r}; use e.g. 'year >= 2020' or 'country in US,UK'.")
+    op = match.group("op").strip().lower()
+    op = "=" if op == "==" else op
+    column = _strip_quotes(match.group("col").strip())
+    raw = match.group("value")
+    if op == "in":
+        value: Any = tuple(_strip_quotes(v.strip()) for v in raw.strip("()[]").split(",") if v.strip())
+        if not value:
+            raise QueryError(f"Filter {text!r} has an empty value list.")
+    else:
+        value = _strip_quotes(raw)
+    return Filter(column, op, value)
+
+
+def build_query(
+    metrics: Sequence[str] = ("count",),
+    group_by: Sequence[str] = (),
+    filters: Sequence[str] = (),
+    time_column: Optional[str] = None,
+    time_bucket: Optional[str] = None,
+    order_by: Optional[str] = None,
+    descending: bool = True,
+    limit: int = 20,
+    max_rows: int = 50,
+) -> AggregationQuery:
+    parsed = tuple(dict.fromkeys(parse_metric(m) for m in (metrics or ("count",))))
+    if len(parsed) > MAX_METRICS or len(group_by) > MAX_GROUP_COLUMNS or len(filters) > MAX_FILTERS:
+        raise QueryError(
+            f"Use at most {MAX_METRICS} metrics, {MAX_GROUP_COLUMNS} group-by columns "
+            f"and {MAX_FILTERS} filters per query."
+        )
+    if bool(time_column) != bool(time_bucket):
+        raise QueryError("time_column and time_bucket must be given together.")
+    if time_bucket and time_bucket.lower() not in TIME_BUCKETS:
+        raise QueryError(f"time_bucket must be one of {', '.join(TIME_BUCKETS)}.")
+    query = AggregationQuery(
+        group_by=tuple(dict.fromkeys(group_by)),
+        metrics=parsed,
+        filters=tuple(parse_filter(f) for f in filters),
+        time_column=time_column or None,
+        time_bucket=time_bucket.lower() if time_bucket else None,
+        order_by=order_by or None,
+        descending=descending,
+        limit=max(1, min(int(limit), max_rows)),
+    )
+    if query.order_by and query.order_by not in [m.alias for m in query.metrics] + query.keys:
+        raise QueryError(
+            f"order_by must be a metric ({', '.join(m.alias for m in query.metrics)}) or a group-by column."
+        )
+    return query
+
+
+def resolve_dataset(base_dir: str, name: str) -> str:
+    """Map a dataset path (as listed by the overview tool) to a file under ``base_dir``.
+
+    A bare file name is accepted when it is unique. Paths outside ``base_dir``
+    are rejected, so the tool can only ever read the local Kaggle data.
+    """
+    base = os.path.realpath(base_dir)
+    name = name.strip().strip("'\"")
+    candidate = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, candidate]) != base:
+        raise QueryError(f"{name!r} is outside the Kaggle data directory.")
+    if os.path.isfile(candidate) and candidate.lower().endswith(DATA_EXTENSIONS):
+        return candidate
+    matches = []
+    for root, _, files in os.walk(base):
+        for file_name in files:
+            if file_name == os.path.basename(name) and file_name.lower().endswith(DATA_EXTENSIONS):
+                matches.append(os.path.join(root, file_name))
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        shown = ", ".join(sorted(os.path.relpath(m, base) for m in matches))
+        raise QueryError(f"{name!r} is ambiguous; use one of: {shown}")
+    raise QueryError(f"No CSV or Parquet file named {name!r} under {base_dir}.")
+
+
+def build_query_cache(config: AppConfig) -> SearchCache:
+    # Keys include the file size and mtime, so entries only go stale when the data changes.
+    return SearchCache(
+        path=os.path.join(config.cache_dir, "kaggle_queries.sqlite3"),
+        ttl_seconds=QUERY_CACHE_TTL_SECONDS,
+        max_bytes=QUERY_CACHE_MAX_BYTES,
+        mode=config.kaggle_query_cache_mode,
+    )
+
+
+def query_cache_key(path: str, query: AggregationQuery) -> str:
+    st = os.stat(path)
+    payload = json.dumps(
+        {"path": os.path.abspath(path), "size": st.st_size, "mtime": st.st_mtime, "query": asdict(query)},
+        sort_keys=True,
+        default=list,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _check_columns(query: AggregationQuery, available: Sequence[str]) -> None:
+    wanted = list(query.group_by) + [f.column for f in query.filters]
+    wanted += [m.column for m in query.metrics if m.column]
+    if query.time_column:
+        wanted.append(query.time_column)
+    missing = [c for c in dict.fromkeys(wanted) if c not in available]
+    if missing:
+        shown = ", ".join(list(available)[:40])
+        raise QueryError(f"Unknown column(s): {', '.join(missing)}. Available columns: {shown}")
+
+
+def _finish(frame: pd.DataFrame, query: AggregationQuery, rows_matched: int, engine: str, started: float) -> AggregationResult:
+    groups = len(frame)
+    if query.order_by:
+        frame = frame.sort_values(query.order_by, ascending=not query.descending, kind="stable")
+    elif query.bucket_alias:
+        frame = frame.sort_values(query.keys, kind="stable")
+    elif query.group_by:
+        frame = frame.sort_values(query.metrics[0].alias, ascending=False, kind="stable")
+    frame = frame.head(query.limit)
+    columns = query.keys + [m.alias for m in query.metrics]
+    rows = [[_jsonable(v) for v in row] for row in frame[columns].itertuples(index=False, name=None)]
+    return AggregationResult(
+        columns=columns,
+        rows=rows,
+        groups=groups,
+        rows_matched=rows_matched,
+        engine=engine,
+        elapsed_s=time.perf_counter() - started,
+    )
+
+
+# --- pyarrow engine ---------------------------------------------------------
+
+
+def _arrow_literal(value: str, arrow_type: Any) -> Any:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    try:
+        if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+            number = float(value)
+            return int(number) if pa.types.is_integer(arrow_type) and number.is_integer() else number
+        if pa.types.is_boolean(arrow_type):
+            return value.strip().lower() in ("1", "true", "yes")
+        if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+            return pc.cast(pa.scalar(value), arrow_type)
+    except (ValueError, pa.ArrowInvalid) as exc:
+        raise QueryError(f"{value!r} is not a valid {arrow_type} value.") from exc
+    return value
+
+
+def _arrow_filter(query: AggregationQuery, schema: Any) -> Any:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    expression = None
+    for f in query.filters:
+        column_type = schema.field(f.column).type
+        field_ref = ds.field(f.column)
+        if f.op == "contains":
+            part = pc.match_substring(field_ref.cast("string"), f.value, ignore_case=True)
+        elif f.op == "in":
+            part = field_ref.isin([_arrow_literal(v, column_type) for v in f.value])
+        else:
+            literal = _arrow_literal(f.value, column_type)
+            part = {
+                "=": field_ref == literal,
+                "!=": field_ref != literal,
+                ">": field_ref > literal,
+                ">=": field_ref >= literal,
+                "<": field_ref < literal,
+                "<=": field_ref <= literal,
+            }[f.op]
+        expression = part if expression is None else expression & part
+    return expression
+
+
+def _arrow_bucket(column: Any, bucket: str) -> Any:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not pa.types.is_timestamp(column.type):
+        try:
+            column = pc.cast(column, pa.timestamp("s"))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+            raise QueryError(f"Column values cannot be read as dates ({exc}).") from exc
+    return pc.floor_temporal(column, unit=bucket)
+
+
+def _run_arrow(path: str, query: AggregationQuery, timeout_s: float, started: float) -> AggregationResult:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="csv" if path.lower().endswith(".csv") else "parquet")
+    _check_columns(query, dataset.schema.names)
+    value_columns = list(dict.fromkeys(m.column for m in query.metrics if m.column))
+    needed = list(dict.fromkeys(list(query.group_by) + value_columns + ([query.time_column] if query.time_column else [])))
+    keys = query.keys or ["__all__"]
+
+    partial_aggs: List[Tuple[Any, str]] = [([], "count_all")]
+    for column in value_columns:
+        funcs = {m.func for m in query.metrics if m.column == column}
+        if funcs & {"sum", "mean"}:
+            partial_aggs.append((column, "sum"))
+        if funcs & {"mean", "count"}:
+            partial_aggs.append((column, "count"))
+        if "min" in funcs:
+            partial_aggs.append((column, "min"))
+        if "max" in funcs:
+            partial_aggs.append((column, "max"))
+    # A group-by column has exactly one value per group; it needs no pairs.
+    distinct_columns = list(dict.fromkeys(
+        m.column for m in query.metrics if m.func == "count_distinct" and m.column not in keys
+    ))
+
+    partials: List[pd.DataFrame] = []
+    distinct_pairs: Dict[str, List[pd.DataFrame]] = {c: [] for c in distinct_columns}
+    rows_matched = 0
+    scanner = dataset.scanner(columns=needed, filter=_arrow_filter(query, dataset.schema), batch_size=BATCH_ROWS)
+    try:
+        for batch in scanner.to_batches():
+            if time.perf_counter() - started > timeout_s:
+                raise QueryError(
+                    f"Query stopped after {timeout_s:g}s; add filters or group by fewer columns."
+                )
+            if not batch.num_rows:
+                continue
+            rows_matched += batch.num_rows
+            table = pa.Table.from_batches([batch])
+            if query.time_column:
+                table = table.append_column(
+                    query.bucket_alias, _arrow_bucket(table.column(query.time_column), query.time_bucket)
+                )
+            if not query.keys:
+                table = table.append_column("__all__", pa.array([0] * table.num_rows, pa.int8()))
+            # Aggregate each batch to one row per group, then merge the (small) partials.
+            partials.append(table.group_by(keys).aggregate(partial_aggs).to_pandas())
+            for column in distinct_columns:
+                pairs = table.select(keys + [column]).drop_null().group_by(keys + [column]).aggregate([])
+                distinct_pairs[column].append(pairs.to_pandas())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as exc:
+        raise QueryError(f"Could not read {os.path.basename(path)}: {exc}") from exc
+
+    if not partials:
+        return _finish(pd.DataFrame(columns=query.keys + [m.alias for m in query.metrics]), query, 0, "pyarrow", started)
+
+    merged = pd.concat(partials, ignore_index=True)
+    reducers = {name: ("min" if name.endswith("_min") else "max" if name.endswith("_max") else "sum")
+                for name in merged.columns if name not in keys}
+    grouped = merged.groupby(keys, dropna=False).agg(reducers)
+    frame = pd.DataFrame(index=grouped.index)
+    for metric in query.metrics:
+        if metric.func == "count" and metric.column is None:
+            frame[metric.alias] = grouped["count_all"]
+        elif metric.func == "count":
+            frame[metric.alias] = grouped[f"{metric.column}_count"]
+        elif metric.func == "mean":
+            frame[metric.alias] = grouped[f"{metric.column}_sum"] / grouped[f"{metric.column}_count"].where(
+                grouped[f"{metric.column}_count"] > 0
+            )
+        elif metric.func == "count_distinct" and metric.column in keys:
+            frame[metric.alias] = grouped.index.get_level_values(metric.column).notna().astype("int64")
+        elif metric.func == "count_distinct":
+            pairs = pd.concat(distinct_pairs[metric.column], ignore_index=True).drop_duplicates()
+            counts = pairs.groupby(keys, dropna=False)[metric.column].size()
+            frame[metric.alias] = counts.reindex(frame.index, fill_value=0)
+        else:
+            frame[metric.alias] = grouped[f"{metric.column}_{metric.func}"]
+    frame = frame.reset_index()
+    return _finish(frame, query, rows_matched, "pyarrow", started)
+
+
+# --- DuckDB engine ----------------------------------------------------------
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _duckdb_sql(path: str, query: AggregationQuery) -> Tuple[str, List[Any]]:
+    literal_path = "'" + path.replace("'", "''") + "'"
+    source = f"read_csv_auto({literal_path})" if path.lower().endswith(".csv") else f"read_parquet({literal_path})"
+    select: List[str] = []
+    keys: List[str] = []
+    if query.time_column:
+        select.append(
+            f"date_trunc('{query.time_bucket}', CAST({_quote(query.time_column)} AS TIMESTAMP)) AS {_quote(query.bucket_alias)}"
+        )
+        keys.append(_quote(query.bucket_alias))
+    for column in query.group_by:
+        select.append(_quote(column))
+        keys.append(_quote(column))
+    for metric in query.metrics:
+        if metric.func == "count" and metric.column is None:
+            expression = "COUNT(*)"
+        elif metric.func == "count_distinct":
+            expression = f"COUNT(DISTINCT {_quote(metric.column)})"
+        elif metric.func == "mean":
+            expression = f"AVG({_quote(metric.column)})"
+        else:
+            expression = f"{metric.func.upper()}({_quote(metric.column)})"
+        select.append(f"{expression} AS {_quote(metric.alias)}")
+    select.append("COUNT(*) AS __rows")
+
+    where: List[str] = []
+    params: List[Any] = []
+    for f in query.filters:
+        column = _quote(f.column)
+        if f.op == "contains":
+            where.append(f"CAST({column} AS VARCHAR) ILIKE ?")
+            params.append(f"%{f.value}%")
+        elif f.op == "in":
+            where.append(f"CAST({column} AS VARCHAR) IN ({', '.join('?' * len(f.value))})")
+            params.extend(f.value)
+        else:
+            # Let DuckDB coerce the literal to the column's type.
+            where.append(f"{column} {f.op} ?")
+            params.append(f.value)
+    sql = f"SELECT {', '.join(select)} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if keys:
+        sql += " GROUP BY " + ", ".join(keys)
+    return sql, params
+
+
+def _run_duckdb(path: str, query: AggregationQuery, timeout_s: float, started: float) -> AggregationResult:
+    conn = duckdb.connect()
+    timer = threading.Timer(timeout_s, conn.interrupt)
+    try:
+        source = "read_csv_auto(?)" if path.lower().endswith(".csv") else "read_parquet(?)"
+        columns = [row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {source}", [path]).fetchall()]
+        _check_columns(query, columns)
+        sql, params = _duckdb_sql(path, query)
+        timer.start()
+        frame = conn.execute(sql, params).df()
+    except duckdb.InterruptException as exc:
+        raise QueryError(f"Query stopped after {timeout_s:g}s; add filters or group by fewer columns.") from exc
+    except duckdb.Error as exc:
+        raise QueryError(f"Could not run the aggregation: {exc}") from exc
+    finally:
+        timer.cancel()
+        conn.close()
+    rows_matched = int(frame["__rows"].sum()) if len(frame) else 0
+    return _finish(frame.drop(columns="__rows"), query, rows_matched, "duckdb", started)
+
+
+def run_aggregation(path: str, query: AggregationQuery, timeout_s: float = 20.0) -> AggregationResult:
+    """Run a read-only aggregation over one CSV/Parquet file.
+
+    Uses DuckDB when it is installed (out-of-core, multi-threaded) and
+    otherwise scans the file in Arrow batches, aggregating each batch and
+    merging the per-group partials, so memory grows with the number of groups
+    rather than the number of rows.
+    """
+    started = time.perf_counter()
+    if duckdb is not None:
+        return _run_duckdb(path, query, timeout_s, started)
+    return _run_arrow(path, query, timeout_s, started)
+
+
+def format_result(result: AggregationResult, max_cell_chars: int = 40) -> str:
+    def cell(value: Any) -> str:
+        if isinstance(value, float):
+            text = "" if math.isnan(value) else f"{value:.6g}"
+        else:
+            text = "" if value is None else str(value)
+        return text if len(text) <= max_cell_chars else text[: max_cell_chars - 1] + "…"
+
+    lines = ["| " + " | ".join(result.columns) + " |", "|" + "---|" * len(result.columns)]
+    for row in result.rows:
+        lines.append("| " + " | ".join(cell(v) for v in row) + " |")
+    return "\n".join(lines)
+
+
+def result_to_dict(result: AggregationResult) -> Dict[str, Any]:
+    data = asdict(result)
+    data.pop("cached", None)
+    return data
+
+
+def result_from_dict(data: Dict[str, Any]) -> AggregationResult:
+    return AggregationResult(cached=True, **data)
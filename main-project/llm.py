@@ -8,12 +8,169 @@ for key in ['OPENAI_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_API_KEY', 'ANTHROPIC_API
         _env_backup_llm[key] = os.environ[key]
         del os.environ[key]
 
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
 from crewai import LLM
 
+try:
+    from crewai.llms.base_llm import BaseLLM
+except ImportError:
+    from crewai import BaseLLM
+
 from .config import AppConfig
+from .rate_limit import RetryPolicy, call_with_retry, provider_limiter
+from .tools.token_budget import count_tokens
+
+
+# Completion tokens reserved against the TPM bucket when the call sets no max_tokens.
+COMPLETION_TOKEN_ALLOWANCE = 1024
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "successful_requests")
+
+_run_usage: ContextVar[Optional[Dict[str, int]]] = ContextVar("llm_run_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[Dict[str, int]]:
+    """Count the token usage of LLM calls made inside the block.
+
+    Shared LLM instances only keep lifetime totals, and a crew sums them once
+    per agent, so per-run usage is counted here as each call reports it.
+    """
+    usage = {name: 0 for name in USAGE_FIELDS}
+    token = _run_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _run_usage.reset(token)
+
+
+class ReplayLLM(BaseLLM):
+    """Offline stand-in for the Groq LLM that replays recorded completions.
+
+    Fixtures are a list of ``{"agent": ..., "step": n, "response": ...}``
+    entries. ``agent`` is matched against the system prompt (e.g. the agent
+    role) and ``step`` is the number of assistant turns already in the
+    conversation; past the last recorded step the last response is reused,
+    so a replay always terminates.
+    """
+
+    def __init__(self, completions: List[Dict[str, Any]], latency_s: float = 0.0, **kwargs: Any):
+        super().__init__(model="replay", **kwargs)
+        self.completions = completions
+        self.latency_s = latency_s
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReplayLLM":
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(data.get("completions") or [], latency_s=float(data.get("latency_ms", 0)) / 1000.0)
+
+    def _pick(self, messages: List[Dict[str, Any]]) -> str:
+        system = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+        if not system and messages:
+            system = messages[0].get("content") or ""
+        step = sum(1 for m in messages if m.get("role") == "assistant")
+        candidates = [c for c in self.completions if c.get("agent", "") in system]
+        if not candidates:
+            return "Thought: I now know the final answer\nFinal Answer: (no recorded completion)"
+        candidates.sort(key=lambda c: c.get("step", 0))
+        chosen = candidates[-1]
+        for c in candidates:
+            if c.get("step", 0) >= step:
+                chosen = c
+                break
+        return chosen["response"]
+
+    def call(
+        self,
+        messages: Any,
+        tools: Optional[List[Any]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        response = self._pick(messages)
+        if hasattr(self, "_track_token_usage_internal"):
+            # Roughly four characters per token; good enough for relative comparisons.
+            prompt_chars = sum(len(m.get("content") or "") for m in messages)
+            self._track_token_usage_internal(
+                {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(response) // 4}
+            )
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 131072
+
+
+def _estimate_call_tokens(llm: Any, messages: Any) -> int:
+    if isinstance(messages, str):
+        prompt = count_tokens(messages)
+    else:
+        prompt = sum(count_tokens(str(m.get("content") or "")) for m in messages)
+    return prompt + int(getattr(llm, "max_tokens", None) or COMPLETION_TOKEN_ALLOWANCE)
+
+
+def with_rate_limits(llm: Any, config: AppConfig) -> Any:
+    """Route every ``llm.call`` through the shared Groq limiter and retry scheduler.
+
+    CrewAI builds provider-specific LLM classes, so the instance's ``call`` is
+    wrapped rather than subclassing each of them.
+    """
+    limiter = provider_limiter("groq", config.groq_rpm, config.groq_tpm)
+    policy = RetryPolicy(
+        max_attempts=config.retry_max_attempts, max_delay=config.retry_max_delay_seconds
+    )
+    call = llm.call
+
+    def limited_call(messages: Any, *args: Any, **kwargs: Any) -> Any:
+        return call_with_retry(
+            lambda: call(messages, *args, **kwargs),
+            limiter,
+            policy,
+            tokens=_estimate_call_tokens(llm, messages),
+        )
+
+    object.__setattr__(llm, "call", limited_call)
+
+    track = getattr(llm, "_track_token_usage_internal", None)
+    if track is not None:
+        track_lock = threading.Lock()
+
+        def tracked(usage_data: Any) -> None:
+            # Diff the instance totals instead of parsing usage_data, whose
+            # shape differs per provider.
+            with track_lock:
+                before = dict(llm._token_usage)
+                track(usage_data)
+                after = dict(llm._token_usage)
+            usage = _run_usage.get()
+            if usage is not None:
+                for name in USAGE_FIELDS:
+                    usage[name] += int(after.get(name, 0) - before.get(name, 0))
+
+        object.__setattr__(llm, "_track_token_usage_internal", tracked)
+    return llm
+
 
+def build_crewai_llm(config: AppConfig, temperature: float = 0.2, stream: bool = False):
+    if config.llm_fixtures:
+        return with_rate_limits(ReplayLLM.from_file(config.llm_fixtures), config)
 
-def build_crewai_llm(config: AppConfig, temperature: float = 0.2):
     if not config.groq_api_key:
         raise ValueError(
             "GROQ_API_KEY is required. "
@@ -24,9 +181,13 @@ def build_crewai_llm(config: AppConfig, temperature: float = 0.2):
 
     model_string = f"groq/{config.groq_model}" if not config.groq_model.startswith("groq/") else config.groq_model
 
-    return LLM(
-        model=model_string,
-        temperature=temperature,
+    return with_rate_limits(
+        LLM(
+            model=model_string,
+            temperature=temperature,
+            stream=stream,
+        ),
+        config,
     )
 
 
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, TypeVar
+
+from .tracing import incr, span
+
+
+T = TypeVar("T")
+
+
+class RateLimiter:
+    """Thread-safe token bucket refilled at ``per_minute`` permits per minute."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.per_minute = per_minute
+        self.capacity = burst if burst is not None else max(1.0, per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60.0
+        )
+        self._updated = now
+
+    def acquire(self, permits: float = 1.0, timeout: Optional[float] = None) -> bool:
+        if self.per_minute <= 0:
+            return True
+        permits = min(permits, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= permits:
+                    self._tokens -= permits
+                    return True
+                wait = (permits - self._tokens) * 60.0 / self.per_minute
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def set_rate(self, per_minute: float) -> None:
+        """Change the refill rate; waiting callers wake up and recompute their wait."""
+        with self._cond:
+            # Credit the time elapsed so far at the old rate.
+            self._refill()
+            self.per_minute = per_minute
+            self._cond.notify_all()
+
+    def drain(self) -> None:
+        """Empty the bucket so queued callers resume at the refill rate, not in a burst."""
+        with self._cond:
+            self._refill()
+            self._tokens = 0.0
+            self._cond.notify_all()
+
+
+@dataclass
+class LimiterStats:
+    calls: int = 0
+    throttled: int = 0
+    retries: int = 0
+    waited_s: float = 0.0
+
+
+class ProviderLimiter:
+    """Requests- and tokens-per-minute buckets for one provider.
+
+    A 429 puts every caller of the provider on hold until the Retry-After
+    delay has passed and lowers the request rate; it climbs back to the
+    configured rate as calls succeed again.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float = 0):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = RateLimiter(requests_per_minute)
+        self.tokens = RateLimiter(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.stats = LimiterStats()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None) -> bool:
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                pause = self._cooldown_until - time.monotonic()
+            if pause <= 0:
+                break
+            time.sleep(pause)
+        remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+        ok = self.requests.acquire(1, remaining)
+        if ok and self.tokens is not None and tokens:
+            remaining = None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+            ok = self.tokens.acquire(tokens, remaining)
+        with self._lock:
+            self.stats.calls += 1
+            self.stats.waited_s += time.monotonic() - started
+        return ok
+
+    def on_retry(self) -> None:
+        with self._lock:
+            self.stats.retries += 1
+
+    def on_success(self) -> None:
+        if self.requests_per_minute <= 0:
+            return
+        with self._lock:
+            # Only on_success and on_throttled change the rate, both under this lock.
+            if self.requests.per_minute < self.requests_per_minute:
+                self.requests.set_rate(
+                    min(
+                        self.requests_per_minute,
+                        self.requests.per_minute + max(1.0, self.requests_per_minute * 0.05),
+                    )
+                )
+
+    def on_throttled(self, delay: float) -> None:
+        with self._lock:
+            self.stats.throttled += 1
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            if self.requests_per_minute > 0:
+                self.requests.set_rate(max(1.0, self.requests.per_minute * 0.7))
+        self.requests.drain()
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_limiter(
+    provider: str, per_minute: float, tokens_per_minute: float = 0
+) -> ProviderLimiter:
+    """Process-wide limiter per provider, shared by every tool and worker."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if (
+            limiter is None
+            or limiter.requests_per_minute != per_minute
+            or limiter.tokens_per_minute != tokens_per_minute
+        ):
+            limiter = _limiters[provider] = ProviderLimiter(provider, per_minute, tokens_per_minute)
+        return limiter
+
+
+class RetriesExhausted(RuntimeError):
+    def __init__(self, provider: str, attempts: int, last_error: BaseException):
+        super().__init__(
+            f"{provider}: giving up after {attempts} attempts (429 / rate limit): {last_error}"
+        )
+        self.provider = provider
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            # Honour the server's hint; a little jitter keeps waiters from waking together.
+            return min(self.max_delay, retry_after) + self.rng.uniform(0, self.base_delay / 2)
+        # "Full jitter" exponential backoff.
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+_RETRY_IN_RE = re.compile(
+    r"(?:try again in|retry after|retry in)\s*(?:(\d+)h)?\s*(?:(\d+)m(?!s))?\s*(?:([\d.]+)\s*(ms|s|seconds?)?)?",
+    re.IGNORECASE,
+)
+_RATE_LIMIT_NAMES = ("ratelimit", "usagelimitexceeded", "toomanyrequests")
+_TRANSIENT_NAMES = ("timeout", "connectionerror", "serviceunavailable", "apiconnectionerror")
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for holder in (exc, getattr(exc, "response", None)):
+        code = getattr(holder, "status_code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from headers or the error message."""
+    for holder in (getattr(exc, "response", None), exc):
+        headers = getattr(holder, "headers", None)
+        if headers:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    pass
+    match = _RETRY_IN_RE.search(str(exc))
+    if match and any(match.groups()[:3]):
+        hours, minutes, amount, unit = match.groups()
+        seconds = float(amount or 0)
+        if unit == "ms":
+            seconds /= 1000.0
+        return int(hours or 0) * 3600 + int(minutes or 0) * 60 + seconds
+    return None
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    if _status_code(exc) == 429:
+        return True
+    name = type(exc).__name__.lower()
+    if any(n in name for n in _RATE_LIMIT_NAMES):
+        return True
+    message = str(exc).lower()
+    return "429" in message or "rate limit" in message or "rate_limit" in message
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if is_rate_limited(exc):
+        return True
+    if _status_code(exc) in (500, 502, 503, 504):
+        return True
+    name = type(exc).__name__.lower()
+    return any(n in name for n in _TRANSIENT_NAMES)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    limiter: ProviderLimiter,
+    policy: Optional[RetryPolicy] = None,
+    tokens: float = 0,
+    retryable: Callable[[BaseException], bool] = is_retryable,
+) -> T:
+    """Call ``fn`` once the limiter admits it, retrying 429s and transient errors."""
+    policy = policy or RetryPolicy()
+    for attempt in range(policy.max_attempts):
+        with span("rate_limit_wait", provider=limiter.name):
+            limiter.acquire(tokens)
+        try:
+            result = fn()
+        except Exception as exc:
+            if not retryable(exc):
+                raise
+            if attempt == policy.max_attempts - 1:
+                if is_rate_limited(exc):
+                    raise RetriesExhausted(limiter.name, policy.max_attempts, exc) from exc
+                raise
+            delay = policy.delay(attempt, retry_after_seconds(exc))
+            limiter.on_retry()
+            incr(f"{limiter.name}_retries")
+            if is_rate_limited(exc):
+                # The pause applies to every caller of the provider, not just this one.
+                limiter.on_throttled(delay)
+            else:
+                time.sleep(delay)
+            continue
+        limiter.on_success()
+        return result
+    raise AssertionError("unreachable")
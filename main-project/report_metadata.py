@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+_URL_RE = re.compile(r"https?://[^\s<>\)\]\"'`]+")
+PREVIEW_CHARS = 500
+
+# Position in the newest-first listing: (created_at, name) of the last report shown.
+ReportCursor = Tuple[float, str]
+
+
+def extract_sources(markdown: str, limit: int = 50) -> List[str]:
+    """Distinct URLs cited in a report, in order of first appearance."""
+    urls = (url.rstrip(".,;:") for url in _URL_RE.findall(markdown))
+    return list(dict.fromkeys(urls))[:limit]
+
+
+def normalize_report_query(query: str) -> str:
+    return " ".join(query.casefold().split()).strip(" ?.!")
+
+
+def make_preview(markdown: str, max_chars: int = PREVIEW_CHARS) -> str:
+    text = markdown.strip()
+    return text[:max_chars] + "..." if len(text) > max_chars else text
+
+
+@dataclass
+class ReportMeta:
+    name: str
+    query: str
+    created_at: float
+    length: int
+    sources: List[str] = field(default_factory=list)
+    model: Optional[str] = None
+    duration_s: Optional[float] = None
+    tags: List[str] = field(default_factory=list)
+    run_id: Optional[str] = None
+    preview: str = ""
+
+
+@dataclass
+class ReportPage:
+    reports: List[ReportMeta]
+    # Pass back to get the next (older) page; None on the last page.
+    next_cursor: Optional[ReportCursor] = None
+
+
+class ReportMetadataStore:
+    """Indexed per-report metadata, so listings and counts never read report bodies.
+
+    Reports are listed newest first through the ``created_at`` index; tags
+    live in their own table so filtering by tag is an index lookup too.
+    Pages are keyed by a cursor rather than an offset, so every page costs the
+    same however deep into the store it is. ``version`` changes with every
+    write, from any process, and lets callers cache listings safely. The
+    normalized query is indexed too, for finding the newest report on a query.
+    """
+
+    _COLUMNS = "name, query, created_at, length, sources, model, duration_s, tags, run_id, preview"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    name TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    length INTEGER NOT NULL,
+                    sources TEXT NOT NULL DEFAULT '[]',
+                    model TEXT,
+                    duration_s REAL,
+                    tags TEXT NOT NULL DEFAULT '[]',
+                    run_id TEXT,
+                    preview TEXT NOT NULL DEFAULT '',
+                    query_key TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS reports_by_created ON reports (created_at, name);
+                CREATE TABLE IF NOT EXISTS report_tags (
+                    tag TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (tag, created_at, name)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS report_tags_by_name ON report_tags (name);
+                CREATE TABLE IF NOT EXISTS store_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    version INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO store_version (id, version) VALUES (0, 0);
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
+            if "query_key" not in columns:
+                conn.execute("ALTER TABLE reports ADD COLUMN query_key TEXT NOT NULL DEFAULT ''")
+                conn.executemany(
+                    "UPDATE reports SET query_key = ? WHERE name = ?",
+                    [
+                        (normalize_report_query(query), name)
+                        for name, query in conn.execute("SELECT name, query FROM reports").fetchall()
+                    ],
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS reports_by_query ON reports (query_key, created_at, name)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _meta(row: tuple) -> ReportMeta:
+        name, query, created_at, length, sources, model, duration_s, tags, run_id, preview = row
+        return ReportMeta(
+            name=name,
+            query=query,
+            created_at=created_at,
+            length=length,
+            sources=json.loads(sources),
+            model=model,
+            duration_s=duration_s,
+            tags=json.loads(tags),
+            run_id=run_id,
+            preview=preview,
+        )
+
+    def _upsert(self, conn: sqlite3.Connection, meta: ReportMeta) -> None:
+        conn.execute(
+            f"INSERT OR REPLACE INTO reports ({self._COLUMNS}, query_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                meta.name,
+                meta.query,
+                meta.created_at,
+                meta.length,
+                json.dumps(meta.sources),
+                meta.model,
+                meta.duration_s,
+                json.dumps(meta.tags),
+                meta.run_id,
+                meta.preview,
+                normalize_report_query(meta.query),
+            ),
+        )
+        conn.execute("DELETE FROM report_tags WHERE name = ?", (meta.name,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO report_tags (tag, name, created_at) VALUES (?, ?, ?)",
+            [(tag, meta.name, meta.created_at) for tag in meta.tags],
+        )
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE store_version SET version = version + 1 WHERE id = 0")
+
+    def version(self) -> int:
+        with self._lock:
+            (version,) = self._connection().execute("SELECT version FROM store_version WHERE id = 0").fetchone()
+        return int(version)
+
+    def add(self, meta: ReportMeta) -> None:
+        self.add_many([meta])
+
+    def add_many(self, metas: Iterable[ReportMeta]) -> None:
+        with self._lock:
+            conn = self._connection()
+            written = 0
+            for meta in metas:
+                self._upsert(conn, meta)
+                written += 1
+            if written:
+                self._bump(conn)
+            conn.commit()
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM reports WHERE name = ?", (name,))
+            conn.execute("DELETE FROM report_tags WHERE name = ?", (name,))
+            self._bump(conn)
+            conn.commit()
+
+    def get(self, name: str) -> Optional[ReportMeta]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM reports WHERE name = ?", (name,)
+            ).fetchone()
+        return self._meta(row) if row else None
+
+    def latest(self, query: str) -> Optional[ReportMeta]:
+        """The newest report on the same normalized query."""
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM reports WHERE query_key = ? "
+                "ORDER BY created_at DESC, name DESC LIMIT 1",
+                (normalize_report_query(query),),
+            ).fetchone()
+        return self._meta(row) if row else None
+
+    def names(self) -> Set[str]:
+        with self._lock:
+            rows = self._connection().execute("SELECT name FROM reports").fetchall()
+        return {name for (name,) in rows}
+
+    def count(self, tag: Optional[str] = None) -> int:
+        with self._lock:
+            if tag:
+                (n,) = self._connection().execute(
+                    "SELECT COUNT(*) FROM report_tags WHERE tag = ?", (tag,)
+                ).fetchone()
+            else:
+                (n,) = self._connection().execute("SELECT COUNT(*) FROM reports").fetchone()
+        return int(n)
+
+    def page(
+        self, limit: int = 20, cursor: Optional[ReportCursor] = None, tag: Optional[str] = None
+    ) -> ReportPage:
+        """Up to ``limit`` reports older than ``cursor`` (newest first when it is None)."""
+        where, params = [], []
+        prefix = "t." if tag else ""
+        if tag:
+            where.append("t.tag = ?")
+            params.append(tag)
+        if cursor is not None:
+            # Row-value comparison walks the (created_at, name) index from the cursor.
+            where.append(f"({prefix}created_at, {prefix}name) < (?, ?)")
+            params.extend(cursor)
+        if tag:
+            columns = ", ".join("r." + c.strip() for c in self._COLUMNS.split(","))
+            source = "report_tags t JOIN reports r ON r.name = t.name"
+        else:
+            columns, source = self._COLUMNS, "reports"
+        sql = f"SELECT {columns} FROM {source}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {prefix}created_at DESC, {prefix}name DESC LIMIT ?"
+        with self._lock:
+            rows = self._connection().execute(sql, (*params, limit + 1)).fetchall()
+        reports = [self._meta(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and reports:
+            next_cursor = (reports[-1].created_at, reports[-1].name)
+        return ReportPage(reports, next_cursor)
+
+    def tag_counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT tag, COUNT(*) FROM report_tags GROUP BY tag ORDER BY COUNT(*) DESC, tag"
+            ).fetchall()
+        return dict(rows)
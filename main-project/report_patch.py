@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from .source_store import SOURCE_INDEX_HEADING
+
+
+_SECTION_RE = re.compile(r"^## +(.+?)\s*#*\s*$", re.MULTILINE)
+WHATS_NEW = "What's New"
+
+
+def _heading_key(heading: str) -> str:
+    # "What's New (2024-05-01)" and "what’s new" are the same section.
+    text = re.sub(r"\(.*?\)", "", heading).replace("’", "'")
+    return " ".join(re.sub(r"[^\w']+", " ", text).lower().split())
+
+
+def split_sections(markdown: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split a report into the text before its first ``##`` heading and (heading, body) pairs."""
+    matches = list(_SECTION_RE.finditer(markdown))
+    if not matches:
+        return markdown.strip(), []
+    preamble = markdown[: matches[0].start()].strip()
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections.append((match.group(1).strip(), markdown[match.end() : end].strip()))
+    return preamble, sections
+
+
+def join_sections(preamble: str, sections: List[Tuple[str, str]]) -> str:
+    parts = [preamble] if preamble else []
+    parts.extend(f"## {heading}\n\n{body}".rstrip() for heading, body in sections)
+    return "\n\n".join(parts) + "\n"
+
+
+def outline(markdown: str, max_chars: int = 200) -> str:
+    """Section headings with the start of each section, for prompts that must not carry the whole report."""
+    preamble, sections = split_sections(markdown)
+    lines = []
+    if preamble:
+        lines.append(preamble.splitlines()[0][:max_chars])
+    for heading, body in sections:
+        if heading == SOURCE_INDEX_HEADING[3:]:
+            continue
+        first = next((line.strip() for line in body.splitlines() if line.strip()), "")
+        lines.append(f"## {heading}")
+        if first:
+            lines.append(first[:max_chars] + ("..." if len(first) > max_chars else ""))
+    return "\n".join(lines)
+
+
+def apply_patch(previous: str, patch: str, stamp: Optional[str] = None) -> str:
+    """Merge a patch-style update into ``previous``.
+
+    The patch's "What's New" section replaces any earlier one and is placed
+    after the first section. Every other patch section is appended to the
+    previous section with the same heading, or added as a new section. The
+    old source index is dropped so it can be rebuilt for all cited sources.
+    """
+    preamble, sections = split_sections(previous)
+    sections = [(h, b) for h, b in sections if h != SOURCE_INDEX_HEADING[3:]]
+    patch_preamble, patch_sections = split_sections(patch)
+    if patch_preamble and not patch_sections:
+        patch_sections = [(WHATS_NEW, patch_preamble)]
+
+    keys = [_heading_key(h) for h, _ in sections]
+    whats_new: Optional[Tuple[str, str]] = None
+    for heading, body in patch_sections:
+        key = _heading_key(heading)
+        if key == _heading_key(WHATS_NEW):
+            title = f"{WHATS_NEW} ({stamp})" if stamp else WHATS_NEW
+            whats_new = (title, body)
+        elif key in keys:
+            i = keys.index(key)
+            sections[i] = (sections[i][0], f"{sections[i][1]}\n\n{body}".strip())
+        else:
+            sections.append((heading, body))
+            keys.append(key)
+
+    if whats_new is not None:
+        old = [i for i, k in enumerate(keys) if k == _heading_key(WHATS_NEW)]
+        for i in reversed(old):
+            del sections[i]
+        sections.insert(min(1, len(sections)), whats_new)
+    return join_sections(preamble, sections)
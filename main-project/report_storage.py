@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+BLOCK_SEPARATOR = "\n\n"
+
+try:
+    import zstandard
+
+    _zstd_compressor = zstandard.ZstdCompressor(level=10)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+except ImportError:
+    # zstandard is optional; zlib is always available and almost as small on prose.
+    zstandard = None
+
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        packed, codec = _zstd_compressor.compress(data), "zstd"
+    else:
+        packed, codec = zlib.compress(data, 9), "zlib"
+    # Short paragraphs can grow once framing is added; keep those as they are.
+    if len(packed) >= len(data):
+        return "raw", data
+    return codec, packed
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "raw":
+        return data
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This report was stored with zstd; install the 'zstandard' package to read it.")
+        return _zstd_decompressor.decompress(data)
+    raise ValueError(f"Unknown block codec {codec!r}")
+
+
+def split_blocks(content: str) -> List[str]:
+    """Split a report into paragraph blocks; ``BLOCK_SEPARATOR.join`` restores it exactly."""
+    return content.split(BLOCK_SEPARATOR)
+
+
+@dataclass
+class StorageStats:
+    reports: int
+    blocks: int
+    raw_bytes: int
+    stored_bytes: int
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0
+
+
+class ReportBodyStore:
+    """Compressed, block-deduplicated report bodies in SQLite.
+
+    A report is a list of paragraph blocks addressed by content hash, so a
+    paragraph shared by several reports (a source list, a boilerplate
+    section) is stored and compressed once. Blocks are reference counted and
+    dropped with the last report that uses them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS blocks (
+                    hash TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    refs INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS bodies (
+                    name TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    blocks TEXT NOT NULL
+                );
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def put(self, name: str, content: str, created_at: Optional[float] = None) -> None:
+        blocks = split_blocks(content)
+        encoded = [block.encode("utf-8") for block in blocks]
+        hashes = [hashlib.blake2b(data, digest_size=16).hexdigest() for data in encoded]
+        with self._lock:
+            conn = self._connection()
+            self._delete(conn, name)
+            known = self._existing(conn, set(hashes))
+            for digest, data in zip(hashes, encoded):
+                if digest in known:
+                    conn.execute("UPDATE blocks SET refs = refs + 1 WHERE hash = ?", (digest,))
+                    continue
+                codec, packed = _compress(data)
+                conn.execute(
+                    "INSERT INTO blocks (hash, codec, raw_size, data, refs) VALUES (?, ?, ?, ?, 1)",
+                    (digest, codec, len(data), packed),
+                )
+                known.add(digest)
+            conn.execute(
+                "INSERT INTO bodies (name, created_at, raw_size, blocks) VALUES (?, ?, ?, ?)",
+                (name, created_at or time.time(), len(content.encode("utf-8")), ",".join(hashes)),
+            )
+            conn.commit()
+
+    @staticmethod
+    def _existing(conn: sqlite3.Connection, hashes: Set[str]) -> Set[str]:
+        if not hashes:
+            return set()
+        placeholders = ",".join("?" * len(hashes))
+        rows = conn.execute(f"SELECT hash FROM blocks WHERE hash IN ({placeholders})", list(hashes))
+        return {digest for (digest,) in rows}
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, name: str) -> bool:
+        row = conn.execute("SELECT blocks FROM bodies WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        for digest in row[0].split(","):
+            conn.execute("UPDATE blocks SET refs = refs - 1 WHERE hash = ?", (digest,))
+        conn.execute("DELETE FROM blocks WHERE refs <= 0")
+        conn.execute("DELETE FROM bodies WHERE name = ?", (name,))
+        return True
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT blocks FROM bodies WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            hashes = row[0].split(",")
+            placeholders = ",".join("?" * len(set(hashes)))
+            stored: Dict[str, Tuple[str, bytes]] = {
+                digest: (codec, data)
+                for digest, codec, data in conn.execute(
+                    f"SELECT hash, codec, data FROM blocks WHERE hash IN ({placeholders})",
+                    list(set(hashes)),
+                )
+            }
+        return BLOCK_SEPARATOR.join(_decompress(*stored[digest]).decode("utf-8") for digest in hashes)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            conn = self._connection()
+            removed = self._delete(conn, name)
+            conn.commit()
+        return removed
+
+    def names(self) -> Dict[str, float]:
+        """Stored report names with their creation time."""
+        with self._lock:
+            rows = self._connection().execute("SELECT name, created_at FROM bodies").fetchall()
+        return dict(rows)
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM bodies WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def stats(self) -> StorageStats:
+        with self._lock:
+            conn = self._connection()
+            reports, raw_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM bodies"
+            ).fetchone()
+            blocks, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blocks"
+            ).fetchone()
+        return StorageStats(reports, blocks, raw_bytes, stored_bytes)
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..config import AppConfig
+from ..tracing import span
+from .answer_cache import AnswerMatch, SemanticAnswerCache, build_embedder
+from .checkpoints import CheckpointStore
+from .report_metadata import (
+    ReportCursor,
+    ReportMeta,
+    ReportMetadataStore,
+    ReportPage,
+    extract_sources,
+    make_preview,
+    normalize_report_query,
+)
+from .report_storage import ReportBodyStore, StorageStats
+from .search_index import ReportSearchIndex, SearchHit
+from .source_store import SOURCE_INDEX_HEADING, SourceStore, cited_source_ids, render_source_index
+
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _slugify(text: str, max_length: int = 60) -> str:
+    slug = _SLUG_RE.sub("-", text.lower()).strip("-")
+    return slug[:max_length].rstrip("-") or "report"
+
+
+def extract_query(content: str, default: str) -> str:
+    if "**Query**:" not in content:
+        return default
+    return content.split("**Query**:", 1)[1].split("\n", 1)[0].strip()
+
+
+def extract_created(content: str) -> Optional[datetime]:
+    if "**Created**:" not in content:
+        return None
+    value = content.split("**Created**:", 1)[1].split("\n", 1)[0].strip()
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def extract_summary(content: str) -> str:
+    """Strip the header save_entry writes and return the report body."""
+    if content.startswith("# Technology Research Report") and "\n---\n" in content:
+        return content.split("\n---\n", 1)[1].strip()
+    return content
+
+
+class KnowledgeRepository:
+    def __init__(self, config: AppConfig):
+        self._base = Path(config.knowledge_base_dir)
+        self._base.mkdir(parents=True, exist_ok=True)
+        self._index = ReportSearchIndex(self._base / ".index" / "search.sqlite3")
+        self._index_synced = False
+        self._answers_enabled = config.semantic_cache_enabled
+        self._answers = SemanticAnswerCache(
+            self._base / ".index" / "answers.sqlite3",
+            embedder=build_embedder(config.embedding_model),
+            threshold=config.semantic_cache_threshold,
+            max_age_seconds=config.semantic_cache_max_age_hours * 3600,
+        )
+        self.checkpoints = CheckpointStore(self._base / ".index" / "checkpoints.sqlite3")
+        self._meta = ReportMetadataStore(self._base / ".index" / "reports.sqlite3")
+        self._compressed = config.report_storage == "compressed"
+        self._bodies = ReportBodyStore(self._base / ".index" / "bodies.sqlite3")
+        self.sources = SourceStore(self._base / ".index" / "sources.sqlite3")
+
+    def save_entry(
+        self,
+        query: str,
+        summary_markdown: str,
+        model: Optional[str] = None,
+        duration_s: Optional[float] = None,
+        tags: Iterable[str] = (),
+        run_id: Optional[str] = None,
+    ) -> Path:
+        created = datetime.now()
+        stem = f"{created:%Y%m%d_%H%M%S}_{_slugify(query)}"
+        path = self._base / f"{stem}.md"
+        suffix = 1
+        while self.has_report(path.name):
+            suffix += 1
+            path = self._base / f"{stem}-{suffix}.md"
+
+        content = (
+            "# Technology Research Report\n\n"
+            f"**Query**: {query}\n"
+            f"**Created**: {created.isoformat(timespec='seconds')}\n\n"
+            "---\n\n"
+            f"{summary_markdown.strip()}\n"
+        )
+        with span("repository.save_entry", bytes_written=len(content.encode("utf-8"))):
+            if self._compressed:
+                self._bodies.put(path.name, content, created.timestamp())
+            else:
+                path.write_text(content, encoding="utf-8")
+            self._meta.add(
+                ReportMeta(
+                    name=path.name,
+                    query=query,
+                    created_at=created.timestamp(),
+                    length=len(summary_markdown.strip()),
+                    sources=extract_sources(summary_markdown),
+                    model=model,
+                    duration_s=round(duration_s, 3) if duration_s is not None else None,
+                    tags=sorted({t.strip().lower() for t in tags if t.strip()}),
+                    run_id=run_id,
+                    preview=make_preview(summary_markdown),
+                )
+            )
+            self._index.add(path.name, query, content)
+            self.sources.link(path.name, cited_source_ids(summary_markdown))
+            if self._answers_enabled:
+                self._answers.add(path.name, query, created.timestamp())
+        return path
+
+    def resolve_citations(self, markdown: str) -> str:
+        """Append the title and URL of every ``[S<id>]`` source the report cites."""
+        if SOURCE_INDEX_HEADING in markdown:
+            return markdown
+        records = self.sources.get_many(cited_source_ids(markdown))
+        if not records:
+            return markdown
+        return markdown.rstrip() + "\n\n" + render_source_index(records) + "\n"
+
+    def read_report(self, name: str) -> str:
+        content = self._bodies.get(name)
+        if content is None:
+            # Reports saved as plain Markdown (REPORT_STORAGE=files or before compaction).
+            content = (self._base / name).read_text(encoding="utf-8")
+        return content
+
+    def has_report(self, name: str) -> bool:
+        return name in self._bodies or (self._base / name).exists()
+
+    def _stored_reports(self) -> Dict[str, float]:
+        """Name and creation (or modification) time of every stored report."""
+        stored = {p.name: p.stat().st_mtime for p in self._base.glob("*.md")}
+        stored.update(self._bodies.names())
+        return stored
+
+    def sync_index(self) -> int:
+        """Index reports written before the index existed or copied in by hand."""
+        on_disk = self._stored_reports()
+        indexed = self._index.names()
+        added = 0
+        for name in sorted(on_disk.keys() - indexed):
+            try:
+                content = self.read_report(name)
+            except OSError:
+                continue
+            self._index.add(name, extract_query(content, Path(name).stem), content)
+            added += 1
+        for name in indexed - on_disk.keys():
+            self._index.remove(name)
+            self._answers.remove(name)
+            self.sources.unlink(name)
+        self._sync_metadata(on_disk)
+        if self._answers_enabled:
+            known = self._answers.names()
+            self._answers.add_many(
+                (name, query, on_disk[name])
+                for name, query in self._index.documents()
+                if name not in known and name in on_disk
+            )
+        self._index_synced = True
+        return added
+
+    def _sync_metadata(self, on_disk: Dict[str, float]) -> None:
+        # Reports saved before the metadata store existed are migrated once; after
+        # that only files added or removed by hand are picked up here.
+        known = self._meta.names()
+        migrated = []
+        for name in sorted(on_disk.keys() - known):
+            try:
+                content = self.read_report(name)
+            except OSError:
+                continue
+            body = extract_summary(content)
+            created = extract_created(content)
+            migrated.append(
+                ReportMeta(
+                    name=name,
+                    query=extract_query(content, Path(name).stem),
+                    created_at=created.timestamp() if created else on_disk[name],
+                    length=len(body),
+                    sources=extract_sources(body),
+                    preview=make_preview(body),
+                )
+            )
+        self._meta.add_many(migrated)
+        for name in known - on_disk.keys():
+            self._meta.remove(name)
+
+    def saved_queries(self) -> Set[str]:
+        """Normalized queries of every report in the store."""
+        if not self._index_synced:
+            self.sync_index()
+        return {normalize_report_query(query) for _, query in self._index.documents()}
+
+    def find_similar(self, query: str) -> Optional[AnswerMatch]:
+        """Return a fresh stored report whose query is a near-duplicate of ``query``."""
+        if not self._answers_enabled:
+            return None
+        if not self._index_synced:
+            self.sync_index()
+        with span("semantic_cache.lookup") as s:
+            match = self._answers.lookup(query)
+            if s is not None:
+                s.attrs["semantic_cache_hits"] = int(match is not None)
+        if match is not None and not self.has_report(match.name):
+            self._answers.remove(match.name)
+            return None
+        return match
+
+    def search(self, text: str, limit: int = 20) -> List[SearchHit]:
+        if not self._index_synced:
+            self.sync_index()
+        return self._index.search(text, limit=limit, loader=self.read_report)
+
+    def report_count(self, tag: Optional[str] = None) -> int:
+        if not self._index_synced:
+            self.sync_index()
+        return self._meta.count(tag)
+
+    def list_reports(
+        self, limit: int = 20, cursor: Optional[ReportCursor] = None, tag: Optional[str] = None
+    ) -> ReportPage:
+        """One page of reports, newest first, from the metadata store only (bodies are not read).
+
+        Pass the returned ``next_cursor`` back to get the following page.
+        """
+        if not self._index_synced:
+            self.sync_index()
+        return self._meta.page(limit, cursor, tag)
+
+    def store_version(self) -> int:
+        """Changes whenever a report is saved, migrated or removed, by any process."""
+        if not self._index_synced:
+            self.sync_index()
+        return self._meta.version()
+
+    def latest_report(self, query: str) -> Optional[ReportMeta]:
+        """The newest saved report for the same (normalized) query, whatever its age."""
+        if not self._index_synced:
+            self.sync_index()
+        return self._meta.latest(query)
+
+    def report_meta(self, name: str) -> Optional[ReportMeta]:
+        return self._meta.get(name)
+
+    def report_tags(self) -> Dict[str, int]:
+        if not self._index_synced:
+            self.sync_index()
+        return self._meta.tag_counts()
+
+    def report_path(self, name: str) -> Path:
+        return self._base / name
+
+    def compact(self) -> int:
+        """Move plain Markdown reports into the compressed store; returns how many moved."""
+        moved = 0
+        for path in sorted(self._base.glob("*.md")):
+            try:
+                content = path.read_text(encoding="utf-8")
+                created = extract_created(content)
+                self._bodies.put(path.name, content, created.timestamp() if created else path.stat().st_mtime)
+            except OSError:
+                continue
+            if self._bodies.get(path.name) == content:
+                path.unlink()
+                moved += 1
+        return moved
+
+    def storage_stats(self) -> StorageStats:
+        """Size of the compressed store, plus any reports still kept as plain files."""
+        stats = self._bodies.stats()
+        for path in self._base.glob("*.md"):
+            size = path.stat().st_size
+            stats.reports += 1
+            stats.raw_bytes += size
+            stats.stored_bytes += size
+        return stats
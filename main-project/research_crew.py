@@ -1,7 +1,13 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, Any
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
 
 _env_backup_global = {}
 for key in ['OPENAI_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_API_KEY', 'ANTHROPIC_API_KEY']:
@@ -12,58 +18,181 @@ for key in ['OPENAI_API_KEY', 'GEMINI_API_KEY', 'GOOGLE_API_KEY', 'ANTHROPIC_API
 from crewai import Agent, Crew, Process, Task
 
 from ..config import AppConfig
-from ..knowledge.repository import KnowledgeRepository
-from ..llm import build_crewai_llm
-from ..tools.crewai_tools import build_crewai_tools
+from ..knowledge.report_metadata import ReportMeta
+from ..knowledge.report_patch import apply_patch, outline
+from ..knowledge.repository import KnowledgeRepository, extract_summary, normalize_report_query
+from ..llm import track_usage
+from ..rate_limit import RetriesExhausted
+from ..resources import config_key, shared_llm, shared_tools
+from ..tools.token_budget import run_budget, select_passages
+from ..tracing import Trace, activate, export_trace, span
 
 
-def build_research_crew(config: AppConfig, repository: KnowledgeRepository) -> Crew:
-    llm = build_crewai_llm(config)
-    tools = build_crewai_tools(config)
+TASK_NAMES = ("research", "writing")
 
-    researcher = Agent(
-        role="Technology Researcher",
+
+@dataclass
+class ResearchEvent:
+    """One step of a research run, as yielded by ``stream_research_flow``.
+
+    ``type`` is one of run_started, task_started, tool_call, agent_step,
+    llm_token, task_finished, run_finished or run_failed. The last event of
+    every run is run_finished or run_failed and carries the result dict that
+    ``run_research_flow`` returns.
+    """
+
+    type: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+_event_sink: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar(
+    "research_event_sink", default=None
+)
+_bus_lock = threading.Lock()
+_bus_handlers_registered: Optional[bool] = None
+
+
+def _publish(kind: str, data: Dict[str, Any]) -> None:
+    sink = _event_sink.get()
+    if sink is not None:
+        sink(kind, data)
+
+
+def _register_bus_handlers() -> bool:
+    """Forward CrewAI token and tool events to the run that emitted them.
+
+    Handlers are registered once per process; each run installs its own sink
+    in a context variable, which CrewAI propagates to its handler threads.
+    """
+    global _bus_handlers_registered
+    with _bus_lock:
+        if _bus_handlers_registered is not None:
+            return _bus_handlers_registered
+        try:
+            from crewai.events import LLMStreamChunkEvent, ToolUsageStartedEvent, crewai_event_bus
+        except ImportError:
+            try:
+                from crewai.utilities.events import (
+                    LLMStreamChunkEvent,
+                    ToolUsageStartedEvent,
+                    crewai_event_bus,
+                )
+            except ImportError:
+                _bus_handlers_registered = False
+                return False
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _on_chunk(source: Any, event: Any) -> None:
+            _publish("llm_token", {"text": event.chunk})
+
+        @crewai_event_bus.on(ToolUsageStartedEvent)
+        def _on_tool(source: Any, event: Any) -> None:
+            _publish("tool_call", {"tool": event.tool_name, "input": event.tool_args})
+
+        _bus_handlers_registered = True
+        return True
+
+
+WRITING_TASK_DESCRIPTION = (
+    "Take the research notes produced by the Technology Researcher and craft a final "
+    "markdown report tailored to a technology audience. The report should:\n"
+    "- Start with a brief executive summary.\n"
+    "- Include clear headings and bullet points.\n"
+    "- Highlight the most important insights, data points, and trade-offs.\n"
+    "- Suggest practical actions or next steps where appropriate.\n"
+    "- Cite web sources inline by their id from the research notes, e.g. [S12]. Do not "
+    "write out a source list; titles and URLs of the cited ids are appended automatically.\n"
+)
+
+
+UPDATE_TASK_DESCRIPTION = (
+    "Update an existing markdown report. You are given the report's outline (its section "
+    "headings and their first lines) and only the sources that are new since it was "
+    "written. Write a patch, not a new report:\n"
+    "- Start with a '## What's New' section summarising what changed, citing sources by id, "
+    "e.g. [S12].\n"
+    "- For each existing section the new information affects, add a '## ' block with the "
+    "section's exact heading containing only the bullet points to add to it.\n"
+    "- Add a new '## ' section only for a topic the outline does not cover.\n"
+    "- Do not repeat unchanged content and do not write a source list.\n"
+)
+
+
+def _build_writer(llm: Any) -> Agent:
+    return Agent(
+        role="Research Synthesizer & Writer",
         goal=(
-            "Conduct deep, multi-source research on technology topics, "
-            "using the web and Kaggle datasets to gather accurate and current information."
+            "Transform raw research notes into a concise, well-structured markdown "
+            "report with clear sections, bullet points, and practical insights."
         ),
         backstory=(
-            "You are an experienced technology analyst. You know how to combine "
-            "documentation, credible blogs, Medium articles, Kaggle datasets, and news "
-            "to form a nuanced understanding of modern tech trends."
+            "You are a senior technical writer who specializes in summarizing complex "
+            "technology research into clear, actionable insights for engineers and "
+            "decision makers."
         ),
         llm=llm,
-        tools=tools,
+        tools=[],
         verbose=True,
         allow_delegation=False,
     )
 
-    writer = Agent(
-        role="Research Synthesizer & Writer",
+
+def _build_writing_task(writer: Agent, research_notes: Optional[str] = None) -> Task:
+    description = WRITING_TASK_DESCRIPTION
+    if research_notes is not None:
+        description += "\nResearch notes:\n\n" + research_notes
+    return Task(
+        description=description,
+        expected_output=(
+            "A polished markdown report ready to be saved in the knowledge repository."
+        ),
+        agent=writer,
+    )
+
+
+def build_research_crew(
+    config: AppConfig,
+    repository: KnowledgeRepository,
+    stream: bool = False,
+    step_callback: Optional[Callable[[Any], None]] = None,
+    task_callback: Optional[Callable[[Any], None]] = None,
+) -> Crew:
+    llm = shared_llm(config, stream=stream)
+    tools = shared_tools(config)
+
+    researcher = Agent(
+        role="Technology Researcher",
         goal=(
-            "Transform raw research notes into a concise, well-structured markdown "
-            "report with clear sections, bullet points, and practical insights."
+            "Conduct deep, multi-source research on technology topics, "
+            "using the web and Kaggle datasets to gather accurate and current information."
         ),
         backstory=(
-            "You are a senior technical writer who specializes in summarizing complex "
-            "technology research into clear, actionable insights for engineers and "
-            "decision makers."
+            "You are an experienced technology analyst. You know how to combine "
+            "documentation, credible blogs, Medium articles, Kaggle datasets, and news "
+            "to form a nuanced understanding of modern tech trends."
         ),
         llm=llm,
-        tools=[],
+        tools=tools,
         verbose=True,
         allow_delegation=False,
     )
 
+    writer = _build_writer(llm)
+
     research_task = Task(
         description=(
             "Given the user's technology research query:\n"
             "1. Use the web_research tool to gather current information from multiple sources, "
-            "   including docs, blogs, Medium articles, and news.\n"
+            "   including docs, blogs, Medium articles, and news. Pass related searches as "
+            "   sub_queries in a single call so they run in parallel.\n"
             "2. Use the kaggle_datasets_overview tool to inspect available Kaggle datasets that "
-            "   might provide quantitative or contextual backing.\n"
+            "   might provide quantitative or contextual backing. When a dataset is relevant, use "
+            "   kaggle_aggregate to compute the exact figures you need (counts, averages, trends "
+            "   over time, top categories) rather than reading them off sample rows.\n"
             "3. Produce detailed research notes that include references to the sources you used, "
-            "   key findings, trade-offs, and any important metrics or data.\n"
+            "   key findings, trade-offs, and any important metrics or data. Refer to web sources "
+            "   by the id shown in the search results, e.g. [S12], instead of repeating their URLs.\n"
         ),
         expected_output=(
             "Structured research notes in markdown with sections for: Sources, Key Findings, "
@@ -72,81 +201,576 @@ def build_research_crew(config: AppConfig, repository: KnowledgeRepository) -> C
         agent=researcher,
     )
 
-    writing_task = Task(
-        description=(
-            "Take the research notes produced by the Technology Researcher and craft a final "
-            "markdown report tailored to a technology audience. The report should:\n"
-            "- Start with a brief executive summary.\n"
-            "- Include clear headings and bullet points.\n"
-            "- Highlight the most important insights, data points, and trade-offs.\n"
-            "- Suggest practical actions or next steps where appropriate.\n"
-        ),
-        expected_output=(
-            "A polished markdown report ready to be saved in the knowledge repository."
-        ),
-        agent=writer,
-    )
+    writing_task = _build_writing_task(writer)
 
     crew = Crew(
         agents=[researcher, writer],
         tasks=[research_task, writing_task],
         process=Process.sequential,
         verbose=True,
+        step_callback=step_callback,
+        task_callback=task_callback,
     )
 
     return crew
 
 
-def run_research_flow(config: AppConfig, query: str, repository: KnowledgeRepository) -> Dict[str, Any]:
+def build_writer_crew(
+    config: AppConfig,
+    research_notes: str,
+    stream: bool = False,
+    step_callback: Optional[Callable[[Any], None]] = None,
+    task_callback: Optional[Callable[[Any], None]] = None,
+) -> Crew:
+    """A crew that only runs the writing task on saved research notes."""
+    writer = _build_writer(shared_llm(config, stream=stream))
+    return Crew(
+        agents=[writer],
+        tasks=[_build_writing_task(writer, research_notes)],
+        process=Process.sequential,
+        verbose=True,
+        step_callback=step_callback,
+        task_callback=task_callback,
+    )
+
+
+def build_update_crew(
+    config: AppConfig,
+    query: str,
+    previous: ReportMeta,
+    report_outline: str,
+    delta_notes: str,
+    stream: bool = False,
+    step_callback: Optional[Callable[[Any], None]] = None,
+    task_callback: Optional[Callable[[Any], None]] = None,
+) -> Crew:
+    """A writer-only crew that turns new sources into a patch for an earlier report."""
+    writer = _build_writer(shared_llm(config, stream=stream))
+    written = time.strftime("%Y-%m-%d", time.localtime(previous.created_at))
+    description = (
+        UPDATE_TASK_DESCRIPTION
+        + f"\nQuery: {query}\nReport written: {written}\n\nOutline:\n\n{report_outline}"
+        + f"\n\nNew sources:\n\n{delta_notes}"
+    )
+    task = Task(
+        description=description,
+        expected_output="A markdown patch: a '## What's New' section plus additions to affected sections.",
+        agent=writer,
+    )
+    return Crew(
+        agents=[writer],
+        tasks=[task],
+        process=Process.sequential,
+        verbose=True,
+        step_callback=step_callback,
+        task_callback=task_callback,
+    )
+
+
+def _time_range(age_seconds: float) -> str:
+    """Smallest search time range that still covers everything since the last report."""
+    for name, limit in (("day", 86400), ("week", 7 * 86400), ("month", 31 * 86400)):
+        if age_seconds <= limit:
+            return name
+    return "year"
+
+
+def _web_research_tool(config: AppConfig) -> Any:
+    return next(tool for tool in shared_tools(config) if tool.name == "web_research")
+
+
+def _delta_notes(query: str, deltas: Sequence[Tuple[Any, Any]], max_tokens: int) -> str:
+    selected = select_passages(query, [source.content for source, _ in deltas], max_tokens)
+    lines = []
+    for i, (source, record) in enumerate(deltas):
+        lines.append(f"[{record.label}] {source.title}")
+        lines.append(f"   - URL: {source.url}")
+        passages = selected.by_source.get(i)
+        if passages:
+            lines.append(f"   - Snippet: {' … '.join(passages)}")
+    return "\n".join(lines)
+
+
+class CrewPool:
+    """Reuses built crews across runs.
+
+    A crew is handed to one run at a time; callbacks are swapped in on
+    checkout. Crews whose run raised are dropped rather than returned.
+    """
+
+    def __init__(self):
+        self._idle: Dict[Hashable, List[Crew]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(
+        self,
+        config: AppConfig,
+        repository: KnowledgeRepository,
+        stream: bool = False,
+        step_callback: Optional[Callable[[Any], None]] = None,
+        task_callback: Optional[Callable[[Any], None]] = None,
+    ) -> Iterator[Crew]:
+        key = (config_key(config), stream)
+        with self._lock:
+            idle = self._idle.get(key)
+            crew = idle.pop() if idle else None
+        if crew is None:
+            crew = build_research_crew(config, repository, stream=stream)
+        crew.step_callback = step_callback
+        crew.task_callback = task_callback
+        yield crew
+        # Only reached when the run did not raise.
+        crew.step_callback = None
+        crew.task_callback = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < config.crew_pool_size:
+                idle.append(crew)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+
+
+crew_pool = CrewPool()
+
+
+def _finish_trace(trace: Trace, config: AppConfig) -> Dict[str, Any]:
+    trace.finish()
     try:
-        crew = build_research_crew(config, repository)
-        result = crew.kickoff(inputs={"topic": query})
-        final_report = str(result)
-        saved_path = repository.save_entry(query=query, summary_markdown=final_report)
-        return {"report_path": str(saved_path), "report": final_report, "success": True}
-    except Exception as e:
-        error_msg = str(e)
-
-        if "GROQ_API_KEY" in error_msg or "Error importing" in error_msg:
-            helpful_msg = (
-                "## ⚠️ Groq API Key Error\n\n"
-                "Your Groq API key is missing or invalid.\n\n"
-                "### 🟢 Fix Steps:\n\n"
-                "1. **Get FREE Groq key**: https://console.groq.com/keys\n"
-                "2. **Sign up** (free, no credit card needed)\n"
-                "3. **Create API key** (starts with `gsk_...`)\n"
-                "4. **Update `.env` file**:\n"
-                "   ```env\n"
-                "   GROQ_API_KEY=gsk_your_actual_key_here\n"
-                "   ```\n"
-                "5. **Restart** Streamlit\n"
-                "6. **Done!** 🎉\n\n"
-                f"**Technical Error**: {error_msg[:500]}"
+        path = export_trace(trace, config)
+    except OSError:
+        path = None
+    return dict(trace.summary(), trace_file=path)
+
+
+def _record_token_usage(trace: Trace, usage: Dict[str, int]) -> None:
+    # ``result.token_usage`` is no use here: it sums the shared LLM's lifetime
+    # totals once per agent. ``track_usage`` counts only this run's calls.
+    for name, value in usage.items():
+        trace.attrs[name] = trace.attrs.get(name, 0) + value
+
+
+@contextmanager
+def _counted_kickoff(trace: Trace) -> Iterator[None]:
+    # Record usage even when the kickoff fails; those tokens were spent too.
+    with span("crew.kickoff"), track_usage() as usage:
+        try:
+            yield
+        finally:
+            _record_token_usage(trace, usage)
+
+
+def _resolve_checkpoint(
+    config: AppConfig,
+    query: str,
+    repository: KnowledgeRepository,
+    force_refresh: bool,
+    resume_run_id: Optional[str],
+    rewrite_from: Optional[str],
+    previous: Optional[ReportMeta] = None,
+) -> Tuple[str, Dict[str, str]]:
+    """Pick the run to continue and the task outputs it already has.
+
+    A refresh of ``previous`` always starts its own ``update`` run, which
+    normal runs of the query never resume.
+    """
+    checkpoints = repository.checkpoints
+    query_key = normalize_report_query(query)
+    if rewrite_from:
+        source = checkpoints.get_run(rewrite_from)
+        if source is not None and source.kind == "update":
+            raise ValueError(
+                f"Run {rewrite_from} refreshed an earlier report; use --resume-run {rewrite_from} to continue it."
             )
-            return {
-                "success": False,
-                "error": helpful_msg,
-                "error_type": "api_key_error"
-            }
-
-        elif "429" in error_msg or "quota" in error_msg.lower() or "RESOURCE_EXHAUSTED" in error_msg:
-            helpful_msg = (
-                "## ⚠️ API Quota Error\n\n"
-                "You've exceeded your Groq API quota (free tier limits).\n\n"
-                "### 🟢 Solutions:\n\n"
-                "1. **Wait a few minutes** and try again (rate limits reset)\n"
-                "2. **Check your usage**: https://console.groq.com/\n"
-                "3. **Upgrade to paid tier** if needed: https://console.groq.com/\n\n"
-                f"**Technical Error**: {error_msg[:500]}"
+        notes = checkpoints.outputs(rewrite_from).get("research")
+        if notes is None:
+            raise ValueError(f"Run {rewrite_from} has no saved research notes to rewrite from.")
+        run_id = checkpoints.start_run(query, query_key, parent_run_id=rewrite_from)
+        checkpoints.save_task(run_id, "research", notes)
+        return run_id, {"research": notes}
+    if resume_run_id:
+        if checkpoints.get_run(resume_run_id) is None:
+            raise ValueError(f"No checkpointed run with id {resume_run_id}.")
+        return resume_run_id, checkpoints.outputs(resume_run_id)
+    if previous is not None:
+        return checkpoints.start_run(query, query_key, kind="update", base_report=previous.name), {}
+    if not force_refresh and config.checkpoint_max_age_hours:
+        run = checkpoints.latest_unfinished(query_key, config.checkpoint_max_age_hours * 3600)
+        if run is not None:
+            return run.run_id, checkpoints.outputs(run.run_id)
+    return checkpoints.start_run(query, query_key), {}
+
+
+def stream_research_flow(
+    config: AppConfig,
+    query: str,
+    repository: KnowledgeRepository,
+    force_refresh: bool = False,
+    resume_run_id: Optional[str] = None,
+    rewrite_from: Optional[str] = None,
+    writer_config: Optional[AppConfig] = None,
+    tags: Sequence[str] = (),
+    update: bool = False,
+) -> Iterator[ResearchEvent]:
+    """Run the research crew and yield ResearchEvents as they happen.
+
+    The crew runs on a background thread; abandoning the iterator does not
+    cancel it, the report is still saved when the run completes.
+
+    Each finished task is checkpointed. Unless ``force_refresh`` is set, a
+    recent failed or interrupted run for the same query is resumed after its
+    last completed task. ``rewrite_from`` re-runs only the writer on the
+    research notes of an earlier run, optionally with ``writer_config``.
+    ``tags`` are stored with the saved report's metadata.
+
+    With ``update`` the newest report for the same query is refreshed instead:
+    the web is searched (without the research agent) for the period since it
+    was written, and only sources first seen since then that it does not cite
+    go to the writer, whose patch is merged into the earlier report. The
+    search results are recorded in the source store only once the run has
+    succeeded, so a failed refresh finds the same sources again. If nothing
+    is new, the
+    earlier report is returned as is. Without an earlier report this is a
+    normal run. Resuming a failed update run continues that refresh.
+    """
+    started = time.perf_counter()
+    yield ResearchEvent("run_started", {"query": query})
+    trace = Trace("research_run", query=query)
+
+    previous: Optional[ReportMeta] = None
+    try:
+        if resume_run_id:
+            run = repository.checkpoints.get_run(resume_run_id)
+            if run is not None and run.kind == "update":
+                previous = repository.report_meta(run.base_report or "")
+                if previous is None:
+                    raise ValueError(f"Report {run.base_report} refreshed by run {resume_run_id} no longer exists.")
+        elif update and not rewrite_from:
+            previous = repository.latest_report(query)
+    except Exception as exc:
+        yield ResearchEvent(
+            "run_failed", dict(describe_research_error(exc), trace=_finish_trace(trace, config))
+        )
+        return
+    if previous is not None:
+        trace.attrs["updates"] = previous.name
+
+    if not (force_refresh or resume_run_id or rewrite_from or update):
+        try:
+            with activate(trace):
+                match = repository.find_similar(query)
+        except Exception as exc:
+            yield ResearchEvent(
+                "run_failed", dict(describe_research_error(exc), trace=_finish_trace(trace, config))
+            )
+            return
+        if match is not None:
+            yield ResearchEvent(
+                "run_finished",
+                {
+                    "report_path": str(repository.report_path(match.name)),
+                    "report": extract_summary(repository.read_report(match.name)),
+                    "success": True,
+                    "cached": True,
+                    "cached_query": match.query,
+                    "similarity": match.similarity,
+                    "trace": _finish_trace(trace, config),
+                },
+            )
+            return
+
+    checkpoints = repository.checkpoints
+    try:
+        run_id, restored = _resolve_checkpoint(
+            config, query, repository, force_refresh, resume_run_id, rewrite_from, previous
+        )
+    except Exception as exc:
+        yield ResearchEvent(
+            "run_failed", dict(describe_research_error(exc), trace=_finish_trace(trace, config))
+        )
+        return
+    trace.attrs["run_id"] = run_id
+
+    # Tasks run in order, so the restored ones are always a prefix of TASK_NAMES.
+    done = 0
+    while done < len(TASK_NAMES) and TASK_NAMES[done] in restored:
+        name = TASK_NAMES[done]
+        yield ResearchEvent(
+            "task_finished",
+            {"task": name, "output": restored[name], "restored": True, "run_id": run_id},
+        )
+        done += 1
+
+    events: "queue.Queue[Optional[ResearchEvent]]" = queue.Queue()
+    current = {"index": done, "started": time.time()}
+
+    def emit(kind: str, data: Dict[str, Any]) -> None:
+        data.setdefault("task", TASK_NAMES[min(current["index"], len(TASK_NAMES) - 1)])
+        events.put(ResearchEvent(kind, data))
+
+    bus_available = _register_bus_handlers()
+
+    def on_step(step: Any) -> None:
+        if not bus_available and getattr(step, "tool", None):
+            emit("tool_call", {"tool": step.tool, "input": getattr(step, "tool_input", "")})
+        thought = getattr(step, "thought", "")
+        if thought:
+            emit("agent_step", {"thought": thought})
+
+    def on_task(output: Any) -> None:
+        now = time.time()
+        name = TASK_NAMES[min(current["index"], len(TASK_NAMES) - 1)]
+        trace.add_span(f"task.{name}", current["started"], now - current["started"])
+        current["started"] = now
+        raw = getattr(output, "raw", str(output))
+        checkpoints.save_task(run_id, name, raw)
+        emit("task_finished", {"agent": getattr(output, "agent", ""), "output": raw})
+        current["index"] += 1
+        if current["index"] < len(TASK_NAMES):
+            emit("task_started", {})
+
+    def kickoff(budget: Any) -> str:
+        if done == len(TASK_NAMES):
+            # Only saving the report failed last time.
+            return restored[TASK_NAMES[-1]]
+        emit("task_started", {})
+        current["started"] = time.time()
+        if done:
+            crew = build_writer_crew(
+                writer_config or config,
+                restored["research"],
+                stream=bus_available,
+                step_callback=on_step,
+                task_callback=on_task,
             )
-            return {
-                "success": False,
-                "error": helpful_msg,
-                "error_type": "quota_error"
-            }
+            with _counted_kickoff(trace):
+                # No inputs: the notes are embedded verbatim and must not be templated.
+                result = crew.kickoff()
         else:
-            return {
-                "success": False,
-                "error": f"An error occurred: {error_msg}",
-                "error_type": "general_error"
-            }
+            with crew_pool.checkout(
+                config,
+                repository,
+                stream=bus_available,
+                step_callback=on_step,
+                task_callback=on_task,
+            ) as crew:
+                with _counted_kickoff(trace):
+                    result = crew.kickoff(inputs={"topic": query})
+        trace.attrs["tool_output_tokens"] = budget.used
+        return str(result)
+
+    # Search results of the refresh, observed once its report is saved.
+    refreshed: List[Tuple[str, str, str]] = []
+
+    def collect_delta_notes() -> Optional[str]:
+        """Notes on the sources that are new since the previous report; None when there are none."""
+        cited = {record.id for record in repository.sources.for_report(previous.name)}
+        with span("refresh.collect_sources") as s:
+            found = _web_research_tool(config).collect_sources(
+                query, _time_range(time.time() - previous.created_at)
+            )
+            refreshed.extend((source.url, source.title, source.content) for source, _ in found)
+            deltas = [
+                (source, record)
+                for source, record in found
+                if record.id not in cited and record.first_seen >= previous.created_at
+            ]
+            if s is not None:
+                s.attrs.update(sources=len(found), new_sources=len(deltas))
+        if not deltas:
+            return None
+        return _delta_notes(query, deltas, config.tool_call_token_budget)
+
+    def refresh_previous() -> Optional[str]:
+        """Patch the previous report with what is new since; None when nothing is."""
+        previous_report = extract_summary(repository.read_report(previous.name))
+        if done == len(TASK_NAMES):
+            # Only saving the patched report failed last time.
+            patch = restored[TASK_NAMES[-1]]
+        else:
+            emit("task_started", {})
+            current["started"] = time.time()
+            if done:
+                notes = restored["research"]
+            else:
+                notes = collect_delta_notes()
+                if notes is None:
+                    emit("task_finished", {"output": "No new sources since the last report."})
+                    return None
+                on_task(notes)
+            crew = build_update_crew(
+                writer_config or config,
+                query,
+                previous,
+                outline(previous_report),
+                notes,
+                stream=bus_available,
+                step_callback=on_step,
+                task_callback=on_task,
+            )
+            with _counted_kickoff(trace):
+                patch = str(crew.kickoff())
+        stamp = time.strftime("%Y-%m-%d")
+        return apply_patch(previous_report, patch, stamp=stamp)
+
+    def worker() -> None:
+        _event_sink.set(emit)
+        try:
+            with activate(trace), run_budget(config) as budget:
+                if previous is not None:
+                    body = refresh_previous()
+                    if body is None:
+                        repository.sources.observe(refreshed)
+                        checkpoints.finish(run_id, "completed", report_name=previous.name)
+                        events.put(
+                            ResearchEvent(
+                                "run_finished",
+                                {
+                                    "report_path": str(repository.report_path(previous.name)),
+                                    "report": extract_summary(repository.read_report(previous.name)),
+                                    "success": True,
+                                    "cached": False,
+                                    "unchanged": True,
+                                    "updated_from": previous.name,
+                                    "run_id": run_id,
+                                    "trace": _finish_trace(trace, config),
+                                },
+                            )
+                        )
+                        return
+                else:
+                    body = kickoff(budget)
+                final_report = repository.resolve_citations(body)
+                saved_path = repository.save_entry(
+                    query=query,
+                    summary_markdown=final_report,
+                    model=(writer_config or config).groq_model,
+                    duration_s=time.perf_counter() - started,
+                    tags=list(dict.fromkeys([*(previous.tags if previous else ()), *tags])),
+                    run_id=run_id,
+                )
+                if refreshed:
+                    repository.sources.observe(refreshed)
+            checkpoints.finish(run_id, "completed", report_name=saved_path.name)
+            events.put(
+                ResearchEvent(
+                    "run_finished",
+                    {
+                        "report_path": str(saved_path),
+                        "report": final_report,
+                        "success": True,
+                        "cached": False,
+                        "run_id": run_id,
+                        "updated_from": previous.name if previous else None,
+                        "resumed_tasks": list(TASK_NAMES[:done]),
+                        "trace": _finish_trace(trace, config),
+                    },
+                )
+            )
+        except Exception as exc:
+            try:
+                checkpoints.finish(run_id, "failed", error=str(exc)[:1000])
+            except Exception:
+                pass
+            events.put(
+                ResearchEvent(
+                    "run_failed",
+                    dict(
+                        describe_research_error(exc),
+                        run_id=run_id,
+                        trace=_finish_trace(trace, config),
+                    ),
+                )
+            )
+        finally:
+            events.put(None)
+
+    threading.Thread(target=worker, name="research-crew", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        yield event
+
+
+def run_research_flow(
+    config: AppConfig,
+    query: str,
+    repository: KnowledgeRepository,
+    force_refresh: bool = False,
+    resume_run_id: Optional[str] = None,
+    rewrite_from: Optional[str] = None,
+    writer_config: Optional[AppConfig] = None,
+    tags: Sequence[str] = (),
+    update: bool = False,
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for event in stream_research_flow(
+        config,
+        query,
+        repository,
+        force_refresh=force_refresh,
+        resume_run_id=resume_run_id,
+        rewrite_from=rewrite_from,
+        writer_config=writer_config,
+        tags=tags,
+        update=update,
+    ):
+        if event.type in ("run_finished", "run_failed"):
+            result = event.data
+    return result
+
+
+def describe_research_error(e: Exception) -> Dict[str, Any]:
+    error_msg = str(e)
+
+    if "GROQ_API_KEY" in error_msg or "Error importing" in error_msg:
+        helpful_msg = (
+            "## ⚠️ Groq API Key Error\n\n"
+            "Your Groq API key is missing or invalid.\n\n"
+            "### 🟢 Fix Steps:\n\n"
+            "1. **Get FREE Groq key**: https://console.groq.com/keys\n"
+            "2. **Sign up** (free, no credit card needed)\n"
+            "3. **Create API key** (starts with `gsk_...`)\n"
+            "4. **Update `.env` file**:\n"
+            "   ```env\n"
+            "   GROQ_API_KEY=gsk_your_actual_key_here\n"
+            "   ```\n"
+            "5. **Restart** Streamlit\n"
+            "6. **Done!** 🎉\n\n"
+            f"**Technical Error**: {error_msg[:500]}"
+        )
+        return {
+            "success": False,
+            "error": helpful_msg,
+            "error_type": "api_key_error"
+        }
+
+    elif (
+        isinstance(e, RetriesExhausted)
+        or "429" in error_msg
+        or "quota" in error_msg.lower()
+        or "RESOURCE_EXHAUSTED" in error_msg
+    ):
+        helpful_msg = (
+            "## ⚠️ API Quota Error\n\n"
+            "You've exceeded your Groq API quota (free tier limits).\n\n"
+            "### 🟢 Solutions:\n\n"
+            "1. **Wait a few minutes** and try again (rate limits reset)\n"
+            "2. **Check your usage**: https://console.groq.com/\n"
+            "3. **Upgrade to paid tier** if needed: https://console.groq.com/\n\n"
+            f"**Technical Error**: {error_msg[:500]}"
+        )
+        return {
+            "success": False,
+            "error": helpful_msg,
+            "error_type": "quota_error"
+        }
+    else:
+        return {
+            "success": False,
+            "error": f"An error occurred: {error_msg}",
+            "error_type": "general_error"
+        }
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import dataclasses
+import importlib
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple, TypeVar
+
+from .config import AppConfig
+from .knowledge.repository import KnowledgeRepository
+
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_instances: Dict[Tuple[str, Hashable], Any] = {}
+
+# Modules only the research path needs; CrewAI alone takes seconds to import.
+RESEARCH_MODULES = (".agents.research_crew", ".llm", ".tools.crewai_tools")
+
+
+def config_key(config: AppConfig) -> Tuple[Any, ...]:
+    return dataclasses.astuple(config)
+
+
+def _shared(kind: str, key: Hashable, factory: Callable[[], T]) -> T:
+    # Build outside the lock so a slow factory does not block other kinds;
+    # if two threads race, the first instance stored wins.
+    with _lock:
+        found = _instances.get((kind, key))
+    if found is not None:
+        return found
+    created = factory()
+    with _lock:
+        return _instances.setdefault((kind, key), created)
+
+
+def shared_llm(config: AppConfig, stream: bool = False) -> Any:
+    from .llm import build_crewai_llm
+
+    return _shared("llm", (config_key(config), stream), lambda: build_crewai_llm(config, stream=stream))
+
+
+def shared_tools(config: AppConfig) -> List[Any]:
+    from .tools.crewai_tools import build_crewai_tools
+
+    return _shared("tools", config_key(config), lambda: build_crewai_tools(config))
+
+
+def shared_repository(config: AppConfig) -> KnowledgeRepository:
+    return _shared("repository", config_key(config), lambda: KnowledgeRepository(config))
+
+
+def prewarm() -> threading.Thread:
+    """Import the research path in a background thread so the first run does not pay for it.
+
+    A research call made while this is still running simply waits on Python's
+    import lock for the module being loaded.
+    """
+
+    def load() -> None:
+        for module in RESEARCH_MODULES:
+            importlib.import_module(module, __package__)
+
+    thread = threading.Thread(target=load, name="prewarm-imports", daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_shared_resources() -> None:
+    with _lock:
+        _instances.clear()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Protocol
+
+from ..config import AppConfig
+
+
+class SearchBackend(Protocol):
+    name: str
+
+    def search(
+        self, query: str, max_results: int, include_answer: bool, time_range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        ...
+
+
+class TavilySearchBackend:
+    """Tavily client kept for the life of the process.
+
+    Requests go through one ``requests.Session`` whose connection pool is
+    sized for the parallel fan-out, so keep-alive connections are reused.
+    """
+
+    name = "tavily"
+
+    def __init__(self, api_key: str, pool_size: int = 8, base_url: Optional[str] = None):
+        self._api_key = api_key
+        self._pool_size = pool_size
+        self._base_url = base_url
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from tavily import TavilyClient
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                kwargs: Dict[str, Any] = {"api_key": self._api_key}
+                if self._base_url:
+                    kwargs["api_base_url"] = self._base_url
+                # ``session`` and ``api_base_url`` are both accepted since tavily-python 0.8.0.
+                self._client = TavilyClient(session=session, **kwargs)
+            return self._client
+
+    def search(
+        self, query: str, max_results: int, include_answer: bool, time_range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        client = self._get_client()
+        kwargs: Dict[str, Any] = {}
+        if time_range:
+            # day | week | month | year, counted back from now.
+            kwargs["time_range"] = time_range
+        return client.search(
+            query=query,
+            max_results=max_results,
+            include_answer=include_answer,
+            include_raw_content=False,
+            **kwargs,
+        )
+
+
+class StaticSearchBackend:
+    """Offline stand-in for Tavily that serves canned responses.
+
+    Responses are looked up by exact query first and fall back to a
+    deterministic synthetic result set, so runs are reproducible without keys.
+    """
+
+    name = "static"
+
+    def __init__(self, responses: Optional[Dict[str, Dict[str, Any]]] = None):
+        self._responses = dict(responses or {})
+        self.calls: List[str] = []
+
+    @classmethod
+    def from_file(cls, path: str) -> "StaticSearchBackend":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def search(
+        self, query: str, max_results: int, include_answer: bool, time_range: Optional[str] = None
+    ) -> Dict[str, Any]:
+        self.calls.append(query)
+        if query in self._responses:
+            data = dict(self._responses[query])
+            data["results"] = list(data.get("results") or [])[:max_results]
+            if not include_answer:
+                data.pop("answer", None)
+            return data
+
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:8]
+        results = [
+            {
+                "title": f"{query} - reference {i}",
+                "url": f"https://example.org/{digest}/{i}",
+                "content": f"Offline placeholder content {i} for '{query}'.",
+                "score": round(1.0 - i / (max_results + 1), 3),
+            }
+            for i in range(1, max_results + 1)
+        ]
+        data: Dict[str, Any] = {"query": query, "results": results}
+        if include_answer:
+            data["answer"] = f"Offline summary for '{query}'."
+        return data
+
+
+def build_search_backend(config: AppConfig) -> Optional[SearchBackend]:
+    """Return the configured backend, or None when Tavily has no API key."""
+    if config.search_fixtures:
+        return StaticSearchBackend.from_file(config.search_fixtures)
+    if not config.tavily_api_key:
+        return None
+    return TavilySearchBackend(
+        config.tavily_api_key,
+        pool_size=max(2, config.search_max_workers * 2),
+        base_url=config.tavily_base_url,
+    )
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from ..config import AppConfig
+
+
+_PUNCT_RE = re.compile(r"[^\w\s\-+#./]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    # Keep characters that matter in tech names (c++, c#, node.js) and drop the rest.
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip(" .")
+
+
+def search_cache_key(query: str, **params: Any) -> str:
+    payload = json.dumps({"query": normalize_query(query), **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SearchCache:
+    """SQLite-backed, content-addressed cache for search responses.
+
+    Entries expire after ``ttl_seconds``; once the stored payload exceeds
+    ``max_bytes`` the least recently used entries are evicted. ``mode`` is
+    ``on`` (read and write), ``refresh`` (write only) or ``off``.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int, mode: str = "on"):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " payload BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @property
+    def readable(self) -> bool:
+        return self.mode == "on"
+
+    @property
+    def writable(self) -> bool:
+        return self.mode in ("on", "refresh")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.readable:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT created_at, payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            created_at, payload = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.commit()
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.stats.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.writable:
+            return
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, created_at, accessed_at, size, payload)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(payload), payload),
+            )
+            self.stats.writes += 1
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats.evictions += 1
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            (total,) = self._connection().execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return int(total)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+
+def build_search_cache(config: AppConfig) -> SearchCache:
+    return SearchCache(
+        path=os.path.join(config.cache_dir, "search_cache.sqlite3"),
+        ttl_seconds=config.search_cache_ttl_seconds,
+        max_bytes=config.search_cache_max_bytes,
+        mode=config.search_cache_mode,
+    )
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .search_cache import normalize_query
+
+
+_VERSUS_RE = re.compile(r"\s+(?:vs\.?|versus)\s+", re.IGNORECASE)
+_SPLIT_RE = re.compile(r"\s+(?:vs\.?|versus|and|or)\s+|\s*[,;]\s*", re.IGNORECASE)
+_COMPARE_PREFIX_RE = re.compile(
+    r"^(?:compare|comparing|comparison of|difference between|differences between)\s+",
+    re.IGNORECASE,
+)
+# Exact names only: a prefix such as "ref" would also drop reference= or refresh=.
+_TRACKING_PARAMS = {"ref", "fbclid", "gclid"}
+_TRACKING_PREFIXES = ("utm_",)
+RRF_K = 60
+
+
+def decompose_query(query: str, max_subqueries: int = 4) -> List[str]:
+    """Split comparisons ("A vs B", "compare A, B and C") into one search each.
+
+    The full query always comes first. Anything that is not phrased as a
+    comparison is returned unchanged so it still costs exactly one search.
+    """
+    body = query.strip()
+    if not (_VERSUS_RE.search(body) or _COMPARE_PREFIX_RE.match(body)):
+        return [query]
+    body = _COMPARE_PREFIX_RE.sub("", body)
+    parts = [p.strip(" ?.!") for p in _SPLIT_RE.split(body)]
+    parts = [p for p in parts if len(p) >= 2]
+    if len(parts) < 2:
+        return [query]
+    return dedupe_queries([query] + parts)[:max_subqueries]
+
+
+def dedupe_queries(queries: Sequence[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for q in queries:
+        key = normalize_query(q)
+        if q.strip() and key not in seen:
+            seen.add(key)
+            unique.append(q.strip())
+    return unique
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in _TRACKING_PARAMS or name.startswith(_TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    # The http and https copies of a page are the same source.
+    if scheme in ("", "http", "https"):
+        scheme = "https"
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.endswith((":80", ":443")):
+        host = host.rsplit(":", 1)[0]
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(k)
+        )
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@dataclass
+class MergedSource:
+    url: str
+    title: str
+    content: str
+    rrf_score: float = 0.0
+    best_score: float = 0.0
+    found_by: List[str] = field(default_factory=list)
+
+
+def merge_results(responses: Sequence[Tuple[str, Dict[str, Any]]]) -> List[MergedSource]:
+    """Fuse per-query result lists with reciprocal-rank fusion, deduped by URL."""
+    merged: Dict[str, MergedSource] = {}
+    for query, data in responses:
+        for rank, r in enumerate(data.get("results") or [], start=1):
+            url = r.get("url") or ""
+            key = canonical_url(url) if url else f"untitled:{r.get('title')}"
+            content = (r.get("content") or "").strip()
+            source = merged.get(key)
+            if source is None:
+                source = merged[key] = MergedSource(
+                    url=url, title=r.get("title") or "Untitled", content=content
+                )
+            elif len(content) > len(source.content):
+                source.content = content
+            source.rrf_score += 1.0 / (RRF_K + rank)
+            source.best_score = max(source.best_score, float(r.get("score") or 0.0))
+            if query not in source.found_by:
+                source.found_by.append(query)
+    return sorted(merged.values(), key=lambda s: (-s.rrf_score, -s.best_score))
+
+
+def fan_out(
+    search: Callable[[str], Dict[str, Any]],
+    queries: Sequence[str],
+    max_workers: int,
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[BaseException]]]:
+    """Run ``search`` for every query on a bounded pool, preserving input order."""
+    if len(queries) == 1 or max_workers <= 1:
+        outcomes = []
+        for q in queries:
+            try:
+                outcomes.append((q, search(q), None))
+            except Exception as exc:
+                outcomes.append((q, None, exc))
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as pool:
+        # Each task gets its own copy of the caller's context so tracing spans
+        # opened inside ``search`` attach to the current run.
+        futures = [(q, pool.submit(contextvars.copy_context().run, search, q)) for q in queries]
+        outcomes = []
+        for q, future in futures:
+            try:
+                outcomes.append((q, future.result(), None))
+            except Exception as exc:
+                outcomes.append((q, None, exc))
+        return outcomes
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..text_search import bm25_term_score, normalize_token, tokenize
+
+
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+_WORD_RE = re.compile(r"[A-Za-z]+|\d+")
+
+
+@dataclass
+class SearchHit:
+    name: str
+    query: str
+    score: float
+    snippet: str = ""
+
+
+def parse_query(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Split a search string into free terms and quoted phrases."""
+    phrases = [tokenize(p) for p in _PHRASE_RE.findall(text)]
+    phrases = [p for p in phrases if p]
+    terms = tokenize(_PHRASE_RE.sub(" ", text))
+    for phrase in phrases:
+        terms.extend(phrase)
+    return list(dict.fromkeys(terms)), phrases
+
+
+def _contains_phrase(positions: Dict[str, Sequence[int]], phrase: List[str]) -> bool:
+    starts = set(positions.get(phrase[0], ()))
+    for offset, term in enumerate(phrase[1:], start=1):
+        term_positions = set(positions.get(term, ()))
+        starts = {p for p in starts if p + offset in term_positions}
+        if not starts:
+            return False
+    return bool(starts)
+
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 240) -> str:
+    wanted = set(terms)
+    matches = [
+        m for m in _WORD_RE.finditer(text) if normalize_token(m.group(0).lower()) in wanted
+    ]
+    if not matches:
+        snippet = text[:width].strip()
+        return snippet + ("…" if len(text) > width else "")
+
+    # Pick the window that covers the most distinct matched terms.
+    best_start, best_cover = matches[0].start(), 0
+    for i, first in enumerate(matches):
+        covered: Set[str] = set()
+        for m in matches[i:]:
+            if m.start() - first.start() > width:
+                break
+            covered.add(normalize_token(m.group(0).lower()))
+        if len(covered) > best_cover:
+            best_start, best_cover = first.start(), len(covered)
+
+    start = max(0, best_start - width // 4)
+    end = min(len(text), start + width)
+    pieces: List[str] = []
+    cursor = start
+    for m in matches:
+        if m.start() < start or m.end() > end:
+            continue
+        pieces.append(text[cursor:m.start()])
+        pieces.append(f"**{m.group(0)}**")
+        cursor = m.end()
+    pieces.append(text[cursor:end])
+    snippet = " ".join("".join(pieces).split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class ReportSearchIndex:
+    """On-disk positional inverted index over knowledge base reports.
+
+    Postings live in SQLite keyed by term, so a search only touches the rows
+    for its own terms; report bodies are read back only to build snippets.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS docs (
+                    doc_id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL,
+                    query TEXT NOT NULL,
+                    length INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id INTEGER NOT NULL,
+                    tf INTEGER NOT NULL,
+                    positions TEXT NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc_id);
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def add(self, name: str, query: str, text: str) -> None:
+        tokens = tokenize(text)
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for pos, term in enumerate(tokens):
+            positions[term].append(pos)
+        with self._lock:
+            conn = self._connection()
+            self._delete(conn, name)
+            cur = conn.execute(
+                "INSERT INTO docs (name, query, length) VALUES (?, ?, ?)",
+                (name, query, len(tokens)),
+            )
+            doc_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf, positions) VALUES (?, ?, ?, ?)",
+                [
+                    (term, doc_id, len(pos), ",".join(map(str, pos)))
+                    for term, pos in positions.items()
+                ],
+            )
+            conn.commit()
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            self._delete(conn, name)
+            conn.commit()
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, name: str) -> None:
+        row = conn.execute("SELECT doc_id FROM docs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+        conn.execute("DELETE FROM docs WHERE doc_id = ?", row)
+
+    def names(self) -> Set[str]:
+        with self._lock:
+            rows = self._connection().execute("SELECT name FROM docs").fetchall()
+        return {name for (name,) in rows}
+
+    def documents(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            rows = self._connection().execute("SELECT name, query FROM docs").fetchall()
+        return [(name, query) for name, query in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self._connection().execute("SELECT COUNT(*) FROM docs").fetchone()
+        return int(n)
+
+    def search(
+        self,
+        text: str,
+        limit: int = 20,
+        loader: Optional[Callable[[str], str]] = None,
+    ) -> List[SearchHit]:
+        terms, phrases = parse_query(text)
+        if not terms:
+            return []
+
+        with self._lock:
+            conn = self._connection()
+            n_docs, total_len = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+            ).fetchone()
+            if not n_docs:
+                return []
+            placeholders = ",".join("?" * len(terms))
+            rows = conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, p.positions, d.length"
+                f" FROM postings p JOIN docs d ON d.doc_id = p.doc_id"
+                f" WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+        avg_len = total_len / n_docs
+        df = Counter(term for term, *_ in rows)
+        scores: Dict[int, float] = defaultdict(float)
+        positions: Dict[int, Dict[str, List[int]]] = defaultdict(dict)
+        for term, doc_id, tf, pos, length in rows:
+            scores[doc_id] += bm25_term_score(tf, df[term], n_docs, length, avg_len)
+            if phrases:
+                positions[doc_id][term] = [int(p) for p in pos.split(",")]
+
+        if phrases:
+            scores = {
+                doc_id: score
+                for doc_id, score in scores.items()
+                if all(_contains_phrase(positions[doc_id], p) for p in phrases)
+            }
+
+        top = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        if not top:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(top))
+            meta = dict(
+                (doc_id, (name, query))
+                for doc_id, name, query in self._connection().execute(
+                    f"SELECT doc_id, name, query FROM docs WHERE doc_id IN ({placeholders})",
+                    [doc_id for doc_id, _ in top],
+                )
+            )
+
+        hits = []
+        for doc_id, score in top:
+            name, query = meta[doc_id]
+            hit = SearchHit(name=name, query=query, score=score)
+            if loader is not None:
+                try:
+                    hit.snippet = make_snippet(loader(name), terms)
+                except OSError:
+                    pass
+            hits.append(hit)
+        return hits
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..tools.search_fanout import canonical_url
+
+
+_CITATION_RE = re.compile(r"\[S(\d+)\]")
+SOURCE_INDEX_HEADING = "## Source Index"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cited_source_ids(markdown: str) -> List[int]:
+    """Source ids cited as ``[S12]``, in order of first citation."""
+    return list(dict.fromkeys(int(n) for n in _CITATION_RE.findall(markdown)))
+
+
+@dataclass
+class SourceRecord:
+    id: int
+    url: str
+    title: str
+    snippet: str
+    content_hash: str
+    first_seen: float
+    last_seen: float
+    times_seen: int
+    # True when the URL was not in the store before the last ``observe`` call.
+    new: bool = False
+    # True when a known URL came back with different content.
+    changed: bool = False
+    reports: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"S{self.id}"
+
+
+class SourceStore:
+    """Web sources seen by any research run, one row per canonical URL.
+
+    Search results are folded in with ``observe``, which keeps the latest
+    title/snippet and a content hash, so later runs can tell new or changed
+    pages from ones already in the knowledge base. Reports cite sources as
+    ``[S<id>]`` and ``link`` records which reports use which sources.
+    ``register`` only hands out ids for unseen URLs, for callers that fold
+    the results in once their report is saved.
+    """
+
+    _COLUMNS = "id, url, title, snippet, content_hash, first_seen, last_seen, times_seen"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY,
+                    url_key TEXT NOT NULL UNIQUE,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    snippet TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    times_seen INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS report_sources (
+                    name TEXT NOT NULL,
+                    source_id INTEGER NOT NULL,
+                    PRIMARY KEY (name, source_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS report_sources_by_source ON report_sources (source_id);
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _record(row: tuple, reports: int = 0) -> SourceRecord:
+        return SourceRecord(*row, reports=reports)
+
+    def observe(self, results: Iterable[Tuple[str, str, str]]) -> Dict[str, SourceRecord]:
+        """Upsert ``(url, title, snippet)`` results; returns records keyed by canonical URL."""
+        return self._fold(results, update_known=True)
+
+    def register(self, results: Iterable[Tuple[str, str, str]]) -> Dict[str, SourceRecord]:
+        """Like ``observe``, but known rows are left as they are and new ones count no sighting yet."""
+        return self._fold(results, update_known=False)
+
+    def _fold(self, results: Iterable[Tuple[str, str, str]], update_known: bool) -> Dict[str, SourceRecord]:
+        now = time.time()
+        found: Dict[str, SourceRecord] = {}
+        with self._lock:
+            conn = self._connection()
+            for url, title, snippet in results:
+                if not url:
+                    continue
+                key = canonical_url(url)
+                digest = content_hash(snippet)
+                row = conn.execute(
+                    f"SELECT {self._COLUMNS} FROM sources WHERE url_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    seen = int(update_known)
+                    cursor = conn.execute(
+                        "INSERT INTO sources (url_key, url, title, snippet, content_hash, first_seen, "
+                        "last_seen, times_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, url, title, snippet, digest, now, now, seen),
+                    )
+                    found[key] = SourceRecord(cursor.lastrowid, url, title, snippet, digest, now, now, seen, new=True)
+                    continue
+                record = self._record(row)
+                if not update_known:
+                    found[key] = record
+                    continue
+                record.changed = bool(snippet) and digest != record.content_hash
+                if record.changed:
+                    record.snippet, record.content_hash = snippet, digest
+                record.title = title or record.title
+                record.last_seen = now
+                record.times_seen += 1
+                conn.execute(
+                    "UPDATE sources SET title = ?, snippet = ?, content_hash = ?, last_seen = ?, "
+                    "times_seen = ? WHERE id = ?",
+                    (record.title, record.snippet, record.content_hash, now, record.times_seen, record.id),
+                )
+                found[key] = record
+            conn.commit()
+            ids = [r.id for r in found.values()]
+            counts = self._report_counts(conn, ids)
+        for record in found.values():
+            record.reports = counts.get(record.id, 0)
+        return found
+
+    @staticmethod
+    def _report_counts(conn: sqlite3.Connection, ids: Sequence[int]) -> Dict[int, int]:
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        rows = conn.execute(
+            f"SELECT source_id, COUNT(*) FROM report_sources WHERE source_id IN ({placeholders}) "
+            "GROUP BY source_id",
+            list(ids),
+        )
+        return dict(rows.fetchall())
+
+    def get_many(self, ids: Sequence[int]) -> List[SourceRecord]:
+        """Records for ``ids`` in the given order; unknown ids are skipped."""
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM sources WHERE id IN ({placeholders})", list(ids)
+            ).fetchall()
+            counts = self._report_counts(conn, ids)
+        by_id = {row[0]: self._record(row, counts.get(row[0], 0)) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def link(self, name: str, ids: Iterable[int]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM report_sources WHERE name = ?", (name,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO report_sources (name, source_id) "
+                "SELECT ?, id FROM sources WHERE id = ?",
+                [(name, i) for i in ids],
+            )
+            conn.commit()
+
+    def unlink(self, name: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM report_sources WHERE name = ?", (name,))
+            conn.commit()
+
+    def for_report(self, name: str) -> List[SourceRecord]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT source_id FROM report_sources WHERE name = ? ORDER BY source_id", (name,)
+            ).fetchall()
+        return self.get_many([i for (i,) in rows])
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self._connection().execute("SELECT COUNT(*) FROM sources").fetchone()
+        return int(n)
+
+
+def render_source_index(records: Sequence[SourceRecord]) -> str:
+    lines = [SOURCE_INDEX_HEADING, ""]
+    lines.extend(f"- [{r.label}] {r.title} — {r.url}" for r in records)
+    return "\n".join(lines)
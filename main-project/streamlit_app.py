@@ -1,5 +1,7 @@
 import os
 import sys
+import time
+from datetime import datetime
 from pathlib import Path
 
 _env_backup_streamlit = {}
@@ -14,8 +16,10 @@ from streamlit_option_menu import option_menu
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.config import load_config
-from src.agents.research_crew import run_research_flow
-from src.knowledge.repository import KnowledgeRepository
+from src.jobs import JobQueue, WorkerPool, job_queue_path
+from src.knowledge.repository import KnowledgeRepository, extract_summary
+from src.resources import shared_repository
+from src.tracing import recent_runs
 
 
 st.set_page_config(
@@ -191,35 +195,198 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource(show_spinner=False)
+def _cached_config():
+    # Exceptions are not cached, so a fixed .env is picked up on the next rerun.
+    return load_config()
+
+
+@st.cache_resource(show_spinner=False)
+def _worker_pool():
+    # One pool per server process, shared by every browser session.
+    config = _cached_config()
+    if not config.job_workers:
+        return None
+    return WorkerPool(config, config.job_workers)
+
+
+@st.cache_resource(show_spinner=False)
+def _job_queue(path: str):
+    return JobQueue(Path(path))
+
+
 def load_app_config():
     try:
-        return load_config()
+        return _cached_config()
     except Exception as e:
         st.error(f"Configuration error: {e}")
         st.info("Please make sure your `.env` file exists with GROQ_API_KEY set.")
         return None
 
 
-def load_recent_reports(repository: KnowledgeRepository, limit: int = 10):
-    base_dir = Path(repository._base)
-    if not base_dir.exists():
-        return []
+@st.cache_data(show_spinner=False, max_entries=512)
+def report_listing(_repository: KnowledgeRepository, store_version: int, limit: int = 20, cursor=None, tag=None):
+    """One page of reports, newest first, built from the metadata store without reading report bodies.
+
+    ``store_version`` is part of the cache key, so reruns reuse the page until a
+    report is saved or removed.
+    """
+    page = _repository.list_reports(limit=limit, cursor=cursor, tag=tag)
+    reports = [
+        {
+            "filename": meta.name,
+            "path": str(_repository.report_path(meta.name)),
+            "query": meta.query,
+            "created": datetime.fromtimestamp(meta.created_at),
+            "meta": meta,
+            "snippet": meta.preview,
+        }
+        for meta in page.reports
+    ]
+    return reports, page.next_cursor
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def report_counts(_repository: KnowledgeRepository, store_version: int):
+    """Total number of reports and reports per tag, cached until the store changes."""
+    return _repository.report_count(), _repository.report_tags()
+
+
+def tracked_job_ids():
+    """Job ids of this browser tab, kept in the URL so a refresh does not lose them."""
+    raw = st.query_params.get("jobs", "")
+    return [job_id for job_id in raw.split(",") if job_id]
+
+
+def track_job(job_id, keep: int = 10):
+    st.query_params["jobs"] = ",".join([job_id] + tracked_job_ids()[: keep - 1])
+
+
+def render_research_result(result, report, key, celebrate=False):
+    if result.get("cached"):
+        st.success("✅ Found a saved report for a very similar question.")
+        st.info(
+            f"♻️ Reused the report for **{result['cached_query']}** "
+            f"(similarity {result['similarity']:.2f}). "
+            "Tick *Force fresh research* to run the agents again."
+        )
+    elif celebrate:
+        st.balloons()
+        st.success("✅ Research completed successfully!")
     
-    reports = []
-    for file_path in sorted(base_dir.glob("*.md"), reverse=True)[:limit]:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Status", "✅ Complete", delta="Success")
+    with col2:
+        st.metric("Report Length", f"{len(report):,} chars", delta="Markdown")
+    with col3:
+        st.metric("Saved To", "Knowledge Base", delta="Persisted")
+    
+    st.markdown('<div class="report-container">', unsafe_allow_html=True)
+    st.markdown("### Report Content")
+    st.markdown(report)
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    col_dl1, col_dl2, col_dl3 = st.columns([1, 2, 1])
+    with col_dl2:
+        st.download_button(
+            label="📥 Download Report (Markdown)",
+            data=report,
+            file_name=Path(result["report_path"]).name,
+            mime="text/markdown",
+            use_container_width=True,
+            type="primary",
+            key=f"download_{key}",
+        )
+    
+    st.info(f"💾 Report saved to: `{result['report_path']}`")
+
+
+def render_research_error(result):
+    error_type = result.get("error_type", "general_error")
+    error_msg = result.get("error", "Unknown error")
+    
+    if error_type == "quota_error":
+        st.error("❌ API Quota Error")
+        st.markdown(error_msg)
+        st.markdown("---")
+        st.markdown("### 🔧 Quick Fix Guide")
+        st.markdown("""
+        1. Check your usage at [Groq Console](https://console.groq.com/)
+        2. Wait a few minutes for rate limits to reset
+        3. Try again or upgrade your plan if needed
+        """)
+    else:
+        st.error("❌ Error occurred")
+        st.code(error_msg)
+
+
+def render_active_job(job, jobs: JobQueue, pool):
+    if job.status == "queued":
+        ahead = jobs.position(job.job_id)
+        label = f"⏳ Queued — {ahead} job(s) ahead" if ahead else "⏳ Queued — next up"
+    else:
+        label = f"🤖 {job.progress}..."
+    with st.status(label, state="running", expanded=True):
+        st.markdown(f"**{job.query}**")
+        if job.status == "queued" and pool is None:
+            st.caption("No in-app workers are configured (`JOB_WORKERS=0`); start them with `python -m src.jobs`.")
+        for _, message in jobs.events(job.job_id)[-12:]:
+            st.write(message)
+        if job.draft:
+            st.markdown("---")
+            st.markdown(job.draft)
+
+
+def render_finished_job(job, repository: KnowledgeRepository, expanded):
+    seen_active = st.session_state.setdefault("seen_active_jobs", set())
+    celebrate = job.job_id in seen_active
+    seen_active.discard(job.job_id)
+    icon = "✅" if job.status == "completed" else "❌"
+    with st.expander(f"{icon} {job.query[:80]}", expanded=expanded):
+        result = job.result
+        if job.status != "completed":
+            render_research_error(result)
+            return
         try:
-            content = file_path.read_text(encoding="utf-8")
-            # Extract query from filename or content
-            query_match = content.split("**Query**:")[1].split("\n")[0].strip() if "**Query**:" in content else file_path.stem
-            reports.append({
-                "filename": file_path.name,
-                "path": str(file_path),
-                "query": query_match,
-                "content": content[:500] + "..." if len(content) > 500 else content
-            })
-        except Exception:
-            continue
-    return reports
+            report = extract_summary(repository.read_report(Path(result["report_path"]).name))
+        except OSError:
+            st.warning(f"The report `{result['report_path']}` is no longer in the knowledge base.")
+            return
+        render_research_result(result, report, key=job.job_id, celebrate=celebrate)
+
+
+def show_research_jobs(config, repository: KnowledgeRepository, jobs: JobQueue, pool):
+    """Render this tab's jobs; returns whether any of them is still queued or running."""
+    job_ids = tracked_job_ids()
+    if not job_ids:
+        return False
+    
+    st.markdown("---")
+    counts = jobs.counts()
+    head_col, clear_col = st.columns([3, 1])
+    with head_col:
+        st.markdown("## 📄 Research Jobs")
+        workers = f"{pool.alive()} worker(s)" if pool is not None else "external workers"
+        st.caption(f"{counts['running']} running · {counts['queued']} waiting · {workers}")
+    
+    found = [job for job in (jobs.get(job_id) for job_id in job_ids) if job is not None]
+    with clear_col:
+        if any(not job.active for job in found) and st.button("🧹 Clear finished", key="clear_jobs"):
+            st.query_params["jobs"] = ",".join(job.job_id for job in found if job.active)
+            st.rerun()
+    
+    any_active = False
+    first_finished = True
+    for job in found:
+        if job.active:
+            any_active = True
+            st.session_state.setdefault("seen_active_jobs", set()).add(job.job_id)
+            render_active_job(job, jobs, pool)
+        else:
+            render_finished_job(job, repository, expanded=first_finished)
+            first_finished = False
+    return any_active
 
 
 def main():
@@ -253,17 +420,20 @@ def main():
     if config is None:
         st.stop()
     
-    repository = KnowledgeRepository(config)
+    repository = shared_repository(config)
+    pool = _worker_pool()
+    if pool is not None:
+        pool.ensure_running()
     
     if selected == "🔍 Research":
-        show_research_page(config, repository)
+        show_research_page(config, repository, _job_queue(str(job_queue_path(config))), pool)
     elif selected == "📚 Knowledge Base":
         show_knowledge_base_page(repository)
     elif selected == "⚙️ Settings":
-        show_settings_page(config)
+        show_settings_page(config, repository)
 
 
-def show_research_page(config, repository: KnowledgeRepository):
+def show_research_page(config, repository: KnowledgeRepository, jobs: JobQueue, pool):
     st.markdown("""
     <div class="hero-card">
         <h3 style="margin-top: 0; color: #a5b4fc;">🚀 Start Your Research</h3>
@@ -292,6 +462,11 @@ def show_research_page(config, repository: KnowledgeRepository):
                 use_container_width=True,
                 type="primary"
             )
+            force_refresh = st.checkbox(
+                "Force fresh research",
+                value=False,
+                help="Ignore saved reports for similar questions and run the agents again."
+            )
     
     if submit_button and query:
         if "example_query" in st.session_state:
@@ -299,59 +474,10 @@ def show_research_page(config, repository: KnowledgeRepository):
         if not query.strip():
             st.warning("⚠️ Please enter a research question.")
         else:
-            with st.spinner("🤖 AI agents are researching... This may take 1-3 minutes."):
-                result = run_research_flow(config, query, repository)
-                
-                if result.get("success"):
-                    st.balloons()
-                    st.success("✅ Research completed successfully!")
-                    
-                    st.markdown("---")
-                    st.markdown("## 📄 Research Report")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Status", "✅ Complete", delta="Success")
-                    with col2:
-                        st.metric("Report Length", f"{len(result['report']):,} chars", delta="Markdown")
-                    with col3:
-                        st.metric("Saved To", "Knowledge Base", delta="Persisted")
-                    
-                    st.markdown('<div class="report-container">', unsafe_allow_html=True)
-                    st.markdown("### Report Content")
-                    st.markdown(result["report"])
-                    st.markdown("</div>", unsafe_allow_html=True)
-                    
-                    col_dl1, col_dl2, col_dl3 = st.columns([1, 2, 1])
-                    with col_dl2:
-                        st.download_button(
-                            label="📥 Download Report (Markdown)",
-                            data=result["report"],
-                            file_name=Path(result["report_path"]).name,
-                            mime="text/markdown",
-                            use_container_width=True,
-                            type="primary"
-                        )
-                    
-                    st.info(f"💾 Report saved to: `{result['report_path']}`")
-                    
-                else:
-                    error_type = result.get("error_type", "general_error")
-                    error_msg = result.get("error", "Unknown error")
-                    
-                    if error_type == "quota_error":
-                        st.error("❌ API Quota Error")
-                        st.markdown(error_msg)
-                        st.markdown("---")
-                        st.markdown("### 🔧 Quick Fix Guide")
-                        st.markdown("""
-                        1. Check your usage at [Groq Console](https://console.groq.com/)
-                        2. Wait a few minutes for rate limits to reset
-                        3. Try again or upgrade your plan if needed
-                        """)
-                    else:
-                        st.error("❌ Error occurred")
-                        st.code(error_msg)
+            track_job(jobs.submit(query.strip(), force_refresh=force_refresh))
+            st.toast("🚀 Research job queued — you can keep working or refresh the page.")
+    
+    any_active = show_research_jobs(config, repository, jobs, pool)
     
     st.markdown("---")
     st.markdown("### 💡 Example Queries")
@@ -376,15 +502,20 @@ def show_research_page(config, repository: KnowledgeRepository):
     
     if "example_query" in st.session_state:
         st.success(f"💡 **Pre-filled above** — adjust if needed and click Research!")
+    
+    if any_active:
+        # Poll the queue; each session only reruns its own script, the workers keep running.
+        time.sleep(config.job_poll_seconds)
+        st.rerun()
 
 
 def show_knowledge_base_page(repository: KnowledgeRepository):
     st.markdown("## 📚 Knowledge Base")
     st.markdown("*Browse and search your saved research reports*")
     
-    reports = load_recent_reports(repository, limit=20)
-    
-    if not reports:
+    version = repository.store_version()
+    total, tag_counts = report_counts(repository, version)
+    if not total:
         st.markdown("""
         <div class="hero-card">
             <h4 style="margin-top: 0; color: #a5b4fc;">📝 No reports yet</h4>
@@ -393,20 +524,62 @@ def show_knowledge_base_page(repository: KnowledgeRepository):
         """, unsafe_allow_html=True)
         return
     
-    search_term = st.text_input("🔍 Search reports", placeholder="Enter keywords to filter...", label_visibility="collapsed")
+    search_col, tag_col = st.columns([3, 1])
+    with search_col:
+        search_term = st.text_input("🔍 Search reports", placeholder="Enter keywords to filter...", label_visibility="collapsed")
+    with tag_col:
+        tag = st.selectbox(
+            "Tag",
+            [None] + list(tag_counts),
+            format_func=lambda t: "All tags" if t is None else f"{t} ({tag_counts[t]})",
+            label_visibility="collapsed",
+            disabled=not tag_counts,
+        )
     
-    filtered_reports = reports
+    page_size = 20
     if search_term:
-        filtered_reports = [
-            r for r in reports
-            if search_term.lower() in r["query"].lower() or search_term.lower() in r["content"].lower()
-        ]
+        filtered_reports = []
+        for hit in repository.search(search_term, limit=50):
+            meta = repository.report_meta(hit.name)
+            if tag and (meta is None or tag not in meta.tags):
+                continue
+            filtered_reports.append({
+                "filename": hit.name,
+                "path": str(repository.report_path(hit.name)),
+                "query": hit.query,
+                "created": datetime.fromtimestamp(meta.created_at) if meta else None,
+                "meta": meta,
+                "snippet": hit.snippet,
+            })
+        matching = len(filtered_reports)
+        st.caption('Tip: wrap words in quotes to search for an exact phrase, e.g. "vector database".')
+    else:
+        matching = tag_counts.get(tag, 0) if tag else total
+        pages = max(1, -(-matching // page_size))
+        # Cursors of the pages visited so far; the first page has none.
+        if st.session_state.get("kb_tag") != tag:
+            st.session_state.kb_tag = tag
+            st.session_state.kb_cursors = [None]
+        cursors = st.session_state.setdefault("kb_cursors", [None])
+        filtered_reports, next_cursor = report_listing(repository, version, page_size, cursors[-1], tag)
+        if pages > 1:
+            newer_col, page_col, older_col = st.columns([1, 2, 1])
+            with newer_col:
+                if st.button("← Newer", disabled=len(cursors) == 1, use_container_width=True):
+                    cursors.pop()
+                    st.rerun()
+            with page_col:
+                st.caption(f"Page {len(cursors)} of {pages}")
+            with older_col:
+                if st.button("Older →", disabled=next_cursor is None, use_container_width=True):
+                    cursors.append(next_cursor)
+                    st.rerun()
     
     m1, m2 = st.columns(2)
     with m1:
-        st.metric("Total Reports", len(reports), delta=None)
+        st.metric("Total Reports", total, delta=None)
     with m2:
-        st.metric("Filtered Results", len(filtered_reports), delta=None)
+        st.metric("Filtered Results", matching, delta=None)
     
     for idx, report in enumerate(filtered_reports):
         with st.expander(f"📄 {report['query'][:80]}...", expanded=False):
@@ -415,11 +588,24 @@ def show_knowledge_base_page(repository: KnowledgeRepository):
             with col1:
                 st.markdown(f"**Query**: {report['query']}")
                 st.markdown(f"**File**: `{report['filename']}`")
+                meta = report.get("meta")
+                if meta is not None:
+                    details = [f"{report['created']:%Y-%m-%d %H:%M}", f"{meta.length:,} chars", f"{len(meta.sources)} sources"]
+                    if meta.model:
+                        details.append(meta.model)
+                    if meta.duration_s is not None:
+                        details.append(f"{meta.duration_s:.0f}s run")
+                    if meta.tags:
+                        details.append(" ".join(f"`{t}`" for t in meta.tags))
+                    st.caption(" · ".join(details))
+                if report.get("snippet"):
+                    st.markdown(report["snippet"])
             
             with col2:
                 if st.button("📖 View Full", key=f"view_{idx}"):
                     try:
-                        full_content = Path(report['path']).read_text(encoding="utf-8")
+                        # Bodies are only read (and decompressed) on demand.
+                        full_content = repository.read_report(report["filename"])
                         st.markdown("### Full Report")
                         st.markdown(full_content)
                     except Exception as e:
@@ -428,7 +614,7 @@ def show_knowledge_base_page(repository: KnowledgeRepository):
             st.markdown("---")
 
 
-def show_settings_page(config):
+def show_settings_page(config, repository: KnowledgeRepository):
     st.markdown("## ⚙️ Settings & Configuration")
     
     st.markdown("""
@@ -475,15 +661,53 @@ KAGGLE_DATA_DIR=./kaggle_data""", language="bash")
         st.metric("Knowledge Base", "Ready" if kb_exists else "Not Found", delta="✅" if kb_exists else "❌")
     
     with status_col2:
-        kb_path = Path(config.knowledge_base_dir)
-        report_count = len(list(kb_path.glob("*.md"))) if kb_path.exists() else 0
-        st.metric("Saved Reports", report_count)
+        storage = repository.storage_stats()
+        st.metric(
+            "Saved Reports",
+            report_counts(repository, repository.store_version())[0],
+            delta=f"{storage.stored_bytes / 1024:,.0f} KB on disk ({storage.ratio:.1f}x smaller)" if storage.ratio else None,
+            delta_color="off",
+        )
     
     with status_col3:
         kaggle_path = Path(config.kaggle_data_dir)
         dataset_count = len(list(kaggle_path.glob("**/*.csv"))) + len(list(kaggle_path.glob("**/*.parquet"))) if kaggle_path.exists() else 0
         st.metric("Kaggle Datasets", dataset_count)
     
+    st.markdown("### ⏱️ Recent Runs")
+    runs = recent_runs(config, limit=20)
+    if not runs:
+        st.caption(f"No traced runs yet. Traces are written to `{config.trace_dir}`.")
+    else:
+        rows = []
+        for run in runs:
+            counters = run.get("counters", {})
+            stages = run.get("stages", {})
+            slowest = max(stages.items(), key=lambda item: item[1]["total_s"], default=None)
+            rows.append({
+                "Started": datetime.fromtimestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "Query": run.get("query") or "",
+                "Duration (s)": run["duration_s"],
+                "Prompt tokens": int(counters.get("prompt_tokens", 0)),
+                "Completion tokens": int(counters.get("completion_tokens", 0)),
+                "Search cache hits": int(counters.get("cache_hits", 0)),
+                "Search cache misses": int(counters.get("cache_misses", 0)),
+                "Slowest stage": f"{slowest[0]} ({slowest[1]['total_s']:.2f}s)" if slowest else "",
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        with st.expander("Stage breakdown of the latest run", expanded=False):
+            latest = runs[0]
+            st.dataframe(
+                [
+                    {"Stage": name, "Calls": stage["count"], "Total (s)": stage["total_s"]}
+                    for name, stage in sorted(latest["stages"].items(), key=lambda item: -item[1]["total_s"])
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+            if latest.get("trace_file"):
+                st.caption(f"Full trace: `{latest['trace_file']}`")
+    
     st.markdown("---")
     st.markdown("### ℹ️ About")
     st.markdown("""
@@ -0,0 +1,31 @@
+"""Make the code importable as the ``src`` package the tests use.
+
+In a checkout with a ``src/`` directory this only puts the project root on
+``sys.path``. When the modules sit flat next to ``tests/`` (as in this
+tree), ``src`` and its ``tools``, ``agents`` and ``knowledge`` subpackages
+are registered as namespace packages over that one directory, so relative
+imports such as ``from ..config import AppConfig`` resolve unchanged.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SUBPACKAGES = ("tools", "agents", "knowledge")
+
+
+def _register_flat_package(root: Path) -> None:
+    for name in ("src", *(f"src.{sub}" for sub in SUBPACKAGES)):
+        package = types.ModuleType(name)
+        package.__path__ = [str(root)]
+        package.__package__ = name
+        sys.modules[name] = package
+        if name != "src":
+            setattr(sys.modules["src"], name.rpartition(".")[2], package)
+
+
+if (ROOT / "src").is_dir():
+    sys.path.insert(0, str(ROOT))
+elif "src" not in sys.modules:
+    _register_flat_package(ROOT)
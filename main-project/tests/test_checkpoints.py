@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import socket
+import subprocess
+import sys
+import time
+
+from src.knowledge.checkpoints import CheckpointStore
+
+
+def _store(tmp_path) -> CheckpointStore:
+    return CheckpointStore(tmp_path / "checkpoints.sqlite3")
+
+
+def _set_owner(store: CheckpointStore, run_id: str, owner, updated_at=None) -> None:
+    conn = store._connection()
+    conn.execute("UPDATE runs SET owner = ? WHERE run_id = ?", (owner, run_id))
+    if updated_at is not None:
+        conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (updated_at, run_id))
+    conn.commit()
+
+
+def _dead_owner() -> str:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}"
+
+
+def test_run_in_progress_in_a_live_process_is_not_resumed(tmp_path):
+    store = _store(tmp_path)
+    run_id = store.start_run("q", "q")
+    store.save_task(run_id, "research", "notes")
+    assert store.latest_unfinished("q", 3600) is None
+
+
+def test_failed_and_orphaned_runs_are_resumed(tmp_path):
+    store = _store(tmp_path)
+    failed = store.start_run("q", "q")
+    store.save_task(failed, "research", "notes")
+    store.finish(failed, "failed", error="boom")
+    assert store.latest_unfinished("q", 3600).run_id == failed
+
+    orphaned = store.start_run("q", "q")
+    store.save_task(orphaned, "research", "newer notes")
+    _set_owner(store, orphaned, _dead_owner())
+    assert store.latest_unfinished("q", 3600).run_id == orphaned
+
+
+def test_unknown_owner_is_resumed_only_once_stale(tmp_path):
+    store = _store(tmp_path)
+    run_id = store.start_run("q", "q")
+    store.save_task(run_id, "research", "notes")
+    _set_owner(store, run_id, "other-host:123")
+    assert store.latest_unfinished("q", 3600, stale_after_seconds=600) is None
+
+    _set_owner(store, run_id, None, updated_at=time.time() - 900)
+    assert store.latest_unfinished("q", 3600, stale_after_seconds=600).run_id == run_id
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+
+from src.jobs import JobQueue
+
+
+def _queue(tmp_path) -> JobQueue:
+    return JobQueue(tmp_path / "jobs.sqlite3")
+
+
+def test_jobs_are_claimed_in_submission_order(tmp_path):
+    jobs = _queue(tmp_path)
+    first, second = jobs.submit("first"), jobs.submit("second")
+    assert jobs.position(second) == 1
+
+    claimed = jobs.claim("w1")
+    assert (claimed.job_id, claimed.status, claimed.attempts) == (first, "running", 1)
+    assert jobs.position(second) == 0
+    assert jobs.claim("w2").job_id == second
+    assert jobs.claim("w3") is None
+
+
+def test_concurrent_workers_never_claim_the_same_job(tmp_path):
+    submitted = {_queue(tmp_path).submit(f"q{i}") for i in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def worker(name: str) -> None:
+        # One connection per worker, as in separate worker processes.
+        jobs = _queue(tmp_path)
+        while True:
+            job = jobs.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.job_id)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert sorted(claimed) == sorted(submitted)
+
+
+def test_stale_jobs_are_requeued_until_they_run_out_of_attempts(tmp_path):
+    jobs = _queue(tmp_path)
+    job_id = jobs.submit("q")
+    jobs.claim("w1")
+    assert jobs.requeue_stale(stale_after_seconds=3600) == 0
+
+    assert jobs.requeue_stale(stale_after_seconds=-1, max_attempts=2) == 1
+    assert jobs.get(job_id).status == "queued"
+    jobs.claim("w2")
+    assert jobs.requeue_stale(stale_after_seconds=-1, max_attempts=2) == 0
+    job = jobs.get(job_id)
+    assert job.status == "failed" and not job.result["success"]
+
+
+def test_finished_jobs_keep_the_report_path_but_not_the_report(tmp_path):
+    jobs = _queue(tmp_path)
+    job_id = jobs.submit("q")
+    jobs.claim("w1")
+    jobs.finish(job_id, {"success": True, "report": "# long report", "report_path": "kb/report.md"})
+    job = jobs.get(job_id)
+    assert job.status == "completed" and not job.active
+    assert job.result == {"success": True, "report_path": "kb/report.md"}
+    assert jobs.counts()["completed"] == 1
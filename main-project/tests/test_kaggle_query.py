@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from src.tools.kaggle_query import build_query, run_aggregation
+
+
+def _write(tmp_path) -> str:
+    path = tmp_path / "sales.csv"
+    pd.DataFrame(
+        {
+            "country": ["US", "US", "UK", "UK", "UK", "DE"],
+            "product": ["a", "b", "a", "a", "c", "a"],
+            "amount": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        }
+    ).to_csv(path, index=False)
+    return str(path)
+
+
+def _rows(result) -> dict:
+    return {row[0]: tuple(row[1:]) for row in result.rows}
+
+
+def test_count_distinct_per_group(tmp_path):
+    query = build_query(metrics=["count_distinct(product)", "sum(amount)"], group_by=["country"])
+    rows = _rows(run_aggregation(_write(tmp_path), query))
+    assert rows["US"] == (2, 3.0)
+    assert rows["UK"] == (2, 12.0)
+
+
+def test_count_distinct_of_a_group_by_column(tmp_path):
+    query = build_query(metrics=["count_distinct(country)", "count"], group_by=["country"])
+    rows = _rows(run_aggregation(_write(tmp_path), query))
+    assert rows["US"] == (1, 2)
+    assert rows["UK"] == (1, 3)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+
+import pytest
+import requests
+
+from src.benchmarks import start_mock_server
+from src.rate_limit import (
+    ProviderLimiter,
+    RateLimiter,
+    RetriesExhausted,
+    RetryPolicy,
+    call_with_retry,
+    retry_after_seconds,
+)
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(server_rpm: float, retry_after: float):
+        server = start_mock_server(server_rpm, retry_after)
+        servers.append(server)
+        return server, "http://%s:%d/search" % server.server_address
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _post(url: str):
+    def call():
+        response = requests.post(url, json={"query": "q", "max_results": 1}, timeout=5)
+        response.raise_for_status()
+        return response.json()
+
+    return call
+
+
+def test_retry_after_header_is_read_from_a_429(mock_server):
+    server, url = mock_server(server_rpm=0.001, retry_after=7)
+    _post(url)()
+    with pytest.raises(requests.HTTPError) as info:
+        _post(url)()
+    assert info.value.response.status_code == 429
+    assert retry_after_seconds(info.value) == 7.0
+
+
+def test_throttled_call_waits_for_retry_after_and_succeeds(mock_server):
+    # One request per half second; the second call is rejected and must wait it out.
+    server, url = mock_server(server_rpm=120, retry_after=0.5)
+    limiter = ProviderLimiter("mock", 6000)
+    policy = RetryPolicy(max_attempts=5, base_delay=0.1, rng=random.Random(0))
+    call_with_retry(_post(url), limiter, policy)
+    call_with_retry(_post(url), limiter, policy)
+
+    started = time.monotonic()
+    result = call_with_retry(_post(url), limiter, policy)
+    assert result["results"]
+    assert server.rejected >= 1
+    assert limiter.stats.throttled >= 1
+    assert time.monotonic() - started >= 0.5
+
+
+def test_gives_up_after_max_attempts(mock_server):
+    server, url = mock_server(server_rpm=0.001, retry_after=30)
+    limiter = ProviderLimiter("mock", 6000)
+    # max_delay caps the server's 30s Retry-After.
+    policy = RetryPolicy(max_attempts=3, base_delay=0.02, max_delay=0.05, rng=random.Random(0))
+    call_with_retry(_post(url), limiter, policy)
+
+    started = time.monotonic()
+    with pytest.raises(RetriesExhausted) as info:
+        call_with_retry(_post(url), limiter, policy)
+    assert info.value.attempts == 3
+    assert server.requests == 4
+    assert time.monotonic() - started < 2
+
+
+def test_backoff_delays_are_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, rng=random.Random(0))
+    assert all(0 <= policy.delay(attempt) <= 5.0 for attempt in range(20))
+    assert 5.0 <= policy.delay(0, retry_after=120) <= 5.5
+    assert 2.0 <= policy.delay(0, retry_after=2) <= 2.5
+
+
+def test_throttling_lowers_the_rate_and_success_restores_it():
+    limiter = ProviderLimiter("mock", 600)
+    limiter.on_throttled(0.0)
+    assert limiter.requests.per_minute == pytest.approx(420)
+    limiter.on_throttled(0.0)
+    assert limiter.requests.per_minute == pytest.approx(294)
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.requests.per_minute == 600
+
+
+def test_rate_change_wakes_waiting_callers():
+    limiter = RateLimiter(6, burst=1)  # one permit every ten seconds
+    limiter.drain()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: limiter.acquire() and acquired.set(), daemon=True)
+    waiter.start()
+    time.sleep(0.1)
+    limiter.set_rate(6000)
+    assert acquired.wait(1.0)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import sqlite3
+
+from src.benchmarks import _bench_config
+from src.knowledge.report_metadata import ReportMeta, ReportMetadataStore
+from src.knowledge.repository import KnowledgeRepository
+
+
+def _store(tmp_path) -> ReportMetadataStore:
+    return ReportMetadataStore(tmp_path / "reports.sqlite3")
+
+
+def _meta(name: str, created_at: float, query: str = "q", tags=()) -> ReportMeta:
+    return ReportMeta(name=name, query=query, created_at=created_at, length=10, tags=list(tags))
+
+
+def test_latest_matches_the_normalized_query(tmp_path):
+    store = _store(tmp_path)
+    store.add_many(
+        [
+            _meta("a.md", 1.0, "Edge AI chips?"),
+            _meta("b.md", 3.0, "edge  ai CHIPS"),
+            _meta("c.md", 5.0, "edge ai chip market"),
+        ]
+    )
+    assert store.latest("edge ai chips").name == "b.md"
+    assert store.latest("quantum networking") is None
+
+
+def test_latest_uses_the_query_index(tmp_path):
+    store = _store(tmp_path)
+    store.add(_meta("a.md", 1.0))
+    plan = store._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT name FROM reports WHERE query_key = ? "
+        "ORDER BY created_at DESC, name DESC LIMIT 1",
+        ("q",),
+    ).fetchall()
+    assert any("reports_by_query" in row[-1] for row in plan)
+
+
+def test_stores_without_query_keys_are_backfilled(tmp_path):
+    path = tmp_path / "reports.sqlite3"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE reports (name TEXT PRIMARY KEY, query TEXT NOT NULL, created_at REAL NOT NULL, "
+        "length INTEGER NOT NULL, sources TEXT NOT NULL DEFAULT '[]', model TEXT, duration_s REAL, "
+        "tags TEXT NOT NULL DEFAULT '[]', run_id TEXT, preview TEXT NOT NULL DEFAULT '')"
+    )
+    conn.execute("INSERT INTO reports (name, query, created_at, length) VALUES ('old.md', 'Edge AI Chips', 1, 10)")
+    conn.commit()
+    conn.close()
+
+    assert ReportMetadataStore(path).latest("edge ai chips").name == "old.md"
+
+
+
+def _walk(store: ReportMetadataStore, limit: int, tag=None):
+    names, cursor, pages = [], None, 0
+    while True:
+        page = store.page(limit, cursor, tag)
+        names.extend(m.name for m in page.reports)
+        pages += 1
+        if page.next_cursor is None:
+            return names, pages
+        cursor = page.next_cursor
+
+
+def test_cursor_pages_cover_every_report_once_newest_first(tmp_path):
+    store = _store(tmp_path)
+    # Pairs of reports share a creation time; the name breaks the tie.
+    metas = [_meta(f"r{i:02d}.md", float(i // 2), tags=["even"] if i % 2 == 0 else []) for i in range(25)]
+    store.add_many(metas)
+    expected = [m.name for m in sorted(metas, key=lambda m: (m.created_at, m.name), reverse=True)]
+
+    names, pages = _walk(store, limit=4)
+    assert names == expected
+    assert pages == 7
+
+    assert _walk(store, limit=5, tag="even")[0] == [n for n in expected if int(n[1:3]) % 2 == 0]
+    assert store.count("even") == 13
+
+
+def test_last_full_page_has_no_next_cursor(tmp_path):
+    store = _store(tmp_path)
+    store.add_many(_meta(f"r{i}.md", float(i)) for i in range(6))
+    first = store.page(3)
+    assert first.next_cursor == (3.0, "r3.md")
+    assert store.page(3, first.next_cursor).next_cursor is None
+    assert store.page(3, (0.0, "r0.md")).reports == []
+
+
+def test_reports_added_after_the_cursor_do_not_shift_later_pages(tmp_path):
+    store = _store(tmp_path)
+    store.add_many(_meta(f"r{i}.md", float(i)) for i in range(6))
+    first = store.page(3)
+    store.add(_meta("new.md", 100.0))
+    assert [m.name for m in store.page(3, first.next_cursor).reports] == ["r2.md", "r1.md", "r0.md"]
+
+
+def _repository(tmp_path) -> KnowledgeRepository:
+    return KnowledgeRepository(_bench_config(str(tmp_path), report_storage="files"))
+
+
+def test_saved_reports_are_listed_and_counted_from_metadata(tmp_path):
+    repository = _repository(tmp_path)
+    version = repository.store_version()
+    first = repository.save_entry("edge ai chips", "See https://example.org/a.", tags=["Hardware"])
+    second = repository.save_entry("vector databases", "Body.", model="m", duration_s=1.23456)
+    assert repository.store_version() > version
+
+    assert [m.name for m in repository.list_reports().reports] == [second.name, first.name]
+    assert repository.report_count() == 2
+    assert repository.report_count("hardware") == 1
+    assert repository.report_tags() == {"hardware": 1}
+    meta = repository.report_meta(first.name)
+    assert (meta.query, meta.sources, meta.tags) == ("edge ai chips", ["https://example.org/a"], ["hardware"])
+    assert repository.report_meta(second.name).duration_s == 1.235
+
+
+def test_reports_copied_in_by_hand_are_picked_up_and_dropped(tmp_path):
+    base = tmp_path / "knowledge_base_store"
+    repository = _repository(tmp_path)
+    copied = base / "20240101_120000_manual.md"
+    copied.write_text(
+        "# Technology Research Report\n\n**Query**: Manual topic\n**Created**: 2024-01-01T12:00:00\n\n"
+        "---\n\nHand-written body.\n",
+        encoding="utf-8",
+    )
+    assert repository.report_count() == 1
+    meta = repository.report_meta(copied.name)
+    assert (meta.query, meta.preview) == ("Manual topic", "Hand-written body.")
+
+    copied.unlink()
+    assert _repository(tmp_path).report_count() == 0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from src.knowledge.report_storage import ReportBodyStore
+
+
+SHARED = "## Source Index\n\n" + "\n".join(f"- [S{i}] Source {i} — https://example.org/{i}" for i in range(40))
+
+
+def _store(tmp_path) -> ReportBodyStore:
+    return ReportBodyStore(tmp_path / "bodies.sqlite3")
+
+
+def _report(title: str) -> str:
+    return f"# {title}\n\nFindings about {title}.\n\n{SHARED}\n"
+
+
+def test_bodies_round_trip_exactly(tmp_path):
+    store = _store(tmp_path)
+    content = "# Title\n\n\n\nParagraph with trailing space \n\n" + "long paragraph " * 200 + "\n"
+    store.put("a.md", content)
+    assert store.get("a.md") == content
+    assert store.get("missing.md") is None
+    # Repeated blocks (here the empty ones) are counted once per use.
+    store.remove("a.md")
+    assert store.stats().blocks == 0
+
+
+def test_shared_blocks_are_stored_once(tmp_path):
+    store = _store(tmp_path)
+    store.put("a.md", _report("alpha"))
+    one = store.stats()
+    store.put("b.md", _report("beta"))
+    two = store.stats()
+    # Only beta's own heading and findings blocks were added.
+    assert two.blocks == one.blocks + 2
+    assert two.stored_bytes < 2 * one.stored_bytes
+
+
+def test_shared_blocks_are_dropped_with_their_last_report(tmp_path):
+    store = _store(tmp_path)
+    store.put("a.md", _report("alpha"))
+    store.put("b.md", _report("beta"))
+
+    assert store.remove("a.md")
+    assert not store.remove("a.md")
+    assert store.get("b.md") == _report("beta")
+
+    assert store.remove("b.md")
+    stats = store.stats()
+    assert (stats.reports, stats.blocks, stats.stored_bytes) == (0, 0, 0)
+
+
+def test_rewriting_a_report_releases_its_old_blocks(tmp_path):
+    store = _store(tmp_path)
+    store.put("a.md", _report("alpha"))
+    store.put("a.md", _report("gamma"))
+    assert store.get("a.md") == _report("gamma")
+    assert store.names().keys() == {"a.md"}
+
+    store.put("b.md", "# beta")
+    store.remove("a.md")
+    assert store.stats().blocks == 1
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import pytest
+
+from src.agents import research_crew
+from src.agents.research_crew import crew_pool, run_research_flow
+from src.benchmarks import _bench_config, _write_json
+from src.knowledge.repository import normalize_report_query
+from src.resources import clear_shared_resources, shared_repository
+
+
+QUERY = "vector databases in production"
+PATCH = (
+    "Thought: I now know the final answer\nFinal Answer: "
+    "## What's New\n\n- A new benchmark was published.\n\n## Key Findings\n\n- Latency dropped further.\n"
+)
+
+
+@pytest.fixture
+def env(tmp_path):
+    llm = _write_json(
+        str(tmp_path / "llm.json"),
+        {"completions": [{"agent": "Research Synthesizer", "step": 0, "response": PATCH}]},
+    )
+    search = _write_json(str(tmp_path / "search.json"), {})
+    config = _bench_config(str(tmp_path), llm_fixtures=llm, search_fixtures=search, search_cache_mode="off")
+    repository = shared_repository(config)
+    previous = repository.save_entry(QUERY, "## Key Findings\n\n- Latency is low.\n")
+    yield config, repository, previous.name
+    crew_pool.clear()
+    clear_shared_resources()
+
+
+def _fail_writer(monkeypatch):
+    class FailingCrew:
+        def kickoff(self, *args, **kwargs):
+            raise RuntimeError("writer unavailable")
+
+    monkeypatch.setattr(research_crew, "build_update_crew", lambda *args, **kwargs: FailingCrew())
+
+
+def test_failed_update_is_not_resumed_by_a_plain_run(env, monkeypatch):
+    config, repository, previous = env
+    _fail_writer(monkeypatch)
+    failed = run_research_flow(config, QUERY, repository, update=True)
+    assert not failed["success"]
+
+    run = repository.checkpoints.get_run(failed["run_id"])
+    assert (run.kind, run.base_report, run.tasks) == ("update", previous, ["research"])
+    assert repository.checkpoints.latest_unfinished(normalize_report_query(QUERY), 3600) is None
+
+
+def test_resuming_a_failed_update_patches_the_earlier_report(env, monkeypatch):
+    config, repository, previous = env
+    with monkeypatch.context() as patched:
+        _fail_writer(patched)
+        failed = run_research_flow(config, QUERY, repository, update=True)
+    notes = repository.checkpoints.outputs(failed["run_id"])["research"]
+
+    resumed = run_research_flow(config, QUERY, repository, resume_run_id=failed["run_id"])
+    assert resumed["success"], resumed.get("error")
+    assert resumed["updated_from"] == previous
+    assert resumed["resumed_tasks"] == ["research"]
+    report = resumed["report"]
+    assert "Latency is low." in report and "Latency dropped further." in report
+    assert report.count("## What's New") == 1
+    # The writer got the saved delta notes, not a fresh search.
+    assert repository.checkpoints.outputs(failed["run_id"])["research"] == notes
+
+
+def test_refresh_searches_skip_the_search_cache(tmp_path):
+    search = _write_json(str(tmp_path / "search.json"), {})
+    config = _bench_config(str(tmp_path), search_fixtures=search, search_cache_mode="on")
+    try:
+        tool = research_crew._web_research_tool(config)
+        calls = tool._backend.calls
+        tool._search(QUERY)
+        tool.collect_sources(QUERY)
+        tool.collect_sources(QUERY)
+        assert calls.count(QUERY) == 3
+        # Refresh responses are still written through for normal runs.
+        searched = len(calls)
+        tool._search(QUERY)
+        assert len(calls) == searched
+    finally:
+        clear_shared_resources()
+
+
+def test_failed_refresh_finds_the_same_new_sources_again(env, monkeypatch):
+    config, repository, previous = env
+    _fail_writer(monkeypatch)
+    first = run_research_flow(config, QUERY, repository, update=True)
+    second = run_research_flow(config, QUERY, repository, update=True)
+    assert not first["success"] and not second["success"]
+
+    notes = [repository.checkpoints.outputs(r["run_id"]).get("research") for r in (first, second)]
+    assert notes[0] and notes[0] == notes[1]
+    # The sources got ids but no sighting was recorded.
+    ids = list(range(1, repository.sources.count() + 1))
+    assert {r.times_seen for r in repository.sources.get_many(ids)} == {0}
+
+    monkeypatch.undo()
+    assert run_research_flow(config, QUERY, repository, update=True)["success"]
+    assert {r.times_seen for r in repository.sources.get_many(ids)} == {1}
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.tools import search_cache
+from src.tools.search_backends import StaticSearchBackend
+from src.tools.search_cache import SearchCache, search_cache_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(search_cache.time, "time", clock)
+    return clock
+
+
+def _search(cache: SearchCache, backend: StaticSearchBackend, query: str) -> dict:
+    # The same read-through order the web research tool uses.
+    key = search_cache_key(query, max_results=3, include_answer=False)
+    data = cache.get(key)
+    if data is None:
+        data = backend.search(query, max_results=3, include_answer=False)
+        cache.put(key, data)
+    return data
+
+
+def _cache(tmp_path, **kwargs) -> SearchCache:
+    kwargs.setdefault("ttl_seconds", 3600)
+    kwargs.setdefault("max_bytes", 1 << 20)
+    return SearchCache(str(tmp_path / "search_cache.sqlite3"), **kwargs)
+
+
+def test_hit_skips_the_backend(tmp_path, clock):
+    cache, backend = _cache(tmp_path), StaticSearchBackend()
+    first = _search(cache, backend, "Vector databases")
+    second = _search(cache, backend, "  vector   DATABASES ")
+    assert second == first
+    assert backend.calls == ["Vector databases"]
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_expired_entries_are_fetched_again(tmp_path, clock):
+    cache, backend = _cache(tmp_path, ttl_seconds=60), StaticSearchBackend()
+    _search(cache, backend, "rust web frameworks")
+    clock.now += 61
+    _search(cache, backend, "rust web frameworks")
+    assert len(backend.calls) == 2
+    assert cache.stats.expired == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    backend = StaticSearchBackend()
+    entry_size = len(json.dumps(backend.search("query a", 3, False), ensure_ascii=False).encode("utf-8"))
+    cache = _cache(tmp_path, max_bytes=entry_size * 2 + 10)
+    for query in ("query a", "query b"):
+        _search(cache, backend, query)
+        clock.now += 1
+    _search(cache, backend, "query a")  # a is now more recent than b
+    clock.now += 1
+    _search(cache, backend, "query c")
+    assert cache.stats.evictions == 1
+
+    backend.calls.clear()
+    clock.now += 1
+    _search(cache, backend, "query a")
+    _search(cache, backend, "query b")
+    assert backend.calls == ["query b"]
+
+
+def test_refresh_mode_writes_but_never_reads(tmp_path, clock):
+    backend = StaticSearchBackend()
+    refresh = _cache(tmp_path, mode="refresh")
+    _search(refresh, backend, "edge ai chips")
+    _search(refresh, backend, "edge ai chips")
+    assert len(backend.calls) == 2
+    assert refresh.stats.hits == 0 and refresh.stats.writes == 2
+
+    backend.calls.clear()
+    _search(_cache(tmp_path), backend, "edge ai chips")
+    assert backend.calls == []
+
+
+def test_off_mode_neither_reads_nor_writes(tmp_path, clock):
+    cache, backend = _cache(tmp_path, mode="off"), StaticSearchBackend()
+    _search(cache, backend, "edge ai chips")
+    _search(cache, backend, "edge ai chips")
+    assert len(backend.calls) == 2
+    assert cache.stats.writes == 0
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from src.tools.search_fanout import canonical_url
+
+
+def test_tracking_parameters_are_dropped():
+    assert canonical_url("https://example.com/a?utm_source=x&utm_medium=y&ref=hn&fbclid=1&gclid=2") == (
+        "https://example.com/a"
+    )
+
+
+def test_parameters_that_only_start_like_tracking_ones_are_kept():
+    assert canonical_url("https://example.com/a?reference=1&refresh=2") == (
+        "https://example.com/a?reference=1&refresh=2"
+    )
+
+
+def test_http_and_https_copies_are_the_same_source():
+    assert canonical_url("http://www.example.com/a/") == canonical_url("https://example.com:443/a")
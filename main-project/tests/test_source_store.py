@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from src.benchmarks import _bench_config
+from src.knowledge.repository import KnowledgeRepository
+from src.knowledge.source_store import SOURCE_INDEX_HEADING, SourceStore, cited_source_ids
+
+
+def _store(tmp_path) -> SourceStore:
+    return SourceStore(tmp_path / "sources.sqlite3")
+
+
+def test_urls_that_differ_only_in_tracking_and_form_share_one_source(tmp_path):
+    store = _store(tmp_path)
+    first = store.observe([("https://www.example.org/post/?utm_source=x", "Post", "Body")])
+    again = store.observe([("http://example.org/post", "Post", "Body")])
+    (record,) = first.values()
+    (seen,) = again.values()
+    assert record.new and not seen.new
+    assert (seen.id, seen.times_seen) == (record.id, 2)
+    assert store.count() == 1
+
+
+def test_changed_content_is_flagged_and_kept(tmp_path):
+    store = _store(tmp_path)
+    store.observe([("https://example.org/a", "A", "first version")])
+    (same,) = store.observe([("https://example.org/a", "", "first  version")]).values()
+    assert not same.changed and same.title == "A"
+    (changed,) = store.observe([("https://example.org/a", "A", "second version")]).values()
+    assert changed.changed
+    assert store.get_many([changed.id])[0].snippet == "second version"
+
+
+def test_reports_link_the_sources_they_cite(tmp_path):
+    store = _store(tmp_path)
+    records = store.observe(
+        [("https://example.org/a", "A", "a"), ("https://example.org/b", "B", "b")]
+    )
+    a, b = (records[key] for key in sorted(records))
+    store.link("r1.md", [b.id, a.id, 999])
+    store.link("r2.md", [a.id])
+    assert [r.id for r in store.for_report("r1.md")] == [a.id, b.id]
+    assert {r.id: r.reports for r in store.get_many([a.id, b.id])} == {a.id: 2, b.id: 1}
+
+    store.unlink("r1.md")
+    assert store.for_report("r1.md") == []
+    assert store.get_many([b.id])[0].reports == 0
+
+
+def test_saved_reports_get_a_source_index_of_their_citations(tmp_path):
+    repository = KnowledgeRepository(_bench_config(str(tmp_path), report_storage="files"))
+    records = repository.sources.observe([("https://example.org/a", "Paper A", "a")])
+    (a,) = records.values()
+    body = repository.resolve_citations(f"Finding [{a.label}], again [{a.label}] and unknown [S999].")
+    assert cited_source_ids(body) == [a.id, 999]
+    assert f"{SOURCE_INDEX_HEADING}\n\n- [{a.label}] Paper A — https://example.org/a" in body
+    assert repository.resolve_citations(body) == body
+
+    saved = repository.save_entry("q", body)
+    assert [r.id for r in repository.sources.for_report(saved.name)] == [a.id]
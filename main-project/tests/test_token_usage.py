@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from crewai import Agent, Crew, Process, Task
+
+from src.agents.research_crew import _record_token_usage
+from src.config import AppConfig
+from src.llm import ReplayLLM, track_usage, with_rate_limits
+from src.tracing import Trace
+
+
+FIXTURES = [
+    {"agent": "Researcher", "step": 0, "response": "Thought: I now know the final answer\nFinal Answer: notes"},
+    {"agent": "Writer", "step": 0, "response": "Thought: I now know the final answer\nFinal Answer: report"},
+]
+
+
+def _config() -> AppConfig:
+    return AppConfig(groq_api_key="replay", groq_rpm=0, groq_tpm=0)
+
+
+def _run(llm) -> dict:
+    # Both agents share one LLM instance, as the pooled crews do.
+    researcher = Agent(role="Researcher", goal="Take notes", backstory="Takes notes.", llm=llm)
+    writer = Agent(role="Writer", goal="Write a report", backstory="Writes reports.", llm=llm)
+    crew = Crew(
+        agents=[researcher, writer],
+        tasks=[
+            Task(description="Take notes on vector databases.", expected_output="Notes", agent=researcher),
+            Task(description="Write the report.", expected_output="A report", agent=writer),
+        ],
+        process=Process.sequential,
+    )
+    trace = Trace("research_run", query="vector databases")
+    with track_usage() as usage:
+        crew.kickoff()
+    _record_token_usage(trace, usage)
+    return {k: v for k, v in trace.summary()["counters"].items() if k.endswith("tokens") or k == "successful_requests"}
+
+
+def test_identical_runs_report_the_same_token_counts():
+    llm = with_rate_limits(ReplayLLM(FIXTURES), _config())
+    first = _run(llm)
+    second = _run(llm)
+
+    assert first["successful_requests"] == 2
+    assert first["prompt_tokens"] > 0
+    assert second == first
+    # The shared instance keeps lifetime totals; those are not what a run reports.
+    assert llm.get_token_usage_summary().successful_requests == 4
+
+
+def test_usage_outside_a_tracked_block_is_not_counted():
+    llm = with_rate_limits(ReplayLLM(FIXTURES), _config())
+    llm.call("Researcher: warm up")
+    with track_usage() as usage:
+        llm.call("Researcher: take notes")
+    assert usage["successful_requests"] == 1
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from src.agents import research_crew
+from src.benchmarks import _bench_config
+from src.watchlist import DEFAULT_RUN_TOKENS, WatchHistory, WatchlistScheduler, WatchRun
+
+
+TOPICS = ["edge ai chips", "vector databases", "wasm runtimes"]
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    schedulers = []
+
+    def make(**overrides):
+        watchlist = tmp_path / "watchlist.txt"
+        watchlist.write_text("\n".join(TOPICS) + "\n", encoding="utf-8")
+        overrides.setdefault("watchlist_workers", len(TOPICS))
+        config = _bench_config(str(tmp_path), watchlist_file=str(watchlist), **overrides)
+        history = WatchHistory(tmp_path / "watchlist.sqlite3")
+        scheduler = WatchlistScheduler(config, None, history)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def test_topic_is_released_when_recording_its_run_fails(make_scheduler, monkeypatch):
+    scheduler = make_scheduler(watchlist_workers=1)
+    release = threading.Event()
+
+    def refresh(*args, **kwargs):
+        release.wait(10)
+        return {"success": True}
+
+    monkeypatch.setattr(research_crew, "run_research_flow", refresh)
+
+    def broken_record(run):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(scheduler.history, "record", broken_record)
+    assert scheduler.tick() == 1
+    (future,) = scheduler._running.values()
+    release.set()
+    with pytest.raises(OSError):
+        future.result(10)
+    assert scheduler.running() == []
+    assert scheduler._reserved == {}
+
+
+def _hold_runs(scheduler):
+    """Make refreshes stay in flight, holding their reservation, until the returned event is set."""
+    release = threading.Event()
+
+    def run(topic):
+        release.wait(10)
+        with scheduler._lock:
+            scheduler._running.pop(topic.key, None)
+            scheduler._reserved.pop(topic.key, None)
+
+    scheduler._run = run
+    return release
+
+
+def test_runs_in_flight_count_against_the_daily_budget(make_scheduler):
+    scheduler = make_scheduler(watchlist_daily_tokens=int(DEFAULT_RUN_TOKENS * 2.5))
+    release = _hold_runs(scheduler)
+    try:
+        assert scheduler.tick() == 2
+        assert scheduler.tick() == 0
+        assert len(scheduler.running()) == 2
+    finally:
+        release.set()
+
+
+def test_daily_budget_counts_only_the_last_24_hours(make_scheduler):
+    scheduler = make_scheduler(watchlist_daily_tokens=20000)
+    release = _hold_runs(scheduler)
+    now = time.time()
+    try:
+        scheduler.history.record(WatchRun("other topic", now - 25 * 3600, 60.0, "ok", tokens=15000))
+        assert scheduler.tick() == 1
+
+        scheduler.history.record(WatchRun("other topic", now - 3600, 60.0, "ok", tokens=15000))
+        release.set()
+        scheduler.close()
+        assert scheduler.running() == []
+        # 15k spent today plus a 15k run would exceed the 20k budget.
+        assert scheduler.tick() == 0
+    finally:
+        release.set()
+
+
+def test_no_budget_means_no_gating(make_scheduler):
+    scheduler = make_scheduler(watchlist_daily_tokens=0)
+    release = _hold_runs(scheduler)
+    try:
+        scheduler.history.record(WatchRun("other topic", time.time(), 60.0, "ok", tokens=10**9))
+        assert scheduler.tick() == len(TOPICS)
+    finally:
+        release.set()
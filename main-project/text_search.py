@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from how in into is it its of on or "
+    "that the their this to was what when where which who why will with "
+    "about vs versus do does using use".split()
+)
+
+_WORD_RE = re.compile(r"[A-Za-z]+|\d+")
+_CAMEL_RE = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+def normalize_token(word: str) -> str:
+    # Cheap plural folding so "datasets" matches "dataset" without a stemmer.
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    tokens: List[str] = []
+    for chunk in _CAMEL_RE.split(text):
+        for word in _WORD_RE.findall(chunk):
+            word = word.lower()
+            if not keep_stopwords and (word in STOPWORDS or len(word) < 2):
+                continue
+            tokens.append(normalize_token(word))
+    return tokens
+
+
+def bm25_idf(n_docs: int, df: int) -> float:
+    return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+
+def bm25_term_score(
+    tf: int,
+    df: int,
+    n_docs: int,
+    doc_len: int,
+    avg_len: float,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> float:
+    norm = k1 * (1.0 - b + b * doc_len / (avg_len or 1.0))
+    return bm25_idf(n_docs, df) * tf * (k1 + 1.0) / (tf + norm)
+
+
+class BM25Index:
+    """Small in-memory inverted index with incremental add/remove."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._doc_len: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+    def add(self, doc_id: str, tokens: Iterable[str]) -> None:
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+        counts = Counter(tokens)
+        length = sum(counts.values())
+        self._doc_len[doc_id] = length
+        self._doc_terms[doc_id] = list(counts)
+        self._total_len += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str) -> None:
+        length = self._doc_len.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_len -= length
+        for term in self._doc_terms.pop(doc_id, []):
+            docs = self._postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(doc_id, None)
+            if not docs:
+                del self._postings[term]
+
+    def search(self, query_tokens: Iterable[str], k: int = 10) -> List[Tuple[str, float]]:
+        n_docs = len(self._doc_len)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs
+        scores: Dict[str, float] = {}
+        for term in set(query_tokens):
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            df = len(docs)
+            for doc_id, tf in docs.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + bm25_term_score(
+                    tf, df, n_docs, self._doc_len[doc_id], avg_len, self.k1, self.b
+                )
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"k1": self.k1, "b": self.b, "doc_len": self._doc_len, "postings": self._postings}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "BM25Index":
+        index = cls(k1=float(data.get("k1", 1.2)), b=float(data.get("b", 0.75)))
+        index._doc_len = {k: int(v) for k, v in dict(data.get("doc_len", {})).items()}
+        index._postings = {
+            term: {doc: int(tf) for doc, tf in docs.items()}
+            for term, docs in dict(data.get("postings", {})).items()
+        }
+        for term, docs in index._postings.items():
+            for doc in docs:
+                index._doc_terms.setdefault(doc, []).append(term)
+        index._total_len = sum(index._doc_len.values())
+        return index
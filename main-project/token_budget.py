@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+from ..config import AppConfig
+from ..text_search import BM25Index, tokenize
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_SHINGLE_SIZE = 5
+DUPLICATE_CONTAINMENT = 0.8
+PASSAGE_TOKENS = 60
+MIN_CALL_TOKENS = 64
+BUDGET_EXHAUSTED = (
+    "The tool-output token budget for this research run is used up. "
+    "Write your notes from the information gathered so far."
+)
+
+_encoder_lock = threading.Lock()
+_encoder = None
+
+
+def _get_encoder():
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken is optional; fall back to a character heuristic.
+                _encoder = False
+        return _encoder
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    # Llama/GPT BPE vocabularies average about four characters per token on English prose.
+    return max(1, (len(text) + 3) // 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoder = _get_encoder()
+    if encoder:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]).rstrip() + "…"
+    return text[: max_tokens * 4].rstrip() + "…"
+
+
+def _shingles(text: str) -> Set[int]:
+    words = tokenize(text, keep_stopwords=True)
+    if len(words) < _SHINGLE_SIZE:
+        words = words + [""] * (_SHINGLE_SIZE - len(words))
+    return {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(words[i : i + _SHINGLE_SIZE]).encode("utf-8"), digest_size=8).digest(),
+            "big",
+        )
+        for i in range(len(words) - _SHINGLE_SIZE + 1)
+    }
+
+
+class TokenBudget:
+    """Token allowance for tool output, shared by every tool call of one run.
+
+    Also remembers the passages already shown to the model so that overlapping
+    snippets from later searches are not sent again.
+    """
+
+    def __init__(self, per_call: int, per_run: int):
+        self.per_call = per_call
+        self.per_run = per_run
+        self.used = 0
+        self._seen: Set[int] = set()
+        self._keys: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        if self.per_run <= 0:
+            return self.per_call if self.per_call > 0 else 1 << 30
+        return max(0, self.per_run - self.used)
+
+    def call_limit(self) -> int:
+        limit = self.per_call if self.per_call > 0 else 1 << 30
+        return min(limit, self.remaining)
+
+    def charge(self, tokens: int) -> None:
+        with self._lock:
+            self.used += tokens
+
+    def is_duplicate(self, text: str) -> bool:
+        shingles = _shingles(text)
+        if not shingles:
+            return False
+        with self._lock:
+            overlap = len(shingles & self._seen)
+        return overlap / len(shingles) >= DUPLICATE_CONTAINMENT
+
+    def remember(self, text: str) -> None:
+        shingles = _shingles(text)
+        with self._lock:
+            self._seen |= shingles
+
+    def seen_key(self, key: str) -> bool:
+        """Whether ``key`` (e.g. a dataset already described) was shown earlier in the run."""
+        with self._lock:
+            return key in self._keys
+
+    def remember_key(self, key: str) -> None:
+        with self._lock:
+            self._keys.add(key)
+
+
+_run_budget: ContextVar[Optional[TokenBudget]] = ContextVar("tool_token_budget", default=None)
+
+
+@contextmanager
+def run_budget(config: AppConfig) -> Iterator[TokenBudget]:
+    budget = TokenBudget(config.tool_call_token_budget, config.run_token_budget)
+    token = _run_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _run_budget.reset(token)
+
+
+def current_budget(per_call: int) -> TokenBudget:
+    """The run's budget, or a fresh per-call one when a tool is used outside a run."""
+    budget = _run_budget.get()
+    if budget is None:
+        budget = TokenBudget(per_call, 0)
+    return budget
+
+
+def split_passages(text: str, max_tokens: int = PASSAGE_TOKENS) -> List[str]:
+    passages: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        n = count_tokens(sentence)
+        if current and size + n > max_tokens:
+            passages.append(" ".join(current))
+            current, size = [], 0
+        current.append(truncate_to_tokens(sentence, max_tokens))
+        size += min(n, max_tokens)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+@dataclass
+class Passage:
+    source: int
+    position: int
+    text: str
+    tokens: int
+    score: float = 0.0
+
+
+@dataclass
+class SelectedPassages:
+    by_source: Dict[int, List[str]] = field(default_factory=dict)
+    tokens: int = 0
+    dropped_duplicates: int = 0
+
+
+def select_passages(
+    query: str,
+    documents: Sequence[str],
+    max_tokens: int,
+    budget: Optional[TokenBudget] = None,
+) -> SelectedPassages:
+    """Pick the passages of ``documents`` most relevant to ``query`` within ``max_tokens``.
+
+    ``documents`` are in priority order. Every document first gets its best
+    passage (so highly ranked sources are not crowded out by one long page),
+    then the remaining room goes to the highest-scoring passages overall.
+    Passages already sent earlier in the run are skipped.
+    """
+    passages: List[Passage] = []
+    index = BM25Index()
+    for d, text in enumerate(documents):
+        for p, chunk in enumerate(split_passages(text)):
+            passage = Passage(source=d, position=p, text=chunk, tokens=count_tokens(chunk))
+            index.add(str(len(passages)), tokenize(chunk))
+            passages.append(passage)
+    for doc_id, score in index.search(tokenize(query), k=len(passages)):
+        passages[int(doc_id)].score = score
+
+    selected = SelectedPassages()
+    chosen: List[Passage] = []
+    call_seen: Set[int] = set()
+
+    def take(passage: Passage) -> bool:
+        if selected.tokens + passage.tokens > max_tokens:
+            return False
+        shingles = _shingles(passage.text)
+        if shingles and len(shingles & call_seen) / len(shingles) >= DUPLICATE_CONTAINMENT:
+            selected.dropped_duplicates += 1
+            return False
+        if budget is not None and budget.is_duplicate(passage.text):
+            selected.dropped_duplicates += 1
+            return False
+        call_seen.update(shingles)
+        chosen.append(passage)
+        selected.tokens += passage.tokens
+        return True
+
+    by_doc: Dict[int, List[Passage]] = {}
+    for passage in passages:
+        by_doc.setdefault(passage.source, []).append(passage)
+    leftovers: List[Passage] = []
+    for d in sorted(by_doc):
+        ranked = sorted(by_doc[d], key=lambda p: (-p.score, p.position))
+        for i, passage in enumerate(ranked):
+            if take(passage):
+                leftovers.extend(ranked[i + 1 :])
+                break
+    for passage in sorted(leftovers, key=lambda p: (-p.score, p.source, p.position)):
+        take(passage)
+
+    for passage in sorted(chosen, key=lambda p: (p.source, p.position)):
+        selected.by_source.setdefault(passage.source, []).append(passage.text)
+        if budget is not None:
+            budget.remember(passage.text)
+    return selected
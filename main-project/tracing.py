@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import AppConfig
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float
+    duration_s: float = 0.0
+    thread_id: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Spans collected for one research run."""
+
+    def __init__(self, name: str, **attrs: Any):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs: Dict[str, Any] = dict(attrs)
+        self.started_at = time.time()
+        self.duration_s = 0.0
+        self._t0 = time.perf_counter()
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _new_span(self, name: str, parent: Optional[Span], attrs: Dict[str, Any]) -> Span:
+        s = Span(
+            name=name,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            thread_id=threading.get_ident(),
+            attrs=attrs,
+        )
+        with self._lock:
+            self.spans.append(s)
+        return s
+
+    def add_span(self, name: str, start: float, duration_s: float, **attrs: Any) -> Span:
+        """Record a span timed outside a ``with`` block, e.g. between two callbacks."""
+        s = self._new_span(name, None, attrs)
+        s.start = start
+        s.duration_s = duration_s
+        return s
+
+    def finish(self) -> None:
+        self.duration_s = time.perf_counter() - self._t0
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, float]] = {}
+        counters: Dict[str, float] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            stage = stages.setdefault(s.name, {"count": 0, "total_s": 0.0})
+            stage["count"] += 1
+            stage["total_s"] = round(stage["total_s"] + s.duration_s, 4)
+            for key, value in s.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    counters[key] = counters.get(key, 0) + value
+        for key, value in self.attrs.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                counters[key] = counters.get(key, 0) + value
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_s": round(self.duration_s, 4),
+            "query": self.attrs.get("query"),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(asdict(s), trace_id=self.trace_id) for s in self.spans]
+
+    def to_chrome(self) -> Dict[str, Any]:
+        events = [
+            {
+                "name": self.name,
+                "ph": "X",
+                "ts": int(self.started_at * 1e6),
+                "dur": int(self.duration_s * 1e6),
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {k: v for k, v in self.attrs.items() if _is_plain(v)},
+            }
+        ]
+        for record in self.to_records():
+            events.append(
+                {
+                    "name": record["name"],
+                    "ph": "X",
+                    "ts": int(record["start"] * 1e6),
+                    "dur": int(record["duration_s"] * 1e6),
+                    "pid": os.getpid(),
+                    "tid": record["thread_id"],
+                    "args": {k: v for k, v in record["attrs"].items() if _is_plain(v)},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _is_plain(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool)) or value is None
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("research_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("research_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def activate(trace: Trace) -> Iterator[Trace]:
+    """Make ``trace`` current for this block, e.g. on a worker thread."""
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def start_trace(name: str, **attrs: Any) -> Iterator[Trace]:
+    trace = Trace(name, **attrs)
+    try:
+        with activate(trace):
+            yield trace
+    finally:
+        trace.finish()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span; a no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    s = trace._new_span(name, _current_span.get(), attrs)
+    token = _current_span.set(s)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as exc:
+        s.attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        s.duration_s = time.perf_counter() - started
+        _current_span.reset(token)
+
+
+def record(**attrs: Any) -> None:
+    """Set attributes on the current span (or the trace itself at top level)."""
+    s = _current_span.get()
+    if s is not None:
+        s.attrs.update(attrs)
+        return
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+def incr(key: str, amount: float = 1) -> None:
+    s = _current_span.get()
+    target = s.attrs if s is not None else None
+    if target is None:
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        target = trace.attrs
+    target[key] = target.get(key, 0) + amount
+
+
+def export_trace(trace: Trace, config: AppConfig) -> Optional[str]:
+    """Write the trace in the configured formats and append its summary to runs.jsonl."""
+    if config.trace_format == "off":
+        return None
+    os.makedirs(config.trace_dir, exist_ok=True)
+    stem = os.path.join(
+        config.trace_dir, f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(trace.started_at))}_{trace.trace_id}"
+    )
+    path = None
+    if config.trace_format in ("jsonl", "both"):
+        path = f"{stem}.jsonl"
+        with open(path, "w", encoding="utf-8") as fh:
+            for rec in trace.to_records():
+                fh.write(json.dumps(rec, default=str) + "\n")
+    if config.trace_format in ("chrome", "both"):
+        path = f"{stem}.trace.json"
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(trace.to_chrome(), fh, default=str)
+    with open(os.path.join(config.trace_dir, "runs.jsonl"), "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(dict(trace.summary(), trace_file=path), default=str) + "\n")
+    return path
+
+
+def recent_runs(config: AppConfig, limit: int = 20) -> List[Dict[str, Any]]:
+    path = os.path.join(config.trace_dir, "runs.jsonl")
+    try:
+        with open(path, "rb") as fh:
+            # Only the tail of the log is needed; avoid reading it all.
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            fh.seek(max(0, size - 256 * 1024))
+            lines = fh.read().decode("utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+    runs = []
+    for line in reversed(lines):
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(runs) >= limit:
+            break
+    return runs
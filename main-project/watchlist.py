@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .config import AppConfig, load_config
+from .knowledge.repository import KnowledgeRepository, normalize_report_query
+from .resources import prewarm, shared_repository
+
+
+# Rough size of a full research run (prompt + completion tokens) and its web
+# searches, used to pace runs until the history has real numbers.
+DEFAULT_RUN_TOKENS = 15000
+DEFAULT_RUN_SEARCHES = 8
+# A failed topic is retried after this long, or its interval if that is shorter.
+RETRY_SECONDS = 3600.0
+HISTORY_WINDOW = 20
+
+
+def watchlist_history_path(config: AppConfig) -> Path:
+    return Path(config.knowledge_base_dir) / ".index" / "watchlist.sqlite3"
+
+
+@dataclass
+class WatchTopic:
+    query: str
+    every_hours: float
+    tags: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return normalize_report_query(self.query)
+
+
+def read_watchlist(stream: Iterable[str], every_hours: float) -> List[WatchTopic]:
+    """One topic per line, or JSONL objects with ``query`` and optional ``every_hours``/``tags``.
+
+    Topics that normalize to the same query are listed once (the first wins).
+    """
+    topics: List[WatchTopic] = []
+    seen: Set[str] = set()
+    for raw in stream:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        item: Any = line
+        if line.startswith("{") or line.startswith('"'):
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = line
+        if isinstance(item, dict):
+            topic = WatchTopic(
+                query=str(item.get("query") or "").strip(),
+                every_hours=float(item.get("every_hours") or every_hours),
+                tags=[str(t) for t in item.get("tags") or []],
+            )
+        else:
+            topic = WatchTopic(query=str(item).strip(), every_hours=every_hours)
+        if topic.query and topic.key not in seen:
+            seen.add(topic.key)
+            topics.append(topic)
+    return topics
+
+
+def load_watchlist(path: Path, every_hours: float) -> List[WatchTopic]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return read_watchlist(fh, every_hours)
+    except FileNotFoundError:
+        return []
+
+
+@dataclass
+class WatchRun:
+    query: str
+    started_at: float
+    duration_s: float
+    status: str
+    tokens: int = 0
+    searches: int = 0
+    report_name: Optional[str] = None
+    error: str = ""
+
+
+class WatchHistory:
+    """Per-topic run history of the watchlist scheduler.
+
+    Besides showing when each topic was last refreshed and how long it took,
+    the history drives scheduling: a topic is due one interval after its last
+    run, the rolling 24-hour token spend is checked against the daily budget,
+    and recent runs' token and search counts pace how often runs start.
+    """
+
+    _COLUMNS = "query, started_at, duration_s, status, tokens, searches, report_name, error"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS watch_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    query_key TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    duration_s REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    searches INTEGER NOT NULL DEFAULT 0,
+                    report_name TEXT,
+                    error TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS watch_runs_by_topic ON watch_runs (query_key, started_at);
+                CREATE INDEX IF NOT EXISTS watch_runs_by_start ON watch_runs (started_at);
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, run: WatchRun) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT INTO watch_runs (query_key, {self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_report_query(run.query),
+                    run.query,
+                    run.started_at,
+                    run.duration_s,
+                    run.status,
+                    run.tokens,
+                    run.searches,
+                    run.report_name,
+                    run.error,
+                ),
+            )
+            conn.commit()
+
+    def last_runs(self) -> Dict[str, WatchRun]:
+        """The latest run of every topic, keyed by normalized query."""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT query_key, {self._COLUMNS} FROM watch_runs AS r WHERE started_at = "
+                "(SELECT MAX(started_at) FROM watch_runs WHERE query_key = r.query_key)"
+            ).fetchall()
+        return {row[0]: WatchRun(*row[1:]) for row in rows}
+
+    def for_topic(self, query: str, limit: int = HISTORY_WINDOW) -> List[WatchRun]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {self._COLUMNS} FROM watch_runs WHERE query_key = ? "
+                "ORDER BY started_at DESC LIMIT ?",
+                (normalize_report_query(query), limit),
+            ).fetchall()
+        return [WatchRun(*row) for row in rows]
+
+    def tokens_since(self, since: float) -> int:
+        with self._lock:
+            (total,) = self._connection().execute(
+                "SELECT COALESCE(SUM(tokens), 0) FROM watch_runs WHERE started_at >= ?", (since,)
+            ).fetchone()
+        return int(total)
+
+    def run_cost(self, limit: int = HISTORY_WINDOW) -> Dict[str, float]:
+        """Mean tokens and web searches of recent runs (defaults before any run)."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COUNT(*), AVG(tokens), AVG(searches) FROM "
+                "(SELECT tokens, searches FROM watch_runs WHERE status != 'error' "
+                "ORDER BY started_at DESC LIMIT ?)",
+                (limit,),
+            ).fetchone()
+        if not row[0]:
+            return {"tokens": float(DEFAULT_RUN_TOKENS), "searches": float(DEFAULT_RUN_SEARCHES)}
+        return {"tokens": float(row[1]), "searches": float(row[2])}
+
+
+def next_due(topic: WatchTopic, last: Optional[WatchRun]) -> float:
+    if last is None:
+        return 0.0
+    interval = topic.every_hours * 3600
+    if last.status == "error":
+        interval = min(interval, RETRY_SECONDS)
+    return last.started_at + interval
+
+
+def start_gap(config: AppConfig, cost: Dict[str, float]) -> float:
+    """Seconds between run starts so the average load fits the Groq and Tavily limits."""
+    gaps = [0.0]
+    if config.groq_tpm > 0:
+        gaps.append(60.0 * cost["tokens"] / config.groq_tpm)
+    if config.tavily_rpm > 0:
+        gaps.append(60.0 * cost["searches"] / config.tavily_rpm)
+    return max(gaps)
+
+
+def _run_counters(result: Dict[str, Any]) -> Dict[str, int]:
+    # The trace's token counters are this run's own LLM calls (see
+    # ``llm.track_usage``), including those of a run that failed part way.
+    counters = (result.get("trace") or {}).get("counters") or {}
+    tokens = counters.get("prompt_tokens", 0) + counters.get("completion_tokens", 0)
+    return {"tokens": int(tokens), "searches": int(counters.get("cache_misses", 0))}
+
+
+class WatchlistScheduler:
+    """Refreshes watchlist topics in the background as they come due.
+
+    Every topic is run with ``run_research_flow(..., update=True)``, so a topic
+    with a saved report only writes up sources that are new since. A failed
+    refresh is checkpointed as an update run, which later research runs of
+    the query never resume. At most
+    ``WATCHLIST_WORKERS`` runs are in flight; starts are spaced by
+    ``start_gap`` and held back while the last 24 hours' tokens plus the
+    in-flight runs' expected tokens would exceed ``WATCHLIST_DAILY_TOKENS``.
+    Runs share this process's Groq/Tavily rate limiters.
+    """
+
+    def __init__(
+        self,
+        config: AppConfig,
+        repository: KnowledgeRepository,
+        history: WatchHistory,
+        path: Optional[Path] = None,
+        on_event: Optional[Callable[[str], None]] = None,
+    ):
+        self.config = config
+        self.repository = repository
+        self.history = history
+        self.path = Path(path or config.watchlist_file)
+        self._on_event = on_event or (lambda message: None)
+        self._pool = ThreadPoolExecutor(
+            max_workers=config.watchlist_workers, thread_name_prefix="watchlist"
+        )
+        self._lock = threading.Lock()
+        self._running: Dict[str, Future] = {}
+        self._reserved: Dict[str, float] = {}
+        self._next_start = 0.0
+        self._over_budget = False
+        self._wake = threading.Event()
+        self._topics: List[WatchTopic] = []
+        self._mtime: Optional[float] = None
+
+    def topics(self) -> List[WatchTopic]:
+        """The watchlist, re-read whenever the file changes."""
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._mtime:
+            self._topics = load_watchlist(self.path, self.config.watchlist_interval_hours)
+            self._mtime = mtime
+        return self._topics
+
+    def due(self, now: Optional[float] = None) -> List[WatchTopic]:
+        """Topics that are due and not running, most overdue first."""
+        now = time.time() if now is None else now
+        last = self.history.last_runs()
+        with self._lock:
+            running = set(self._running)
+        due = [
+            (next_due(topic, last.get(topic.key)), topic)
+            for topic in self.topics()
+            if topic.key not in running
+        ]
+        return [topic for when, topic in sorted(due, key=lambda item: item[0]) if when <= now]
+
+    def running(self) -> List[str]:
+        with self._lock:
+            return list(self._running)
+
+    def tick(self) -> int:
+        """Start as many due topics as the worker, pacing and token limits allow."""
+        started = 0
+        for topic in self.due():
+            now = time.time()
+            with self._lock:
+                if len(self._running) >= self.config.watchlist_workers or now < self._next_start:
+                    break
+            cost = self.history.run_cost()
+            if not self._within_budget(now, cost["tokens"]):
+                break
+            with self._lock:
+                self._running[topic.key] = self._pool.submit(self._run, topic)
+                self._reserved[topic.key] = cost["tokens"]
+                self._next_start = now + start_gap(self.config, cost)
+            started += 1
+        return started
+
+    def _within_budget(self, now: float, expected_tokens: float) -> bool:
+        budget = self.config.watchlist_daily_tokens
+        if budget <= 0:
+            return True
+        with self._lock:
+            reserved = sum(self._reserved.values())
+        spent = self.history.tokens_since(now - 86400)
+        within = spent + reserved + expected_tokens <= budget
+        if not within and not self._over_budget:
+            self._on_event(
+                f"Daily token budget reached ({spent} of {budget} tokens used in the last 24h); "
+                "waiting for older runs to age out."
+            )
+        self._over_budget = not within
+        return within
+
+    def _run(self, topic: WatchTopic) -> WatchRun:
+        from .agents.research_crew import describe_research_error, run_research_flow
+
+        self._on_event(f"Refreshing {topic.query!r}")
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            try:
+                result = run_research_flow(
+                    self.config, topic.query, self.repository, tags=topic.tags, update=True
+                )
+            except Exception as exc:
+                result = describe_research_error(exc)
+            if result.get("success"):
+                status = "unchanged" if result.get("unchanged") else "ok"
+            else:
+                status = "error"
+            report_path = result.get("report_path")
+            run = WatchRun(
+                query=topic.query,
+                started_at=started_at,
+                duration_s=round(time.perf_counter() - started, 3),
+                status=status,
+                report_name=Path(report_path).name if report_path else None,
+                error=str(result.get("error") or "")[:1000],
+                **_run_counters(result),
+            )
+            self.history.record(run)
+        finally:
+            # Free the slot even if recording failed, or the topic would never run again.
+            with self._lock:
+                self._running.pop(topic.key, None)
+                self._reserved.pop(topic.key, None)
+            self._wake.set()
+        self._on_event(
+            f"{status:>9} {run.duration_s:>8.1f}s {run.tokens:>7} tokens  {topic.query}"
+            + (f" — {run.error}" if run.error else "")
+        )
+        return run
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """How long the scheduler can sleep before something may become startable."""
+        now = time.time() if now is None else now
+        last = self.history.last_runs()
+        with self._lock:
+            running = set(self._running)
+            wake = [self._next_start] if self._next_start > now else []
+        wake.extend(
+            next_due(topic, last.get(topic.key))
+            for topic in self.topics()
+            if topic.key not in running
+        )
+        return max(0.0, min(wake, default=now + self.config.watchlist_poll_seconds) - now)
+
+    def serve(self, stop: Optional[threading.Event] = None, once: bool = False) -> None:
+        """Run due topics until ``stop`` is set; with ``once``, until nothing is due or running."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.tick()
+            running = self.running()
+            if once and not running and (self._over_budget or not self.due()):
+                break
+            wait = self.config.watchlist_poll_seconds
+            if len(running) < self.config.watchlist_workers:
+                wait = min(wait, max(1.0, self.seconds_until_next()))
+            # A finished run frees a worker; look for due topics right away.
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+def _print_status(scheduler: WatchlistScheduler) -> None:
+    topics = scheduler.topics()
+    if not topics:
+        print(f"No topics in {scheduler.path}.")
+        return
+    last = scheduler.history.last_runs()
+    now = time.time()
+    for topic in topics:
+        run = last.get(topic.key)
+        due = next_due(topic, run)
+        when = "now" if due <= now else time.strftime("%Y-%m-%d %H:%M", time.localtime(due))
+        if run is None:
+            print(f"{'never run':>9} {'':>9} {'':>14}  next {when:<16}  {topic.query}")
+            continue
+        print(
+            f"{run.status:>9} {run.duration_s:>8.1f}s {run.tokens:>7} tokens  next {when:<16}  {topic.query}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Keep reports for a watchlist of topics fresh by refreshing them on a schedule."
+    )
+    parser.add_argument(
+        "--file",
+        default=None,
+        help="Watchlist file: one topic per line or JSONL objects (default: WATCHLIST_FILE).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Topics refreshed at the same time (default: WATCHLIST_WORKERS).",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Refresh the topics that are due now, then exit.",
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Show each topic's last run and next due time, then exit.",
+    )
+    args = parser.parse_args(argv)
+    config = load_config()
+    if args.workers is not None:
+        config = dataclasses.replace(config, watchlist_workers=max(1, args.workers))
+
+    history = WatchHistory(watchlist_history_path(config))
+    repository = shared_repository(config)
+    scheduler = WatchlistScheduler(
+        config,
+        repository,
+        history,
+        path=Path(args.file) if args.file else None,
+        on_event=lambda message: print(time.strftime("%H:%M:%S"), message, flush=True),
+    )
+    if args.status:
+        _print_status(scheduler)
+        return 0
+    if not scheduler.topics():
+        print(f"No topics in {scheduler.path}.")
+        return 1
+
+    if config.prewarm_imports:
+        prewarm()
+    print(
+        f"Watching {len(scheduler.topics())} topic(s) from {scheduler.path} with "
+        f"{config.watchlist_workers} worker(s); Ctrl+C to stop."
+    )
+    stop = threading.Event()
+    try:
+        scheduler.serve(stop, once=args.once)
+    except KeyboardInterrupt:
+        print("Stopping after the running topics finish...")
+    finally:
+        stop.set()
+        scheduler.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())